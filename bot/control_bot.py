@@ -3,11 +3,12 @@
 """
 
 import asyncio
+import html
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from config import BOT_TOKEN
+from config import app_config
 from .handlers import router
 from .globals import set_monitor_instance, get_monitor_instance
 
@@ -19,16 +20,18 @@ class ControlBot:
     """Класс управляющего бота на aiogram"""
     
     def __init__(self, monitor=None):
-        self.bot = Bot(token=BOT_TOKEN)
+        self.bot = Bot(token=app_config.bot_token)
         self.storage = MemoryStorage()
         self.dp = Dispatcher(storage=self.storage)
         self.monitor = monitor
+        self._ready = asyncio.Event()
         
         # Устанавливаем глобальный экземпляр монитора
         set_monitor_instance(monitor)
         
         # Регистрируем роутер
         self.dp.include_router(router)
+        self.dp.startup.register(self._on_startup)
     
     async def start(self):
         """Запуск бота"""
@@ -40,25 +43,53 @@ class ControlBot:
         
         await self.dp.start_polling(self.bot)
     
+    async def _on_startup(self):
+        """Вызывается диспетчером, когда polling запущен"""
+        self._ready.set()
+    
+    async def wait_until_ready(self):
+        """Ожидает запуска polling"""
+        await self._ready.wait()
+    
+    async def _send_to_admins(self, text: str) -> int:
+        """Параллельно отправляет сообщение всем админам, возвращает количество успешных отправок"""
+        from config import get_admin_list
+        admin_list = get_admin_list()
+        
+        async def send(admin_id: int) -> bool:
+            try:
+                await self.bot.send_message(chat_id=admin_id, text=text, parse_mode="HTML")
+                return True
+            except Exception as e:
+                logger.warning(f"Не удалось отправить уведомление админу {admin_id}: {e}")
+                return False
+        
+        results = await asyncio.gather(*(send(admin_id) for admin_id in admin_list))
+        return sum(results)
+    
     async def stop(self):
         """Остановка бота"""
         logger.info("Остановка управляющего бота...")
         await self.bot.session.close()
     
-    async def _handle_found_message(self, message_data):
+    async def _handle_found_message(self, found_message):
         """Обработка найденного сообщения"""
         try:
-            from config import get_admin_list
             from datetime import datetime
             
             # Формируем сообщение для админов
-            channel_name = message_data.get('channel_name', 'Неизвестный канал')
-            keywords = ', '.join(message_data.get('found_keywords', []))
-            message_text = message_data.get('text', '')
+            channel_name = found_message.channel_name or 'Неизвестный канал'
+            # Шаблоны (/regex) могут содержать < и &
+            keywords = html.escape(', '.join(found_message.found_keywords))
+            # Совпадения с опечатками показываем отдельно от точных
+            fuzzy_line = ""
+            if found_message.fuzzy_keywords:
+                fuzzy_line = f"🔍 <b>Похоже на (с опечатками):</b> <i>{html.escape(', '.join(found_message.fuzzy_keywords))}</i>\n"
+            message_text = found_message.text
             
             # Получаем информацию о пользователе
-            sender_full_name = message_data.get('sender_full_name', 'Неизвестный')
-            sender_username = message_data.get('sender_username', '')
+            sender_full_name = found_message.sender_full_name or 'Неизвестный'
+            sender_username = found_message.sender_username or ''
             
             # Формируем строку с информацией об отправителе
             sender_info = sender_full_name
@@ -67,39 +98,37 @@ class ControlBot:
             
             # Получаем московское время
             moscow_time_str = "Неизвестно"
-            if message_data.get('moscow_time'):
+            if found_message.moscow_time:
                 try:
-                    moscow_dt = datetime.fromisoformat(message_data['moscow_time'])
+                    moscow_dt = datetime.fromisoformat(found_message.moscow_time)
                     moscow_time_str = moscow_dt.strftime("%d.%m.%Y %H:%M:%S MSK")
                 except:
-                    moscow_time_str = message_data.get('moscow_time', 'Неизвестно')
+                    moscow_time_str = found_message.moscow_time
             
             # Обрезаем длинное сообщение
             if len(message_text) > 500:
                 message_text = message_text[:500] + '...'
             
+            # Запись, обновленная после правки, получает новые ключевые слова
+            if found_message.extra and found_message.extra.get('edit_date'):
+                title = "✏️ <b>Сообщение изменено, найдены новые ключевые слова!</b>"
+            else:
+                title = "🎯 <b>Найдено новое сообщение!</b>"
+            
             notification_text = (
-                f"🎯 <b>Найдено новое сообщение!</b>\n\n"
+                f"{title}\n\n"
                 f"📺 <b>Канал:</b> {channel_name}\n"
                 f"� <b>Пользователь:</b> {sender_info}\n"
-                f"�🔑 <b>Ключевые слова:</b> <i>{keywords}</i>\n"
+                f"�🔑 <b>Ключевые слова:</b> <i>{keywords or '—'}</i>\n"
+                f"{fuzzy_line}"
                 f"📅 <b>Время:</b> {moscow_time_str}\n\n"
                 f"💬 <b>Текст сообщения:</b>\n{message_text}"
             )
             
             # Отправляем уведомление всем админам
-            admin_list = get_admin_list()
-            for admin_id in admin_list:
-                try:
-                    await self.bot.send_message(
-                        chat_id=admin_id,
-                        text=notification_text,
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    logger.warning(f"Не удалось отправить уведомление админу {admin_id}: {e}")
+            sent_count = await self._send_to_admins(notification_text)
             
-            logger.info(f"Уведомления отправлены {len(admin_list)} админам о новом сообщении из {channel_name}")
+            logger.info(f"Уведомления отправлены {sent_count} админам о новом сообщении из {channel_name}")
             
         except Exception as e:
             logger.error(f"Ошибка при отправке уведомления: {e}")
@@ -107,13 +136,7 @@ class ControlBot:
     async def send_notification(self, text: str, chat_id: int = None):
         """Отправка уведомления"""
         if chat_id is None:
-            from config import get_admin_list
-            admin_list = get_admin_list()
-            for admin_id in admin_list:
-                try:
-                    await self.bot.send_message(chat_id=admin_id, text=text, parse_mode="HTML")
-                except Exception as e:
-                    logger.warning(f"Не удалось отправить уведомление админу {admin_id}: {e}")
+            await self._send_to_admins(text)
         else:
             try:
                 await self.bot.send_message(chat_id=chat_id, text=text, parse_mode="HTML")
@@ -133,19 +156,9 @@ class ControlBot:
             notification_text = f"{title}\n\n{content}"
             
             # Отправляем уведомление всем админам
-            from config import get_admin_list
-            admin_list = get_admin_list()
-            for admin_id in admin_list:
-                try:
-                    await self.bot.send_message(
-                        chat_id=admin_id,
-                        text=notification_text,
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    logger.warning(f"Не удалось отправить уведомление админу {admin_id}: {e}")
+            sent_count = await self._send_to_admins(notification_text)
             
-            logger.info(f"Уведомления отправлены {len(admin_list)} админам: {title}")
+            logger.info(f"Уведомления отправлены {sent_count} админам: {title}")
             
         except Exception as e:
             logger.error(f"Ошибка при отправке уведомления с данными: {e}")
@@ -1,6 +1,7 @@
 """
 Обработчики команд для управляющего бота - ОЧИЩЕННАЯ ВЕРСИЯ БЕЗ GMAIL
 """
+import asyncio
 import logging
 import inspect
 import os
@@ -14,15 +15,23 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.exceptions import TelegramBadRequest
 
-from config import get_admin_list, is_admin, is_super_admin, SUPER_ADMIN_ID, get_monitored_channels
-from database import JsonDatabase
+from config import (
+    get_admin_list, is_admin, is_super_admin, SUPER_ADMIN_ID, MOSCOW_TZ, get_monitored_channels,
+    CHANNEL_IMPORT_MAX_ENTRIES, CHANNEL_IMPORT_MAX_FILE_SIZE,
+    HISTORY_SEARCH_DEFAULT_DAYS, HISTORY_SEARCH_MAX_DAYS, REGEX_SLOW_PATTERN_US,
+    RAW_ARCHIVE_MAX_MESSAGES, DUPLICATE_WINDOW_SECONDS
+)
+from database import JsonDatabase, FoundMessage
+from utils import parse_channel_references
 from .globals import get_monitor_instance
+from .view_cache import get_view_cache
 
 logger = logging.getLogger(__name__)
 router = Router()
 
-# Получаем актуальный список каналов для отображения
-MONITORED_CHANNELS = get_monitored_channels()
+# Размер страницы и окно последних сообщений для раздела "📨 Найденные сообщения"
+MESSAGES_PER_PAGE = 5
+RECENT_MESSAGES_LIMIT = 50
 
 class AdminStates(StatesGroup):
     waiting_for_keywords = State()
@@ -70,8 +79,8 @@ def format_moscow_time(time_data):
     if not time_data:
         return "Неизвестно"
     
-    if isinstance(time_data, dict):
-        moscow_time_str = time_data.get('moscow_time')
+    if isinstance(time_data, FoundMessage):
+        moscow_time_str = time_data.moscow_time
         if moscow_time_str:
             try:
                 moscow_dt = datetime.fromisoformat(moscow_time_str)
@@ -79,11 +88,11 @@ def format_moscow_time(time_data):
             except:
                 pass
         
-        timestamp = time_data.get('timestamp')
+        timestamp = time_data.timestamp
         if timestamp:
             try:
                 dt = datetime.fromisoformat(timestamp)
-                moscow_dt = dt.replace(tzinfo=None) + timedelta(hours=2)
+                moscow_dt = dt.astimezone(MOSCOW_TZ)
                 return moscow_dt.strftime("%d.%m.%Y %H:%M:%S MSK")
             except:
                 pass
@@ -91,17 +100,17 @@ def format_moscow_time(time_data):
     if isinstance(time_data, str):
         try:
             dt = datetime.fromisoformat(time_data)
-            moscow_dt = dt.replace(tzinfo=None) + timedelta(hours=2)
+            moscow_dt = dt.astimezone(MOSCOW_TZ)
             return moscow_dt.strftime("%d.%m.%Y %H:%M:%S MSK")
         except:
             return time_data
     
     return "Неизвестно"
 
-def format_sender_info(msg_data):
+def format_sender_info(msg: FoundMessage):
     """Форматирует информацию об отправителе"""
-    sender_full_name = msg_data.get('sender_full_name', 'Неизвестный')
-    sender_username = msg_data.get('sender_username', '')
+    sender_full_name = msg.sender_full_name or 'Неизвестный'
+    sender_username = msg.sender_username or ''
     
     if sender_username and sender_username != sender_full_name:
         return f"{sender_full_name} ({sender_username})"
@@ -227,15 +236,26 @@ async def safe_callback_answer(callback: CallbackQuery, text: str = "OK"):
 
 async def safe_edit_message(callback: CallbackQuery, text: str, reply_markup=None, parse_mode="HTML"):
     """Безопасное редактирование сообщения с обработкой старых queries"""
+    view_cache = get_view_cache()
+    chat_id = callback.message.chat.id
+    message_id = callback.message.message_id
+    
+    # Содержимое не изменилось - не вызываем edit_text вообще
+    if view_cache.is_displayed(chat_id, message_id, text, reply_markup):
+        await safe_callback_answer(callback, "✅ Данные актуальны!")
+        return
+    
     try:
         if reply_markup is not None:
             await callback.message.edit_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
         else:
             await callback.message.edit_text(text, parse_mode=parse_mode)
+        view_cache.remember_displayed(chat_id, message_id, text, reply_markup)
         await safe_callback_answer(callback)
     except TelegramBadRequest as e:
         error_message = str(e).lower()
         if "message is not modified" in error_message:
+            view_cache.remember_displayed(chat_id, message_id, text, reply_markup)
             await safe_callback_answer(callback, "✅ Данные актуальны!")
         elif "query is too old" in error_message or "query id is invalid" in error_message:
             # Пытаемся отправить новое сообщение вместо редактирования
@@ -250,6 +270,23 @@ async def safe_edit_message(callback: CallbackQuery, text: str, reply_markup=Non
         logger.error(f"Неожиданная ошибка при редактировании сообщения: {e}")
         await safe_callback_answer(callback, "❌ Произошла ошибка")
 
+async def send_view(message: Message, text: str, reply_markup=None, parse_mode="HTML"):
+    """Отправляет экран и запоминает его содержимое для последующих обновлений"""
+    sent = await message.answer(text, parse_mode=parse_mode, reply_markup=reply_markup)
+    if sent is not None:
+        get_view_cache().remember_displayed(sent.chat.id, sent.message_id, text, reply_markup)
+    return sent
+
+def view_key(view: str, user_id: int, page: int = 1):
+    """Ключ кэша экрана: (экран, страница, уровень доступа)"""
+    return (view, page, is_super_admin(user_id))
+
+def get_refresh_keyboard(callback_data: str):
+    """Создает inline клавиатуру с кнопкой обновления"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🔄 Обновить", callback_data=callback_data)]
+    ])
+
 def get_monitor_from_context():
     """Получает монитор из глобального контекста"""
     return get_monitor_instance()
@@ -387,7 +424,7 @@ async def menu_keywords_button(message: Message, state: FSMContext):
         f"<b>Текущие ключевые слова:</b>\n"
         f"{'• ' + chr(10).join(current_keywords) if current_keywords else 'Нет ключевых слов'}\n\n"
         f"📈 Всего: <b>{len(current_keywords)}</b> слов(а)\n\n"
-        f"💡 <i>Поиск ведется без учета регистра</i>\n\n"
+        f"💡 <i>Поиск ведется без учета регистра, фразы из нескольких слов ищутся целиком</i>\n\n"
     )
     
     # Создаем inline клавиатуру для управления ключевыми словами
@@ -404,7 +441,7 @@ async def menu_keywords_button(message: Message, state: FSMContext):
 @admin_only
 async def menu_found_messages_button(message: Message):
     """Обработчик кнопки Найденные сообщения"""
-    await show_recent_messages(message, 50, 1)
+    await show_recent_messages(message, RECENT_MESSAGES_LIMIT, 1)
 
 @router.message(F.text == "📈 Статистика каналов")
 @admin_only
@@ -426,9 +463,8 @@ async def menu_admin_management_button(message: Message):
 
 # ============ ФУНКЦИИ ПРОСМОТРА ДАННЫХ ============
 
-async def show_channels_status(message: Message):
-    """Показать статус каналов"""
-    monitor = get_monitor_from_context()
+def render_channels_status():
+    """Формирует экран статуса каналов"""
     db = JsonDatabase()
     settings = db.load_settings()
     channels = db.get_channels()
@@ -436,7 +472,7 @@ async def show_channels_status(message: Message):
     monitoring_status = "🟢 Активен" if settings.get("monitoring_enabled", False) else "🔴 Неактивен"
     channels_count = len(channels)
     keywords_count = len(settings.get("keywords", []))
-    total_messages = len(db.load_found_messages())
+    total_messages = db.count_found_messages()
     
     text = (
         f"📊 <b>Статус каналов</b>\n"
@@ -451,57 +487,59 @@ async def show_channels_status(message: Message):
         text += "📺 <b>Отслеживаемые каналы:</b>\n\n"
         for str_channel_id, channel_name in channels.items():
             channel_id = int(str_channel_id)
-            messages_from_channel = len(db.get_messages_by_channel(channel_id))
+            messages_from_channel = db.count_messages_by_channel(channel_id)
             text += f"📌 <b>{channel_name}</b> — {messages_from_channel} сообщений\n"
     else:
         text += "❌ <i>Каналы не настроены</i>\n"
     
     text += f"\n{'═' * 30}"
     
-    await message.answer(text, parse_mode="HTML", reply_markup=get_back_menu())
+    return text, get_refresh_keyboard("status_refresh")
 
-async def show_recent_messages(message: Message, limit: int = 50, page: int = 1):
-    """Показать последние сообщения с пагинацией"""
-    db = JsonDatabase()
-    recent_messages = db.get_recent_messages(limit)
-    
-    if not recent_messages:
-        text = f"📭 <b>Нет найденных сообщений</b>\n\nСообщения появятся здесь после срабатывания по ключевым словам."
-        await message.answer(text, parse_mode="HTML", reply_markup=get_back_menu())
-        return
-    
-    # Настройки пагинации
-    messages_per_page = 5
-    total_messages = len(recent_messages)
-    total_pages = math.ceil(total_messages / messages_per_page)
-    
-    # Проверяем корректность страницы
-    if page < 1:
-        page = 1
-    elif page > total_pages:
-        page = total_pages
-    
-    # Вычисляем индексы для текущей страницы
-    start_idx = (page - 1) * messages_per_page
-    end_idx = min(start_idx + messages_per_page, total_messages)
-    page_messages = recent_messages[start_idx:end_idx]
-    
-    # Формируем текст сообщения
-    text = f"📨 <b>Найденные сообщения</b>\n"
+async def show_channels_status(message: Message):
+    """Показать статус каналов"""
+    text, keyboard = get_view_cache().get_or_render(view_key("status", message.from_user.id), render_channels_status)
+    await send_view(message, text, keyboard)
+
+def get_period_buttons():
+    """Кнопки выбора периода для просмотра найденных сообщений"""
+    return [
+        InlineKeyboardButton(text="📅 Сегодня", callback_data="recent_today"),
+        InlineKeyboardButton(text="📅 Вчера", callback_data="recent_yesterday"),
+        InlineKeyboardButton(text="🕐 24 часа", callback_data="recent_hours_24")
+    ]
+
+def format_messages_page(title: str, page_messages, start_idx: int, page: int, total_pages: int,
+                         total_messages: int, page_callback_prefix: str, refresh_callback: str):
+    """Формирует текст и клавиатуру одной страницы сообщений"""
+    text = f"{title}\n"
     text += f"📄 Страница {page} из {total_pages} (всего: {total_messages})\n\n"
     
     for i, msg in enumerate(page_messages, start_idx + 1):
-        channel_name = msg.get('channel_name', 'Неизвестный канал')
-        keywords = ', '.join(msg.get('found_keywords', []))
-        message_text = msg.get('text', '')[:150] + '...' if len(msg.get('text', '')) > 150 else msg.get('text', '')
+        channel_name = msg.channel_name or 'Неизвестный канал'
+        keywords = ', '.join(msg.found_keywords)
+        if msg.fuzzy_keywords:
+            keywords = ', '.join(filter(None, [keywords, ', '.join(f"≈{kw}" for kw in msg.fuzzy_keywords)]))
+        keywords = escape_html(keywords)
+        message_text = msg.text[:150] + '...' if len(msg.text) > 150 else msg.text
         
         moscow_time = format_moscow_time(msg)
         sender_info = format_sender_info(msg)
         
+        # Одно объявление в нескольких чатах: первое сообщение перечисляет повторы
+        extra = msg.extra or {}
+        duplicate_line = ""
+        if extra.get('duplicates'):
+            copies = ', '.join(copy.get('channel_name') or str(copy.get('channel_id')) for copy in extra['duplicates'])
+            duplicate_line = f"🔁 Также в: {escape_html(copies)}\n"
+        elif extra.get('duplicate_of'):
+            duplicate_line = "🔁 Повтор найденного ранее сообщения\n"
+        
         text += (
             f"<b>{i}. {channel_name}</b>\n"
             f"👤 {sender_info}\n"
             f"🔑 <i>{keywords}</i>\n"
+            f"{duplicate_line}"
             f"📅 {moscow_time}\n"
             f"💬 {message_text}\n"
             f"{'─' * 25}\n\n"
@@ -517,7 +555,7 @@ async def show_recent_messages(message: Message, limit: int = 50, page: int = 1)
         if page > 1:
             nav_buttons.append(InlineKeyboardButton(
                 text="⬅️ Назад", 
-                callback_data=f"messages_page_{page-1}"
+                callback_data=f"{page_callback_prefix}{page-1}"
             ))
         
         # Кнопка с номером страницы
@@ -530,43 +568,149 @@ async def show_recent_messages(message: Message, limit: int = 50, page: int = 1)
         if page < total_pages:
             nav_buttons.append(InlineKeyboardButton(
                 text="Вперед ➡️", 
-                callback_data=f"messages_page_{page+1}"
+                callback_data=f"{page_callback_prefix}{page+1}"
             ))
         
         keyboard_buttons.append(nav_buttons)
     
+    keyboard_buttons.append(get_period_buttons())
+    
     # Кнопка обновления
     keyboard_buttons.append([
-        InlineKeyboardButton(text="🔄 Обновить", callback_data="messages_refresh")
+        InlineKeyboardButton(text="🔄 Обновить", callback_data=refresh_callback)
     ])
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
+    return text, keyboard
+
+def clamp_page(page: int, total_pages: int) -> int:
+    """Приводит номер страницы к допустимому диапазону"""
+    return max(1, min(page, total_pages))
+
+def render_recent_messages(limit: int = RECENT_MESSAGES_LIMIT, page: int = 1):
+    """Формирует страницу последних сообщений: (текст, клавиатура) или (текст, None) если сообщений нет
     
-    await message.answer(text, parse_mode="HTML", reply_markup=keyboard)
+    Из хранилища читаются только сообщения запрошенной страницы.
+    """
+    db = JsonDatabase()
+    stored_messages = db.count_found_messages()
+    total_messages = min(limit, stored_messages)
+    
+    if not total_messages:
+        text = f"📭 <b>Нет найденных сообщений</b>\n\nСообщения появятся здесь после срабатывания по ключевым словам."
+        return text, None
+    
+    # Настройки пагинации
+    total_pages = math.ceil(total_messages / MESSAGES_PER_PAGE)
+    page = clamp_page(page, total_pages)
+    
+    # Вычисляем индексы для текущей страницы (внутри окна последних limit сообщений)
+    start_idx = (page - 1) * MESSAGES_PER_PAGE
+    end_idx = min(start_idx + MESSAGES_PER_PAGE, total_messages)
+    window_offset = stored_messages - total_messages
+    page_messages = db.get_messages_page(window_offset + start_idx, end_idx - start_idx)
+    
+    return format_messages_page(
+        "📨 <b>Найденные сообщения</b>", page_messages, start_idx, page, total_pages,
+        total_messages, "messages_page_", "messages_refresh"
+    )
 
-async def show_channels_stats(message: Message):
-    """Показать статистику каналов"""
+def resolve_period(period: str):
+    """Преобразует идентификатор периода в (начало, конец, подпись) по московскому времени
+    
+    Поддерживаются: today, yesterday, hours_N и dYYYYMMDD-YYYYMMDD (даты включительно).
+    Возвращает None для неизвестного периода.
+    """
+    now = datetime.now(MOSCOW_TZ)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    if period == "today":
+        return day_start, day_start + timedelta(days=1), "за сегодня"
+    if period == "yesterday":
+        return day_start - timedelta(days=1), day_start, "за вчера"
+    if period.startswith("hours_"):
+        try:
+            hours = int(period[len("hours_"):])
+        except ValueError:
+            return None
+        if hours <= 0:
+            return None
+        return now - timedelta(hours=hours), now + timedelta(seconds=1), f"за {hours} ч."
+    if period.startswith("d") and "-" in period:
+        try:
+            first, last = period[1:].split("-", 1)
+            start = datetime.strptime(first, "%Y%m%d").replace(tzinfo=MOSCOW_TZ)
+            end = datetime.strptime(last, "%Y%m%d").replace(tzinfo=MOSCOW_TZ) + timedelta(days=1)
+        except ValueError:
+            return None
+        if end <= start:
+            return None
+        title = f"с {start.strftime('%d.%m.%Y')} по {(end - timedelta(days=1)).strftime('%d.%m.%Y')}"
+        return start, end, title
+    return None
+
+def render_period_messages(period: str, page: int = 1):
+    """Формирует страницу сообщений за период (O(log N + k) по индексу времени)"""
+    resolved = resolve_period(period)
+    if resolved is None:
+        return "❌ <b>Неизвестный период</b>", None
+    start, end, period_title = resolved
+    
+    db = JsonDatabase()
+    period_messages = db.get_messages_between(start, end, MOSCOW_TZ)
+    total_messages = len(period_messages)
+    
+    if not total_messages:
+        text = f"📭 <b>Нет найденных сообщений {period_title}</b>"
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[
+            get_period_buttons(),
+            [InlineKeyboardButton(text="🔄 Обновить", callback_data=f"recent_{period}")]
+        ])
+        return text, keyboard
+    
+    total_pages = math.ceil(total_messages / MESSAGES_PER_PAGE)
+    page = clamp_page(page, total_pages)
+    start_idx = (page - 1) * MESSAGES_PER_PAGE
+    page_messages = period_messages[start_idx:start_idx + MESSAGES_PER_PAGE]
+    
+    return format_messages_page(
+        f"📨 <b>Найденные сообщения {period_title}</b>", page_messages, start_idx, page, total_pages,
+        total_messages, f"period_{period}_", f"recent_{period}"
+    )
+
+async def show_recent_messages(message: Message, limit: int = RECENT_MESSAGES_LIMIT, page: int = 1):
+    """Показать последние сообщения с пагинацией"""
+    text, keyboard = get_view_cache().get_or_render(
+        view_key(f"recent_{limit}", message.from_user.id, page),
+        lambda: render_recent_messages(limit, page)
+    )
+    
+    if keyboard is None:
+        await message.answer(text, parse_mode="HTML", reply_markup=get_back_menu())
+        return
+    
+    await send_view(message, text, keyboard)
+
+def render_channels_stats():
+    """Формирует экран статистики каналов"""
     db = JsonDatabase()
     all_messages = db.load_found_messages()
     
     if not all_messages:
-        await message.answer(
+        text = (
             "📭 <b>Нет данных для статистики</b>\n\n"
-            "Статистика появится после нахождения сообщений.",
-            parse_mode="HTML",
-            reply_markup=get_back_menu()
+            "Статистика появится после нахождения сообщений."
         )
-        return
+        return text, get_refresh_keyboard("stats_refresh")
     
     channel_stats = {}
     keyword_stats = {}
     
     for msg in all_messages:
-        channel_name = msg.get('channel_name', 'Неизвестный канал')
+        channel_name = msg.channel_name or 'Неизвестный канал'
         channel_stats[channel_name] = channel_stats.get(channel_name, 0) + 1
         
-        keywords = msg.get('found_keywords', [])
-        for kw in keywords:
+        for kw in msg.found_keywords:
             keyword_stats[kw] = keyword_stats.get(kw, 0) + 1
     
     text = "📈 <b>Статистика каналов</b>\n\n"
@@ -581,12 +725,17 @@ async def show_channels_stats(message: Message):
     
     text += "\n🔑 <b>По ключевым словам:</b>\n"
     for keyword, count in sorted(keyword_stats.items(), key=lambda x: x[1], reverse=True)[:10]:
-        text += f"• <b>{keyword}</b>: {count} упоминаний\n"
+        text += f"• <b>{escape_html(keyword)}</b>: {count} упоминаний\n"
     
-    await message.answer(text, parse_mode="HTML", reply_markup=get_back_menu())
+    return text, get_refresh_keyboard("stats_refresh")
 
-async def show_channels(message: Message):
-    """Показать каналы"""
+async def show_channels_stats(message: Message):
+    """Показать статистику каналов"""
+    text, keyboard = get_view_cache().get_or_render(view_key("stats", message.from_user.id), render_channels_stats)
+    await send_view(message, text, keyboard)
+
+def render_channels():
+    """Формирует экран управления каналами"""
     db = JsonDatabase()
     channels = db.get_channels()
     
@@ -596,7 +745,7 @@ async def show_channels(message: Message):
         text += "📋 <b>Отслеживаемые каналы:</b>\n\n"
         for str_channel_id, channel_name in channels.items():
             channel_id = int(str_channel_id)
-            messages_count = len(db.get_messages_by_channel(channel_id))
+            messages_count = db.count_messages_by_channel(channel_id)
             text += f"🔸 <b>{channel_name}</b>\n"
             text += f"   ID: <code>{channel_id}</code>\n"
             text += f"   Найдено: {messages_count} сообщений\n\n"
@@ -606,7 +755,12 @@ async def show_channels(message: Message):
         text += "📭 <b>Нет отслеживаемых каналов</b>\n\n"
         text += "Добавьте каналы для начала мониторинга."
     
-    await message.answer(text, parse_mode="HTML", reply_markup=get_back_menu())
+    return text, get_refresh_keyboard("channels_refresh")
+
+async def show_channels(message: Message):
+    """Показать каналы"""
+    text, keyboard = get_view_cache().get_or_render(view_key("channels", message.from_user.id), render_channels)
+    await send_view(message, text, keyboard)
 
 async def show_help(message: Message):
     """Показать справку"""
@@ -620,7 +774,8 @@ async def show_help(message: Message):
         "📺 <b>Раздел каналов:</b>\n"
         "• Добавление/удаление каналов\n"
         "• Просмотр найденных сообщений\n"
-        "• Статистика по каналам\n\n"
+        "• Статистика по каналам\n"
+        "• Поиск по истории каналов: /history\n\n"
         "⚙️ <b>Настройки:</b>\n"
         "• Управление ключевыми словами\n"
         "• Очистка базы данных\n"
@@ -630,6 +785,791 @@ async def show_help(message: Message):
     
     await message.answer(text, parse_mode="HTML", reply_markup=get_back_menu())
 
+# ============ ПАГИНАЦИЯ НАЙДЕННЫХ СООБЩЕНИЙ ============
+
+@router.callback_query(F.data == "messages_page_current")
+async def callback_messages_page_current(callback: CallbackQuery):
+    """Нажатие на индикатор текущей страницы"""
+    await safe_callback_answer(callback, "📄 Текущая страница")
+
+@router.callback_query(F.data.startswith("messages_page_"))
+@admin_only
+async def callback_messages_page(callback: CallbackQuery):
+    """Переход на страницу найденных сообщений"""
+    try:
+        page = int(callback.data.rsplit("_", 1)[1])
+    except ValueError:
+        await safe_callback_answer(callback, "❌ Неверная страница")
+        return
+    
+    text, keyboard = get_view_cache().get_or_render(
+        view_key(f"recent_{RECENT_MESSAGES_LIMIT}", callback.from_user.id, page),
+        lambda: render_recent_messages(RECENT_MESSAGES_LIMIT, page)
+    )
+    await safe_edit_message(callback, text, reply_markup=keyboard)
+
+@router.callback_query(F.data == "messages_refresh")
+@admin_only
+async def callback_messages_refresh(callback: CallbackQuery):
+    """Обновление списка найденных сообщений"""
+    text, keyboard = get_view_cache().get_or_render(
+        view_key(f"recent_{RECENT_MESSAGES_LIMIT}", callback.from_user.id, 1),
+        lambda: render_recent_messages(RECENT_MESSAGES_LIMIT, 1)
+    )
+    await safe_edit_message(callback, text, reply_markup=keyboard)
+
+# ============ СООБЩЕНИЯ ЗА ПЕРИОД ============
+
+async def show_period_messages(callback: CallbackQuery, period: str, page: int = 1):
+    """Показывает сообщения за период в текущем сообщении"""
+    # Границы "сегодня"/"24 часа" зависят от текущего времени, поэтому в ключ кэша входит час/минута
+    time_bucket = datetime.now(MOSCOW_TZ).strftime("%Y%m%d%H%M")
+    text, keyboard = get_view_cache().get_or_render(
+        view_key(f"period_{period}_{time_bucket}", callback.from_user.id, page),
+        lambda: render_period_messages(period, page)
+    )
+    await safe_edit_message(callback, text, reply_markup=keyboard)
+
+@router.callback_query(F.data.startswith("recent_"))
+@admin_only
+async def callback_show_recent(callback: CallbackQuery):
+    """Показ сообщений за период: сегодня, вчера, последние N часов или диапазон дат"""
+    period = callback.data[len("recent_"):]
+    await show_period_messages(callback, period)
+
+@router.callback_query(F.data.startswith("period_"))
+@admin_only
+async def callback_period_page(callback: CallbackQuery):
+    """Переход на страницу сообщений за период"""
+    period, _, page = callback.data[len("period_"):].rpartition("_")
+    try:
+        page = int(page)
+    except ValueError:
+        await safe_callback_answer(callback, "❌ Неверная страница")
+        return
+    await show_period_messages(callback, period, page)
+
+@router.message(Command("range"))
+@admin_only
+async def cmd_range(message: Message):
+    """Команда /range ДД.ММ.ГГГГ [ДД.ММ.ГГГГ] - сообщения за диапазон дат (MSK)"""
+    args = message.text.split()[1:]
+    try:
+        dates = [datetime.strptime(arg, "%d.%m.%Y") for arg in args[:2]]
+    except ValueError:
+        dates = []
+    
+    if not dates:
+        await message.answer(
+            "📅 <b>Сообщения за период</b>\n\n"
+            "Использование: <code>/range 01.10.2026 05.10.2026</code>\n"
+            "или <code>/range 01.10.2026</code> для одного дня",
+            parse_mode="HTML"
+        )
+        return
+    
+    first, last = dates[0], dates[-1]
+    period = f"d{first.strftime('%Y%m%d')}-{last.strftime('%Y%m%d')}"
+    text, keyboard = render_period_messages(period, 1)
+    await send_view(message, text, keyboard)
+
+# ============ ПОИСК ПО ИСТОРИИ КАНАЛОВ ============
+
+def format_history_search_progress(stats) -> str:
+    """Формирует текст прогресса/итогов поиска по истории"""
+    if stats['cancelled']:
+        title = "⏹ <b>Поиск по истории отменен</b>"
+    elif stats['finished']:
+        title = "✅ <b>Поиск по истории завершен</b>"
+    else:
+        title = "⏳ <b>Поиск по истории...</b>"
+    
+    mode = "поиск Telegram" if stats['mode'] == 'server' else "просмотр истории"
+    text = (
+        f"{title}\n\n"
+        f"🔑 Слова: {escape_html(', '.join(stats['keywords']))}\n"
+        f"📅 Период: {stats['days']} дн. ({mode})\n"
+        f"📺 Каналов: {stats['done']}/{stats['channels']}\n"
+        f"📄 Просмотрено: {stats['scanned']}\n"
+        f"🎯 Найдено новых: <b>{stats['found']}</b>\n"
+        f"📡 Запросов: {stats['requests']}/{stats['budget']}\n"
+        f"⏱ {stats['elapsed']:.0f} с"
+    )
+    if stats['budget_exhausted']:
+        text += "\n\n⚠️ Бюджет запросов исчерпан, поиск неполный"
+    if stats['errors']:
+        text += f"\n⚠️ Ошибок: {stats['errors']}"
+    if stats['finished'] and stats['found']:
+        text += "\n\nНайденное сохранено в 📨 Найденные сообщения"
+    return text
+
+def get_history_search_keyboard():
+    """Клавиатура с кнопкой отмены поиска по истории"""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⏹ Отменить поиск", callback_data="history_cancel")]
+    ])
+
+@router.message(Command("history"))
+@admin_only
+async def cmd_history(message: Message):
+    """Команда /history [дней] [слова через запятую] - поиск по истории отслеживаемых каналов"""
+    monitor = get_monitor_from_context()
+    if not monitor:
+        await message.answer("❌ Монитор каналов недоступен, попробуйте позже")
+        return
+    
+    args = message.text.split(maxsplit=2)[1:]
+    days = HISTORY_SEARCH_DEFAULT_DAYS
+    if args and args[0].isdigit():
+        days = int(args.pop(0))
+    else:
+        # Первый аргумент - не число дней, значит это начало списка слов
+        args = [" ".join(args)] if args else []
+    if not 1 <= days <= HISTORY_SEARCH_MAX_DAYS:
+        await message.answer(f"❌ Период должен быть от 1 до {HISTORY_SEARCH_MAX_DAYS} дней")
+        return
+    
+    keywords = [kw.strip() for kw in args[0].split(",") if kw.strip()] if args else list(monitor.keywords)
+    if not keywords:
+        await message.answer(
+            "🔎 <b>Поиск по истории</b>\n\n"
+            "Использование: <code>/history 30 ищу, wordpress</code>\n"
+            "Без слов используются текущие ключевые слова",
+            parse_mode="HTML"
+        )
+        return
+    
+    progress = await message.answer("⏳ Запускаю поиск по истории...")
+    
+    async def report(stats):
+        keyboard = None if stats['finished'] else get_history_search_keyboard()
+        try:
+            await progress.edit_text(format_history_search_progress(stats), parse_mode="HTML", reply_markup=keyboard)
+        except TelegramBadRequest:
+            pass
+    
+    job = monitor.start_history_search(keywords, days, progress_callback=report)
+    if job is None:
+        await progress.edit_text("⚠️ Поиск по истории уже выполняется, дождитесь завершения или отмените его")
+
+@router.callback_query(F.data == "history_cancel")
+@admin_only
+async def callback_history_cancel(callback: CallbackQuery):
+    """Отмена поиска по истории"""
+    monitor = get_monitor_from_context()
+    if not monitor or not monitor.history_search or not monitor.history_search.running:
+        await safe_callback_answer(callback, "Поиск не выполняется")
+        return
+    monitor.history_search.cancel()
+    await safe_callback_answer(callback, "⏹ Поиск отменяется")
+
+# ============ ЛИМИТЫ ЗАПРОСОВ TELEGRAM ============
+
+# Названия подсистем планировщика запросов
+RPC_SUBSYSTEM_NAMES = {
+    'live': "Новые сообщения",
+    'verify': "Проверка каналов",
+    'import': "Импорт каналов",
+    'backfill': "Догрузка",
+    'history': "Поиск по истории",
+    'other': "Прочее",
+}
+
+@router.message(Command("rpc"))
+@admin_only
+async def cmd_rpc_stats(message: Message):
+    """Команда /rpc - расход лимитов запросов Telegram по подсистемам"""
+    monitor = get_monitor_from_context()
+    if not monitor:
+        await message.answer("❌ Монитор каналов недоступен, попробуйте позже")
+        return
+    
+    stats = monitor.rpc.get_stats()
+    text = "📡 <b>Запросы к Telegram</b>\n\n"
+    if not stats['subsystems']:
+        text += "<i>Запросов еще не было</i>\n"
+    for name, subsystem in sorted(stats['subsystems'].items(), key=lambda item: -item[1]['calls']):
+        text += (
+            f"🔸 <b>{RPC_SUBSYSTEM_NAMES.get(name, name)}:</b> {subsystem['calls']} запросов, "
+            f"ожидание {subsystem['wait_time']:.1f} с"
+        )
+        if subsystem['flood_waits']:
+            text += f", FloodWait {subsystem['flood_waits']} раз ({subsystem['flood_seconds']} с)"
+        text += "\n"
+    
+    for session_name, remaining in stats['paused_sessions'].items():
+        text += f"\n⏸ Сессия <code>{escape_html(session_name)}</code> на паузе еще {remaining:.0f} с"
+    
+    await message.answer(text, parse_mode="HTML")
+
+@router.message(Command("matcher"))
+@admin_only
+async def cmd_matcher_stats(message: Message):
+    """Команда /matcher - версия, время сборки и размер скомпилированных ключевых слов"""
+    monitor = get_monitor_from_context()
+    if not monitor:
+        await message.answer("❌ Монитор каналов недоступен, попробуйте позже")
+        return
+    
+    stats = monitor.matchers.get_stats()
+    built_at = datetime.fromtimestamp(stats['built_at'], MOSCOW_TZ).strftime("%d.%m.%Y %H:%M:%S")
+    text = (
+        "🧠 <b>Скомпилированные ключевые слова</b>\n\n"
+        f"🔸 <b>Версия:</b> {stats['version']} (собрана {built_at}"
+        f"{', в пуле потоков' if stats['built_in_executor'] else ''})\n"
+        f"🔸 <b>Время сборки:</b> {stats['compile_seconds'] * 1000:.1f} мс\n"
+        f"🔸 <b>Изменений без пересборки:</b> {stats['incremental_changes']}\n\n"
+        f"🔑 Слов: {stats['keywords']}, правил: {stats['rules']}, шаблонов: {stats['regex']}\n"
+        f"🌳 Термов: {stats['terms']}, узлов дерева: {stats['trie_nodes']}\n"
+        f"🔍 Вариантов в индексе опечаток: {stats['fuzzy_variants']}\n"
+        f"🗂 Каналов со своими наборами: {stats['channels_with_sets']}, "
+        f"различных наборов (с общим): {stats['distinct_matchers']}"
+    )
+    await message.answer(text, parse_mode="HTML")
+
+# ============ ОБНОВЛЕНИЕ ЭКРАНОВ ============
+
+@router.callback_query(F.data.in_({"status_refresh", "menu_status"}))
+@admin_only
+async def callback_status_refresh(callback: CallbackQuery):
+    """Обновление статуса каналов"""
+    text, keyboard = get_view_cache().get_or_render(
+        view_key("status", callback.from_user.id), render_channels_status
+    )
+    await safe_edit_message(callback, text, reply_markup=keyboard)
+
+@router.callback_query(F.data == "stats_refresh")
+@admin_only
+async def callback_stats_refresh(callback: CallbackQuery):
+    """Обновление статистики каналов"""
+    text, keyboard = get_view_cache().get_or_render(
+        view_key("stats", callback.from_user.id), render_channels_stats
+    )
+    await safe_edit_message(callback, text, reply_markup=keyboard)
+
+@router.callback_query(F.data == "channels_refresh")
+@admin_only
+async def callback_channels_refresh(callback: CallbackQuery):
+    """Обновление списка каналов"""
+    text, keyboard = get_view_cache().get_or_render(
+        view_key("channels", callback.from_user.id), render_channels
+    )
+    await safe_edit_message(callback, text, reply_markup=keyboard)
+
+# ============ КЛЮЧЕВЫЕ СЛОВА ============
+
+@router.callback_query(F.data == "keywords_edit")
+@admin_only
+async def callback_keywords_edit(callback: CallbackQuery, state: FSMContext):
+    """Редактирование ключевых слов"""
+    await state.set_state(AdminStates.waiting_for_keywords)
+    await safe_edit_message(
+        callback,
+        "✏️ <b>Введите новые ключевые слова через запятую:</b>\n\n"
+        "Например: <code>ищу, wordpress, нужен сайт, landing page</code>\n\n"
+        "💡 <i>Фраза из нескольких слов находится, только если слова идут подряд</i>\n"
+        "🧪 <i>Проверить слова на сохраненных сообщениях до сохранения: /dryrun ищу, wordpress</i>\n\n"
+        "❌ Для отмены введите /cancel"
+    )
+
+def parse_keywords_input(keywords_input: str):
+    """Разделяет ввод по запятым, нормализует слова так же, как текст сообщений, убирает повторы"""
+    from monitor.normalization import normalize_text
+    
+    keywords = []
+    for raw_keyword in keywords_input.split(','):
+        keyword = ' '.join(normalize_text(raw_keyword).split())
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+# Команды (/dryrun, /cancel) в состоянии ввода обрабатываются своими обработчиками,
+# а не сохраняются как список ключевых слов
+@router.message(StateFilter(AdminStates.waiting_for_keywords), ~F.text.startswith('/'))
+@admin_only
+async def process_keywords_input(message: Message, state: FSMContext):
+    """Обработка ввода ключевых слов и фраз"""
+    new_keywords = parse_keywords_input((message.text or "").strip())
+    
+    if not new_keywords:
+        await message.answer("❌ Не удалось обработать ключевые слова. Попробуйте еще раз:")
+        return
+    
+    db = JsonDatabase()
+    settings = db.load_settings()
+    settings["keywords"] = new_keywords
+    db.save_settings(settings)
+    
+    # Обновляем в мониторе если он доступен
+    monitor = get_monitor_from_context()
+    if monitor:
+        monitor.update_keywords(new_keywords)
+    
+    await state.clear()
+    phrases_count = sum(1 for keyword in new_keywords if ' ' in keyword)
+    await message.answer(
+        f"✅ <b>Ключевые слова обновлены!</b>\n\n"
+        f"🔑 Новые ключевые слова:\n• {(chr(10) + '• ').join(escape_html(kw) for kw in new_keywords)}\n\n"
+        f"📈 Всего: <b>{len(new_keywords)}</b>, из них фраз: <b>{phrases_count}</b>",
+        parse_mode="HTML"
+    )
+
+def format_dry_run_report(report, source: str) -> str:
+    """Отчет пробного прогона ключевых слов"""
+    text = (
+        "🧪 <b>Пробный прогон ключевых слов</b>\n\n"
+        f"📦 <b>Источник:</b> {source}\n"
+        f"📨 Сообщений: <b>{report['messages']}</b> (уникальных текстов: {report['unique_texts']}), "
+        f"за {report['seconds']:.2f} с\n"
+    )
+    if report['skipped']:
+        text += f"⏭ Пропущено {report['skipped']} из каналов со своими наборами слов (/kwsets)\n"
+    text += (
+        "\n"
+        "🔑 <b>Совпадения по словам</b> (всего / новых относительно текущих слов):\n"
+    )
+    keywords = sorted(report['keywords'], key=lambda item: -item['hits'])
+    for item in keywords[:30]:
+        text += f"• <b>{escape_html(item['keyword'])}</b>: {item['hits']} / {item['new_hits']}\n"
+    if len(keywords) > 30:
+        text += f"… и еще {len(keywords) - 30}\n"
+    text += (
+        "\n📊 <b>Сравнение с текущими словами:</b>\n"
+        f"✅ Найдут оба набора: {report['both']}\n"
+        f"🆕 Только новый набор: {report['only_candidate']}\n"
+        f"➖ Только текущий (будут потеряны): {report['only_current']}"
+    )
+    return text
+
+def load_dry_run_messages(db):
+    """Сообщения для пробного прогона: архив сырых сообщений или, если он пуст, найденные сообщения"""
+    raw_messages = db.load_raw_messages()
+    if raw_messages:
+        return [(record.get('channel_id'), record.get('text', '')) for record in raw_messages], \
+            "архив сырых сообщений"
+    return [(found.channel_id, found.text) for found in db.load_found_messages()], \
+        "найденные сообщения (только совпавшие с текущими словами; включите /rawarchive)"
+
+@router.message(Command("dryrun"))
+@admin_only
+async def cmd_dry_run(message: Message, state: FSMContext):
+    """Команда /dryrun слова через запятую - проверить ключевые слова на сохраненных сообщениях
+    
+    Кандидат заменяет только общий список слов: правила и шаблоны остаются прежними,
+    а каналы со своими наборами слов в сравнении не участвуют.
+    """
+    from monitor.keyword_dry_run import dry_run_keywords
+    from monitor.keyword_rules import KeywordRules
+    
+    args = message.text.split(maxsplit=1)[1:]
+    candidates = parse_keywords_input(args[0]) if args else []
+    if not candidates:
+        await message.answer(
+            "🧪 <b>Пробный прогон ключевых слов</b>\n\n"
+            "Показывает, сколько сообщений нашли бы слова, ничего не сохраняя.\n\n"
+            "Использование: <code>/dryrun ищу, wordpress, нужен сайт</code>",
+            parse_mode="HTML"
+        )
+        return
+    
+    monitor = get_monitor_from_context()
+    if monitor:
+        monitor.flush_raw_archive()
+        # Версия ключевых слов после сборки не меняется, ее можно читать из пула потоков
+        matchers = monitor.matchers
+        current = matchers.default
+        candidate = monitor.build_matcher(candidates, monitor.keyword_rules, monitor.regex_keywords)
+        skip_channels = set(matchers.by_channel)
+    else:
+        settings = JsonDatabase().load_settings()
+        rules = settings.get("keyword_rules", [])
+        patterns = [entry["pattern"] for entry in settings.get("regex_keywords", [])]
+        current = KeywordRules(settings.get("keywords", []), rules, regex_patterns=patterns)
+        candidate = KeywordRules(candidates, rules, regex_patterns=patterns)
+        skip_channels = {
+            int(channel_id) for keyword_set in settings.get("keyword_sets", [])
+            for channel_id in keyword_set.get("channels", [])
+        }
+    
+    await message.answer("⏳ Прогон ключевых слов по сохраненным сообщениям...")
+    
+    def run():
+        messages, source = load_dry_run_messages(JsonDatabase())
+        return dry_run_keywords(candidate, current, messages, skip_channels), source
+    
+    # Чтение архива и прогон - в пуле потоков, бот продолжает отвечать
+    report, source = await asyncio.get_running_loop().run_in_executor(None, run)
+    text = format_dry_run_report(report, source)
+    if await state.get_state() == AdminStates.waiting_for_keywords.state:
+        text += "\n\n✏️ <i>Отправьте слова через запятую, чтобы сохранить их, или /cancel</i>"
+    await message.answer(text, parse_mode="HTML")
+
+@router.message(Command("rawarchive"))
+@admin_only
+async def cmd_raw_archive(message: Message):
+    """Команда /rawarchive [on|off] - архив всех сообщений каналов для /dryrun"""
+    args = message.text.split()[1:]
+    db = JsonDatabase()
+    settings = db.load_settings()
+    if args and args[0].lower() in ("on", "off"):
+        settings["raw_archive_enabled"] = args[0].lower() == "on"
+        db.save_settings(settings)
+    
+    enabled = settings.get("raw_archive_enabled", False)
+    text = (
+        "🗄 <b>Архив сырых сообщений</b>\n\n"
+        f"🔸 <b>Статус:</b> {'🟢 Включен' if enabled else '🔴 Выключен'}\n"
+        f"🔸 <b>Сообщений в архиве:</b> {db.count_raw_messages()} (хранится до {RAW_ARCHIVE_MAX_MESSAGES})\n\n"
+        "💡 Архив хранит все сообщения каналов, а не только найденные, - на нем /dryrun "
+        "показывает, что найдут новые ключевые слова\n\n"
+        "Использование: <code>/rawarchive on</code> или <code>/rawarchive off</code>"
+    )
+    await message.answer(text, parse_mode="HTML")
+
+@router.message(Command("duplicates"))
+@admin_only
+async def cmd_duplicates(message: Message):
+    """Команда /duplicates [on|off] - повторы одного объявления в разных каналах"""
+    args = message.text.split()[1:]
+    db = JsonDatabase()
+    settings = db.load_settings()
+    if args and args[0].lower() in ("on", "off"):
+        settings["duplicate_suppression_enabled"] = args[0].lower() == "on"
+        db.save_settings(settings)
+    
+    enabled = settings.get("duplicate_suppression_enabled", True)
+    monitor = get_monitor_from_context()
+    stats_line = ""
+    if monitor:
+        stats_line = (
+            f"🔸 <b>Сообщений в окне:</b> {len(monitor.duplicates)}\n"
+            f"🔸 <b>Повторов без уведомления:</b> {monitor.duplicates_suppressed}\n"
+        )
+    text = (
+        "🔁 <b>Повторы объявлений</b>\n\n"
+        f"🔸 <b>Статус:</b> {'🟢 Включено' if enabled else '🔴 Выключено'}\n"
+        f"{stats_line}\n"
+        f"💡 Почти одинаковый текст, найденный в течение {DUPLICATE_WINDOW_SECONDS // 60} мин. "
+        "в другом чате, сохраняется как повтор первого сообщения без уведомления; "
+        "в списках найденных у первого сообщения видно, где еще оно опубликовано\n\n"
+        "Использование: <code>/duplicates on</code> или <code>/duplicates off</code>"
+    )
+    await message.answer(text, parse_mode="HTML")
+
+@router.message(Command("fuzzy"))
+@admin_only
+async def cmd_fuzzy(message: Message):
+    """Команда /fuzzy [on|off] - поиск ключевых слов с опечатками"""
+    args = message.text.split()[1:]
+    db = JsonDatabase()
+    settings = db.load_settings()
+    
+    if args and args[0].lower() in ("on", "off"):
+        settings["fuzzy_enabled"] = args[0].lower() == "on"
+        db.save_settings(settings)
+        monitor = get_monitor_from_context()
+        if monitor:
+            monitor.rebuild_matchers()
+    
+    enabled = settings.get("fuzzy_enabled", False)
+    await message.answer(
+        "🔍 <b>Поиск с опечатками</b>\n\n"
+        f"🔸 <b>Статус:</b> {'🟢 Включен' if enabled else '🔴 Выключен'}\n\n"
+        "💡 «wordpres», «вордпресс» и «ворд пресс» находят «wordpress». "
+        "Слова короче 5 букв ищутся только точно. Совпадения с опечатками "
+        "помечаются в уведомлениях отдельно (≈)\n\n"
+        "Использование: <code>/fuzzy on</code> или <code>/fuzzy off</code>",
+        parse_mode="HTML"
+    )
+
+@router.message(Command("morphology"))
+@admin_only
+async def cmd_morphology(message: Message):
+    """Команда /morphology [on|off] - сопоставление ключевых слов по леммам"""
+    from monitor.morphology import get_lemmatizer
+    
+    args = message.text.split()[1:]
+    db = JsonDatabase()
+    settings = db.load_settings()
+    
+    if args and args[0].lower() in ("on", "off"):
+        settings["morphology_enabled"] = args[0].lower() == "on"
+        db.save_settings(settings)
+        monitor = get_monitor_from_context()
+        if monitor:
+            # Перекомпилируем ключевые слова с новой нормализацией
+            monitor.rebuild_matchers()
+    
+    enabled = settings.get("morphology_enabled", False)
+    lemmatizer = get_lemmatizer()
+    text = (
+        "🔤 <b>Морфология</b>\n\n"
+        f"🔸 <b>Статус:</b> {'🟢 Включена' if enabled else '🔴 Выключена'}\n"
+        f"🔸 <b>Таблица лемм:</b> "
+        f"{f'{lemmatizer.table.count} словоформ' if lemmatizer else 'не собрана'}\n\n"
+        "💡 При включенной морфологии «ищу» находит «ищем», «ищет» и другие формы слова\n\n"
+        "Использование: <code>/morphology on</code> или <code>/morphology off</code>"
+    )
+    await message.answer(text, parse_mode="HTML")
+
+# ============ ПРАВИЛА ============
+
+def format_rules(rules) -> str:
+    """Список логических правил"""
+    text = (
+        "🧩 <b>Правила</b>\n\n"
+        "Пример: <code>/rule_add (ищу OR нужен) AND wordpress AND NOT вакансия</code>\n"
+        "Только для каналов: <code>/rule_add 1234567890,987654321 нужен \"landing page\"</code>\n"
+        "Удаление: <code>/rule_del 1</code>\n\n"
+    )
+    if not rules:
+        return text + "<i>Правил нет</i>"
+    for number, rule in enumerate(rules, 1):
+        channels = rule.get("channels")
+        scope = f" (каналы: {', '.join(str(channel_id) for channel_id in channels)})" if channels else ""
+        text += f"{number}. <code>{escape_html(rule['rule'])}</code>{scope}\n"
+    return text
+
+def parse_channel_ids(token: str):
+    """Список ID каналов через запятую (с префиксом -100 или без); None, если это не ID"""
+    parts = token.split(",")
+    if not all(part.lstrip("-").isdigit() for part in parts):
+        return None
+    return [int(part.lstrip("-")[3:] if part.startswith("-100") else part) for part in parts]
+
+def save_rules(rules):
+    """Сохраняет правила и перекомпилирует их в мониторе"""
+    db = JsonDatabase()
+    settings = db.load_settings()
+    settings["keyword_rules"] = rules
+    db.save_settings(settings)
+    monitor = get_monitor_from_context()
+    if monitor:
+        monitor.update_rules(rules)
+
+@router.message(Command("rules"))
+@admin_only
+async def cmd_rules(message: Message):
+    """Команда /rules - список логических правил"""
+    rules = JsonDatabase().load_settings().get("keyword_rules", [])
+    await message.answer(format_rules(rules), parse_mode="HTML")
+
+@router.message(Command("rule_add"))
+@admin_only
+async def cmd_rule_add(message: Message):
+    """Команда /rule_add [ID каналов через запятую] правило"""
+    from monitor.keyword_rules import parse_rule, RuleSyntaxError
+    
+    args = message.text.split(maxsplit=1)[1:]
+    source = args[0].strip() if args else ""
+    channels = []
+    first, _, rest = source.partition(" ")
+    if rest and parse_channel_ids(first) is not None:
+        channels = parse_channel_ids(first)
+        source = rest.strip()
+    
+    if not source:
+        await message.answer(format_rules([]), parse_mode="HTML")
+        return
+    
+    try:
+        parse_rule(source)
+    except RuleSyntaxError as e:
+        await message.answer(f"❌ Ошибка в правиле: {escape_html(str(e))}", parse_mode="HTML")
+        return
+    
+    rules = JsonDatabase().load_settings().get("keyword_rules", [])
+    rules.append({"rule": source, "channels": channels})
+    save_rules(rules)
+    await message.answer(format_rules(rules), parse_mode="HTML")
+
+@router.message(Command("rule_del"))
+@admin_only
+async def cmd_rule_del(message: Message):
+    """Команда /rule_del N - удалить правило по номеру"""
+    args = message.text.split()[1:]
+    rules = JsonDatabase().load_settings().get("keyword_rules", [])
+    if not args or not args[0].isdigit() or not 1 <= int(args[0]) <= len(rules):
+        await message.answer("❌ Укажите номер правила из /rules")
+        return
+    
+    del rules[int(args[0]) - 1]
+    save_rules(rules)
+    await message.answer(format_rules(rules), parse_mode="HTML")
+
+# ============ НАБОРЫ КЛЮЧЕВЫХ СЛОВ ПО КАНАЛАМ ============
+
+def format_keyword_sets(keyword_sets) -> str:
+    """Список наборов ключевых слов отдельных каналов"""
+    channels = JsonDatabase().get_channels()
+    text = (
+        "🗂 <b>Наборы ключевых слов по каналам</b>\n\n"
+        "Для каналов из набора вместо общего списка ключевых слов используется свой.\n\n"
+        "Создать или заменить: <code>/kwset getcourse 1234567890,987654321 геткурс, getcourse, автоворонка</code>\n"
+        "Удалить: <code>/kwset_del getcourse</code>\n\n"
+    )
+    if not keyword_sets:
+        return text + "<i>Наборов нет, все каналы используют общий список</i>"
+    for keyword_set in keyword_sets:
+        channel_names = ", ".join(
+            escape_html(channels.get(str(channel_id), str(channel_id))) for channel_id in keyword_set["channels"]
+        )
+        text += (
+            f"🔸 <b>{escape_html(keyword_set['name'])}</b>\n"
+            f"   📺 {channel_names}\n"
+            f"   🔑 <i>{escape_html(', '.join(keyword_set['keywords']))}</i>\n"
+        )
+    return text
+
+def save_keyword_sets(keyword_sets):
+    """Сохраняет наборы ключевых слов и перекомпилирует их в мониторе"""
+    db = JsonDatabase()
+    settings = db.load_settings()
+    settings["keyword_sets"] = keyword_sets
+    db.save_settings(settings)
+    monitor = get_monitor_from_context()
+    if monitor:
+        monitor.update_keyword_sets(keyword_sets)
+
+@router.message(Command("kwsets"))
+@admin_only
+async def cmd_keyword_sets(message: Message):
+    """Команда /kwsets - наборы ключевых слов по каналам"""
+    keyword_sets = JsonDatabase().load_settings().get("keyword_sets", [])
+    await message.answer(format_keyword_sets(keyword_sets), parse_mode="HTML")
+
+@router.message(Command("kwset"))
+@admin_only
+async def cmd_keyword_set(message: Message):
+    """Команда /kwset имя ID_каналов слова - создать или заменить набор ключевых слов"""
+    args = message.text.split(maxsplit=3)[1:]
+    channel_ids = parse_channel_ids(args[1]) if len(args) > 1 else None
+    if len(args) < 3 or channel_ids is None:
+        await message.answer(format_keyword_sets([]), parse_mode="HTML")
+        return
+    
+    name = args[0]
+    keywords = parse_keywords_input(args[2])
+    if not keywords:
+        await message.answer("❌ Укажите ключевые слова через запятую")
+        return
+    
+    keyword_sets = JsonDatabase().load_settings().get("keyword_sets", [])
+    keyword_sets = [keyword_set for keyword_set in keyword_sets if keyword_set["name"] != name]
+    keyword_sets.append({"name": name, "channels": channel_ids, "keywords": keywords})
+    save_keyword_sets(keyword_sets)
+    await message.answer(format_keyword_sets(keyword_sets), parse_mode="HTML")
+
+@router.message(Command("kwset_del"))
+@admin_only
+async def cmd_keyword_set_del(message: Message):
+    """Команда /kwset_del имя - удалить набор ключевых слов"""
+    args = message.text.split()[1:]
+    keyword_sets = JsonDatabase().load_settings().get("keyword_sets", [])
+    remaining = [keyword_set for keyword_set in keyword_sets if not args or keyword_set["name"] != args[0]]
+    if not args or len(remaining) == len(keyword_sets):
+        await message.answer("❌ Укажите имя набора из /kwsets")
+        return
+    
+    save_keyword_sets(remaining)
+    await message.answer(format_keyword_sets(remaining), parse_mode="HTML")
+
+# ============ РЕГУЛЯРНЫЕ ВЫРАЖЕНИЯ ============
+
+def format_regex_keywords(entries) -> str:
+    """Список шаблонов со стоимостью: замеренной в мониторе или оценкой при сохранении"""
+    text = (
+        "🧬 <b>Шаблоны (регулярные выражения)</b>\n\n"
+        "Пример: <code>/regex_add \\d+\\s?(₽|руб)</code>\n"
+        "Удаление: <code>/regex_del 1</code>\n\n"
+    )
+    if not entries:
+        return text + "<i>Шаблонов нет</i>"
+    
+    monitor = get_monitor_from_context()
+    stats = monitor.matcher.regex.get_stats() if monitor else {}
+    for number, entry in enumerate(entries, 1):
+        measured = stats.get(entry["pattern"], {})
+        if measured.get("avg_us") is not None:
+            cost = measured["avg_us"]
+            cost_text = f"{cost:.1f} мкс/сообщ. (макс. {measured['max_us']:.1f}, замеров: {measured['samples']})"
+        else:
+            cost = entry.get("cost_us", 0.0)
+            cost_text = f"~{cost:.1f} мкс/сообщ. (оценка при сохранении)"
+        slow = " 🐢" if cost > REGEX_SLOW_PATTERN_US else ""
+        text += f"{number}. <code>{escape_html(entry['pattern'])}</code>\n   ⏱ {cost_text}{slow}\n"
+    return text
+
+def save_regex_keywords(entries):
+    """Сохраняет шаблоны и перекомпилирует их в мониторе"""
+    db = JsonDatabase()
+    settings = db.load_settings()
+    settings["regex_keywords"] = entries
+    db.save_settings(settings)
+    monitor = get_monitor_from_context()
+    if monitor:
+        monitor.update_regex_keywords(entries)
+
+@router.message(Command("regex"))
+@admin_only
+async def cmd_regex(message: Message):
+    """Команда /regex - список шаблонов и их стоимость"""
+    entries = JsonDatabase().load_settings().get("regex_keywords", [])
+    await message.answer(format_regex_keywords(entries), parse_mode="HTML")
+
+@router.message(Command("regex_add"))
+@admin_only
+async def cmd_regex_add(message: Message):
+    """Команда /regex_add шаблон - добавить ключевое слово-регулярное выражение"""
+    from monitor.regex_keywords import (
+        validate_pattern, measure_pattern_cost_isolated, check_pattern_cost, RegexKeywordError
+    )
+    
+    args = message.text.split(maxsplit=1)[1:]
+    pattern = args[0].strip() if args else ""
+    if not pattern:
+        await message.answer(format_regex_keywords([]), parse_mode="HTML")
+        return
+    
+    db = JsonDatabase()
+    entries = db.load_settings().get("regex_keywords", [])
+    if any(entry["pattern"] == pattern for entry in entries):
+        await message.answer("↩️ Такой шаблон уже есть")
+        return
+    
+    try:
+        warnings = validate_pattern(pattern, [entry["pattern"] for entry in entries])
+        # Оценка стоимости по последним найденным сообщениям и сообщению максимальной длины -
+        # в отдельном процессе, зависший шаблон не останавливает бота и монитор
+        samples = [found.text for found in db.get_recent_messages(200)]
+        cost_us = await measure_pattern_cost_isolated(pattern, samples)
+        check_pattern_cost(cost_us)
+    except RegexKeywordError as e:
+        await message.answer(f"❌ Шаблон не сохранен: {escape_html(str(e))}", parse_mode="HTML")
+        return
+    
+    entries.append({"pattern": pattern, "cost_us": round(cost_us, 1)})
+    save_regex_keywords(entries)
+    
+    text = format_regex_keywords(entries)
+    if warnings:
+        text = "⚠️ " + escape_html("; ".join(warnings)) + "\n\n" + text
+    await message.answer(text, parse_mode="HTML")
+
+@router.message(Command("regex_del"))
+@admin_only
+async def cmd_regex_del(message: Message):
+    """Команда /regex_del N - удалить шаблон по номеру"""
+    args = message.text.split()[1:]
+    entries = JsonDatabase().load_settings().get("regex_keywords", [])
+    if not args or not args[0].isdigit() or not 1 <= int(args[0]) <= len(entries):
+        await message.answer("❌ Укажите номер шаблона из /regex")
+        return
+    
+    del entries[int(args[0]) - 1]
+    save_regex_keywords(entries)
+    await message.answer(format_regex_keywords(entries), parse_mode="HTML")
+
 # ============ ФУНКЦИИ УПРАВЛЕНИЯ КАНАЛАМИ ============
 
 @router.message(F.text == "➕ Добавить канал")
@@ -645,6 +1585,8 @@ async def menu_add_channel_button(message: Message, state: FSMContext):
         "2. Или используйте @getmyid_bot\n"
         "3. ID канала начинается с -100\n\n"
         "📌 <b>Пример:</b> -1001234567890\n\n"
+        "📥 <b>Массовый импорт:</b> отправьте список ID, @username или ссылок t.me "
+        "(через запятую или с новой строки) либо .txt файл со списком\n\n"
         "❌ Для отмены введите /cancel"
     )
     await message.answer(text, parse_mode="HTML", reply_markup=get_back_menu())
@@ -684,3 +1626,59 @@ async def menu_remove_channel_button(message: Message, state: FSMContext):
 # (Добавлю остальные функции без Gmail...)
 
 # Заглушка для остальных функций - они будут добавлены в следующих обновлениях
+
+# ============ ДОБАВЛЕНИЕ И ИМПОРТ КАНАЛОВ ============
+
+def format_import_report(report) -> str:
+    """Формирует отчет о массовом импорте каналов"""
+    added, existing, failed = report['added'], report['existing'], report['failed']
+    lines = [
+        "📥 <b>Импорт каналов завершен</b>\n",
+        f"✅ Добавлено: <b>{len(added)}</b>",
+        f"↩️ Уже отслеживались: <b>{len(existing)}</b>",
+        f"❌ Ошибок: <b>{len(failed)}</b>\n"
+    ]
+    for entry, channel_id, title in added:
+        lines.append(f"✅ {escape_html(entry)} → <b>{escape_html(title)}</b> (<code>{channel_id}</code>)")
+    for entry, channel_id, title in existing:
+        lines.append(f"↩️ {escape_html(entry)} → {escape_html(title)} (<code>{channel_id}</code>)")
+    for entry, error in failed:
+        lines.append(f"❌ {escape_html(entry)}: {escape_html(error)}")
+    
+    text = "\n".join(lines)
+    if len(text) > 4000:
+        text = text[:4000].rsplit("\n", 1)[0] + "\n…"
+    return text
+
+@router.message(StateFilter(AdminStates.waiting_for_channel_id))
+@admin_only
+async def process_channel_id_input(message: Message, state: FSMContext):
+    """Добавление одного или нескольких каналов: текст со списком или .txt файл"""
+    monitor = get_monitor_from_context()
+    if not monitor:
+        await message.answer("❌ Монитор каналов недоступен, попробуйте позже")
+        return
+    
+    if message.document:
+        if message.document.file_size and message.document.file_size > CHANNEL_IMPORT_MAX_FILE_SIZE:
+            await message.answer("❌ Файл слишком большой")
+            return
+        file_data = await message.bot.download(message.document)
+        raw_text = file_data.read().decode('utf-8', errors='ignore')
+    else:
+        raw_text = message.text or ""
+    
+    entries = parse_channel_references(raw_text)
+    if not entries:
+        await message.answer("❌ Не найдено ни одного ID, @username или ссылки. Попробуйте еще раз:")
+        return
+    if len(entries) > CHANNEL_IMPORT_MAX_ENTRIES:
+        await message.answer(f"❌ Слишком много каналов за раз (максимум {CHANNEL_IMPORT_MAX_ENTRIES})")
+        return
+    
+    await state.clear()
+    progress = await message.answer(f"⏳ Проверяю каналы: {len(entries)}...")
+    
+    report = await monitor.import_channels(entries)
+    
+    await progress.edit_text(format_import_report(report), parse_mode="HTML")
@@ -0,0 +1,80 @@
+"""
+Кэш отрисованных экранов бота
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from database import JsonDatabase
+
+
+logger = logging.getLogger(__name__)
+
+# Отрисованный экран: (текст, клавиатура)
+RenderedView = Tuple[str, Any]
+
+
+class ViewCache:
+    """LRU кэш отрисованных экранов (текст + клавиатура)
+
+    Ключ — (экран, страница, уровень доступа). Запись действительна, пока не
+    изменилось поколение данных хранилища/настроек, поэтому повторные нажатия
+    "🔄 Обновить" на неизменных данных не обращаются к хранилищу.
+    Дополнительно запоминается, что сейчас отображается в каждом сообщении,
+    чтобы не вызывать edit_text с тем же содержимым.
+    """
+
+    def __init__(self, max_views: int = 128, max_displayed: int = 1024):
+        self.max_views = max_views
+        self.max_displayed = max_displayed
+        self._views: 'OrderedDict[Hashable, Tuple[Hashable, RenderedView]]' = OrderedDict()
+        self._displayed: 'OrderedDict[Tuple[int, int], RenderedView]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], RenderedView]) -> RenderedView:
+        """Возвращает экран из кэша или отрисовывает его заново"""
+        generation = JsonDatabase().get_generation()
+        entry = self._views.get(key)
+        if entry is not None and entry[0] == generation:
+            self._views.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        view = render()
+        self._views[key] = (generation, view)
+        self._views.move_to_end(key)
+        while len(self._views) > self.max_views:
+            self._views.popitem(last=False)
+        return view
+
+    def is_displayed(self, chat_id: int, message_id: int, text: str, reply_markup=None) -> bool:
+        """Проверяет, отображается ли уже этот экран в указанном сообщении"""
+        shown = self._displayed.get((chat_id, message_id))
+        if shown is None:
+            return False
+        return shown[0] == text and (shown[1] is reply_markup or shown[1] == reply_markup)
+
+    def remember_displayed(self, chat_id: int, message_id: int, text: str, reply_markup=None):
+        """Запоминает содержимое, отображаемое в сообщении"""
+        key = (chat_id, message_id)
+        self._displayed[key] = (text, reply_markup)
+        self._displayed.move_to_end(key)
+        while len(self._displayed) > self.max_displayed:
+            self._displayed.popitem(last=False)
+
+    def clear(self):
+        """Очищает кэш"""
+        self._views.clear()
+        self._displayed.clear()
+
+
+# Общий кэш экранов для всех обработчиков
+view_cache = ViewCache()
+
+
+def get_view_cache() -> ViewCache:
+    """Получает общий кэш экранов"""
+    return view_cache
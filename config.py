@@ -3,60 +3,15 @@
 """
 
 import os
+from datetime import timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
-load_dotenv()
-
-# Telegram API настройки
-API_ID = int(os.getenv('API_ID', '0'))
-API_HASH = os.getenv('API_HASH', '')
-PHONE = os.getenv('PHONE', '')
-SESSION_NAME = os.getenv('SESSION_NAME', 'stalker_session')
-
-# Управляющий бот
-BOT_TOKEN = os.getenv('BOT_TOKEN', '')
 
 # Система админов
 SUPER_ADMIN_ID = 5375230735  # Максимальный создатель
-ADMIN_IDS_STR = os.getenv('ADMIN_ID', '5375230735')
 ADMIN_ID = SUPER_ADMIN_ID  # Для обратной совместимости
 
-def get_admin_list():
-    """Получает список всех админов из настроек"""
-    try:
-        from database.json_db import JsonDatabase
-        db = JsonDatabase()
-        settings = db.load_settings()
-        
-        # Получаем список админов из базы
-        admin_list = settings.get('admin_ids', [])
-        
-        # Если список пуст, инициализируем из .env
-        if not admin_list:
-            admin_ids = [int(id.strip()) for id in ADMIN_IDS_STR.split(',') if id.strip().isdigit()]
-            admin_list = admin_ids
-            settings['admin_ids'] = admin_list
-            db.save_settings(settings)
-        
-        # Убеждаемся, что суперадмин всегда в списке
-        if SUPER_ADMIN_ID not in admin_list:
-            admin_list.append(SUPER_ADMIN_ID)
-            settings['admin_ids'] = admin_list
-            db.save_settings(settings)
-        
-        return admin_list
-    except ImportError:
-        # Если база данных недоступна, используем .env
-        return [int(id.strip()) for id in ADMIN_IDS_STR.split(',') if id.strip().isdigit()]
-
-def is_admin(user_id: int) -> bool:
-    """Проверяет, является ли пользователь админом"""
-    return user_id in get_admin_list()
-
-def is_super_admin(user_id: int) -> bool:
-    """Проверяет, является ли пользователь суперадмином"""
-    return user_id == SUPER_ADMIN_ID
-
 # Каналы для мониторинга (по умолчанию, можно добавлять через бота)
 DEFAULT_MONITORED_CHANNELS = {
     1495211598: "Работаем, ребята!",
@@ -67,28 +22,8 @@ DEFAULT_MONITORED_CHANNELS = {
     1751373900: "МИР КРЕАТОРОВ"
 }
 
-def get_monitored_channels():
-    """Получает список каналов для мониторинга из базы данных"""
-    try:
-        from database.json_db import JsonDatabase
-        db = JsonDatabase()
-        
-        # Инициализируем каналы в базе, если их там нет
-        channels_from_db = db.get_channels()
-        if not channels_from_db:
-            settings = db.load_settings()
-            settings['channels'] = {str(k): v for k, v in DEFAULT_MONITORED_CHANNELS.items()}
-            db.save_settings(settings)
-            channels_from_db = db.get_channels()
-        
-        # Преобразуем строковые ID обратно в int
-        return {int(k): v for k, v in channels_from_db.items()}
-    except ImportError:
-        # Если база данных недоступна, используем каналы по умолчанию
-        return DEFAULT_MONITORED_CHANNELS
-
-# Получаем актуальный список каналов
-MONITORED_CHANNELS = get_monitored_channels()
+# Часовой пояс для отображения времени и границ суток (MSK = UTC+3)
+MOSCOW_TZ = timezone(timedelta(hours=3), 'MSK')
 
 # Ключевые слова для поиска
 KEYWORDS = ["ищу", "wordpress"]
@@ -96,4 +31,334 @@ KEYWORDS = ["ищу", "wordpress"]
 # Пути к файлам
 DATA_DIR = "data"
 FOUND_MESSAGES_FILE = os.path.join(DATA_DIR, "found_messages.json")
+FOUND_MESSAGES_META_FILE = os.path.join(DATA_DIR, "found_messages.meta.json")
 SETTINGS_FILE = os.path.join(DATA_DIR, "settings.json")
+CHANNEL_ACCESS_FILE = os.path.join(DATA_DIR, "channel_access.json")
+WATERMARKS_FILE = os.path.join(DATA_DIR, "watermarks.json")
+RAW_ARCHIVE_FILE = os.path.join(DATA_DIR, "raw_messages.jsonl")
+# Таблица словоформ -> лемм (собирается заранее: python -m monitor.morphology build ...)
+LEMMA_TABLE_FILE = os.path.join(DATA_DIR, "lemmas.bin")
+
+# Проверка доступности каналов: параллельность, повторы при FloodWait и срок годности результата
+CHANNEL_CHECK_CONCURRENCY = 10
+CHANNEL_CHECK_MAX_ATTEMPTS = 3
+CHANNEL_ACCESS_TTL = 24 * 60 * 60  # секунды
+
+# Массовый импорт каналов: максимум записей за один импорт и размер файла со списком
+CHANNEL_IMPORT_MAX_ENTRIES = 500
+CHANNEL_IMPORT_MAX_FILE_SIZE = 256 * 1024  # байты
+
+# Догрузка пропущенных сообщений после простоя: параллельность по каналам,
+# лимит запросов истории в секунду (на все каналы), максимум сообщений на канал
+BACKFILL_CONCURRENCY = 5
+BACKFILL_REQUESTS_PER_SECOND = 2.0
+BACKFILL_MAX_MESSAGES_PER_CHANNEL = 2000
+# Как часто сохранять позиции обработки каналов во время работы
+WATERMARKS_FLUSH_INTERVAL = 30  # секунды
+
+# Поиск по истории каналов по запросу админа
+HISTORY_SEARCH_DEFAULT_DAYS = 30
+HISTORY_SEARCH_MAX_DAYS = 365
+HISTORY_SEARCH_CONCURRENCY = 5
+HISTORY_SEARCH_REQUESTS_PER_SECOND = 3.0
+# Максимум запросов к Telegram за один поиск
+HISTORY_SEARCH_REQUEST_BUDGET = 500
+# До скольких ключевых слов использовать серверный поиск (search=), больше - просмотр истории
+HISTORY_SEARCH_SERVER_KEYWORDS = 3
+HISTORY_SEARCH_PROGRESS_INTERVAL = 3  # секунды
+
+# Планировщик запросов Telethon: (запросов в секунду, запас) на метод для каждой сессии
+RPC_RATE_LIMITS = {
+    'get_entity': (10.0, 20),
+    'get_messages': (3.0, 5),
+    'iter_messages': (2.0, 4),
+    'default': (3.0, 5),
+}
+RPC_MAX_ATTEMPTS = 3
+# FloodWait дольше этого не пережидается повторами - запрос завершается ошибкой
+RPC_MAX_FLOOD_WAIT = 300  # секунды
+
+# Кэш лемм для токенов сообщений (количество токенов)
+MORPHOLOGY_CACHE_SIZE = 50000
+
+# Поиск с опечатками: слова короче FUZZY_MIN_LENGTH ищутся только точно,
+# до 8 символов допускается 1 опечатка, длиннее - до FUZZY_MAX_DISTANCE
+FUZZY_MIN_LENGTH = 5
+FUZZY_MAX_DISTANCE = 2
+# Токены и пары токенов сообщения длиннее FUZZY_MAX_TOKEN_LEN символов (ссылки, хэши)
+# с опечатками не проверяются: число вариантов с удалениями растет с длиной квадратично
+FUZZY_MAX_TOKEN_LEN = 32
+
+# Архив сырых сообщений для проверки ключевых слов (/dryrun): доля сохраняемых сообщений,
+# сколько последних сообщений хранить и размер пачки записи на диск
+RAW_ARCHIVE_SAMPLE_RATE = 1.0
+RAW_ARCHIVE_MAX_MESSAGES = 100000
+RAW_ARCHIVE_FLUSH_SIZE = 200
+
+# Почти одинаковые сообщения (одно объявление в нескольких чатах): окно, в котором повтор
+# связывается с первым сообщением, допустимое число отличающихся битов SimHash (из 64)
+# и минимальное число слов - короткие тексты не сравниваются
+DUPLICATE_WINDOW_SECONDS = 3600
+DUPLICATE_MAX_DISTANCE = 8
+DUPLICATE_MIN_TOKENS = 5
+
+# Пересборка ключевых слов: наборы больше MATCHER_EXECUTOR_THRESHOLD элементов
+# (слова, правила, шаблоны и слова наборов каналов) собираются в пуле потоков,
+# до MATCHER_INCREMENTAL_MAX_CHANGES добавленных/удаленных слов применяются без пересборки
+MATCHER_EXECUTOR_THRESHOLD = 2000
+MATCHER_INCREMENTAL_MAX_CHANGES = 20
+
+# Регулярные выражения в ключевых словах: максимальная длина шаблона, замер стоимости
+# каждого шаблона на каждом REGEX_PROFILE_EVERY-м сообщении и порог "медленного" шаблона
+REGEX_MAX_PATTERN_LENGTH = 200
+REGEX_PROFILE_EVERY = 100
+REGEX_SLOW_PATTERN_US = 50
+# Оценка стоимости при сохранении: отдельный процесс завершается через REGEX_COST_TIMEOUT
+# секунд после готовности (запуск и импорт ограничены REGEX_COST_STARTUP_TIMEOUT),
+# шаблон дороже REGEX_MAX_COST_US мкс на сообщение не сохраняется
+REGEX_COST_TIMEOUT = 5
+REGEX_COST_STARTUP_TIMEOUT = 60
+REGEX_MAX_COST_US = 2000
+
+# Правки сообщений: серия правок одного сообщения обрабатывается один раз за интервал,
+# хэши текстов последних сообщений помнятся, чтобы пропускать правки без изменения текста
+EDIT_DEBOUNCE_SECONDS = 2
+EDIT_HASH_CACHE_SIZE = 20000
+
+# События каналов без подтвержденного владельца принимаются от всех сессий;
+# повторы отсекаются по последним EVENT_DEDUP_CACHE_SIZE ключам (канал, ID сообщения)
+EVENT_DEDUP_CACHE_SIZE = 5000
+
+
+def _parse_admin_ids(admin_ids_str: str) -> List[int]:
+    """Разбирает список ID админов из строки через запятую"""
+    return [int(id.strip()) for id in admin_ids_str.split(',') if id.strip().isdigit()]
+
+
+class AppConfig:
+    """Лениво загружаемая конфигурация приложения
+
+    Импорт модуля не выполняет файловых операций: .env читается при первом
+    обращении к переменным окружения, settings.json — при первом обращении
+    к настройкам. Настройки кэшируются и перечитываются после записи через
+    JsonDatabase (по счетчику поколений), после правки файла вручную (по mtime)
+    или явного reload().
+    """
+
+    def __init__(self):
+        self._env_loaded = False
+        self._settings: Optional[Dict[str, Any]] = None
+        # Ключ кэша настроек: (поколение настроек JsonDatabase, mtime settings.json)
+        self._settings_key: Optional[Tuple[int, Optional[int]]] = None
+        self._channels: Optional[Dict[int, str]] = None
+        self._admin_list: Optional[List[int]] = None
+
+    # ---------- Переменные окружения ----------
+
+    def _env(self, name: str, default: str = '') -> str:
+        if not self._env_loaded:
+            load_dotenv()
+            self._env_loaded = True
+        return os.getenv(name, default)
+
+    @property
+    def api_id(self) -> int:
+        return int(self._env('API_ID', '0'))
+
+    @property
+    def api_hash(self) -> str:
+        return self._env('API_HASH', '')
+
+    @property
+    def phone(self) -> str:
+        return self._env('PHONE', '')
+
+    @property
+    def session_name(self) -> str:
+        return self._env('SESSION_NAME', 'stalker_session')
+
+    @property
+    def session_names(self) -> List[str]:
+        """Имена Telethon сессий: SESSION_NAMES через запятую, по умолчанию одна SESSION_NAME
+        
+        Первая сессия основная (авторизуется по PHONE), остальные должны быть авторизованы заранее.
+        """
+        names = [name.strip() for name in self._env('SESSION_NAMES', '').split(',') if name.strip()]
+        return list(dict.fromkeys(names)) or [self.session_name]
+    
+    @property
+    def bot_token(self) -> str:
+        return self._env('BOT_TOKEN', '')
+
+    @property
+    def admin_ids_str(self) -> str:
+        return self._env('ADMIN_ID', str(SUPER_ADMIN_ID))
+
+    # ---------- Настройки из базы ----------
+
+    @staticmethod
+    def _db():
+        from database.json_db import JsonDatabase
+        return JsonDatabase()
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Кэшированные настройки (не изменяйте возвращаемый словарь)"""
+        db = self._db()
+        try:
+            mtime = os.stat(SETTINGS_FILE).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        # Ключ берется до чтения: правка во время чтения перечитается при следующем обращении
+        key = (db.get_generation()[1], mtime)
+        if self._settings is None or key != self._settings_key:
+            self._settings = db.load_settings()
+            self._settings_key = key
+            self._channels = None
+            self._admin_list = None
+        return self._settings
+
+    def reload(self):
+        """Сбрасывает кэш, следующее обращение перечитает настройки с диска"""
+        self._settings = None
+        self._channels = None
+        self._admin_list = None
+
+    @property
+    def keywords(self) -> List[str]:
+        return list(self.settings.get('keywords', KEYWORDS))
+
+    @property
+    def monitoring_enabled(self) -> bool:
+        return bool(self.settings.get('monitoring_enabled', True))
+
+    @property
+    def keyword_rules(self) -> List[Dict[str, Any]]:
+        """Логические правила: [{'rule': текст, 'channels': [ID каналов]}]"""
+        return list(self.settings.get('keyword_rules', []))
+
+    @property
+    def keyword_sets(self) -> List[Dict[str, Any]]:
+        """Наборы ключевых слов для отдельных каналов и групп каналов:
+        [{'name': имя, 'channels': [ID каналов], 'keywords': [слова]}].
+        Для каналов из наборов общий список keywords не используется."""
+        return list(self.settings.get('keyword_sets', []))
+
+    @property
+    def raw_archive_enabled(self) -> bool:
+        """Сохранять выборку всех сообщений каналов для /dryrun (RAW_ARCHIVE_FILE)"""
+        return bool(self.settings.get('raw_archive_enabled', False))
+
+    @property
+    def duplicate_suppression_enabled(self) -> bool:
+        """Не уведомлять о повторах уже найденного сообщения в других каналах"""
+        return bool(self.settings.get('duplicate_suppression_enabled', True))
+
+    @property
+    def regex_keywords(self) -> List[Dict[str, Any]]:
+        """Ключевые слова - регулярные выражения: [{'pattern': шаблон, 'cost_us': оценка стоимости}]"""
+        return list(self.settings.get('regex_keywords', []))
+
+    @property
+    def fuzzy_enabled(self) -> bool:
+        """Искать ключевые слова с опечатками"""
+        return bool(self.settings.get('fuzzy_enabled', False))
+
+    @property
+    def morphology_enabled(self) -> bool:
+        """Сопоставлять слова по леммам (нужна таблица LEMMA_TABLE_FILE)"""
+        return bool(self.settings.get('morphology_enabled', False))
+
+    @property
+    def monitored_channels(self) -> Dict[int, str]:
+        """Каналы для мониторинга {channel_id: название}"""
+        try:
+            settings = self.settings
+        except ImportError:
+            # Если база данных недоступна, используем каналы по умолчанию
+            return dict(DEFAULT_MONITORED_CHANNELS)
+
+        if self._channels is None:
+            channels_from_db = settings.get('channels', {})
+            if not channels_from_db:
+                # Инициализируем каналы в базе, если их там нет
+                db = self._db()
+                new_settings = dict(settings)
+                new_settings['channels'] = {str(k): v for k, v in DEFAULT_MONITORED_CHANNELS.items()}
+                db.save_settings(new_settings)
+                channels_from_db = self.settings.get('channels', {})
+
+            # Преобразуем строковые ID обратно в int
+            self._channels = {int(k): v for k, v in channels_from_db.items()}
+        return dict(self._channels)
+
+    @property
+    def admin_list(self) -> List[int]:
+        """Список всех админов (суперадмин всегда включен)"""
+        try:
+            settings = self.settings
+        except ImportError:
+            # Если база данных недоступна, используем .env
+            return _parse_admin_ids(self.admin_ids_str)
+
+        if self._admin_list is None:
+            admin_list = list(settings.get('admin_ids', []))
+            changed = False
+
+            # Если список пуст, инициализируем из .env
+            if not admin_list:
+                admin_list = _parse_admin_ids(self.admin_ids_str)
+                changed = True
+
+            # Убеждаемся, что суперадмин всегда в списке
+            if SUPER_ADMIN_ID not in admin_list:
+                admin_list.append(SUPER_ADMIN_ID)
+                changed = True
+
+            if changed:
+                new_settings = dict(settings)
+                new_settings['admin_ids'] = admin_list
+                self._db().save_settings(new_settings)
+                self.settings  # обновляем кэш после записи
+            self._admin_list = admin_list
+        return list(self._admin_list)
+
+
+# Единый экземпляр конфигурации
+app_config = AppConfig()
+
+
+def get_admin_list():
+    """Получает список всех админов из настроек"""
+    return app_config.admin_list
+
+def is_admin(user_id: int) -> bool:
+    """Проверяет, является ли пользователь админом"""
+    return user_id in get_admin_list()
+
+def is_super_admin(user_id: int) -> bool:
+    """Проверяет, является ли пользователь суперадмином"""
+    return user_id == SUPER_ADMIN_ID
+
+def get_monitored_channels():
+    """Получает список каналов для мониторинга из базы данных"""
+    return app_config.monitored_channels
+
+
+# Значения, вычисляемые при первом обращении (для обратной совместимости:
+# from config import API_ID и т.п.)
+_LAZY_ATTRIBUTES = {
+    'API_ID': 'api_id',
+    'API_HASH': 'api_hash',
+    'PHONE': 'phone',
+    'SESSION_NAME': 'session_name',
+    'BOT_TOKEN': 'bot_token',
+    'ADMIN_IDS_STR': 'admin_ids_str',
+    'MONITORED_CHANNELS': 'monitored_channels',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(app_config, _LAZY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,5 +3,6 @@ Database module
 """
 
 from .json_db import JsonDatabase
+from .models import FoundMessage
 
-__all__ = ['JsonDatabase']
+__all__ = ['JsonDatabase', 'FoundMessage']
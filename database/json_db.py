@@ -4,17 +4,237 @@
 
 import json
 import os
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-from config import DATA_DIR, FOUND_MESSAGES_FILE, SETTINGS_FILE
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Any, Optional, Tuple, Union
+from datetime import datetime, tzinfo
+from config import (
+    DATA_DIR, FOUND_MESSAGES_FILE, FOUND_MESSAGES_META_FILE, SETTINGS_FILE, CHANNEL_ACCESS_FILE,
+    WATERMARKS_FILE, RAW_ARCHIVE_FILE, RAW_ARCHIVE_MAX_MESSAGES, MOSCOW_TZ
+)
+from .models import FoundMessage
+
+
+# Максимальное количество хранимых найденных сообщений
+MAX_FOUND_MESSAGES = 1000
+
+# Версия формата хранилища сообщений (записывается в файл метаданных)
+STORE_SCHEMA_VERSION = 1
+
+
+def _record_time(message: FoundMessage) -> float:
+    """Время публикации сообщения в секундах epoch
+    
+    Сообщения из поиска по истории и догрузки пропусков сохраняются намного позже
+    публикации, поэтому индекс строится по дате сообщения; время сохранения
+    (timestamp, наивное - локальное время сервера) используется, только если даты нет.
+    """
+    for value in (message.date, message.moscow_time, message.timestamp):
+        if value:
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except (ValueError, OverflowError, OSError):
+                continue
+    return 0.0
+
+
+def _to_epoch(moment: datetime, tz: tzinfo) -> float:
+    """Переводит datetime в epoch; наивное время трактуется в часовом поясе tz"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=tz)
+    return moment.timestamp()
+
+
+class _MessageStore:
+    """Кэш найденных сообщений в памяти, общий для всех экземпляров JsonDatabase
+    
+    Файл разбирается один раз и перечитывается только при изменении извне
+    (по mtime), поэтому постраничное чтение и подсчет не зависят от размера базы.
+    Рядом с файлом ведется небольшой файл метаданных (количество сообщений,
+    счетчики по каналам, время последней записи, версия схемы), который
+    обновляется при каждой записи и позволяет получить счетчики без загрузки базы.
+    """
+    
+    def __init__(self, path: str, meta_path: str):
+        self.path = path
+        self.meta_path = meta_path
+        self.records: List[FoundMessage] = []
+        # Индекс по ключу (канал, ID сообщения) - для дедупликации и обновления записей
+        self.by_key: Dict[Tuple[int, int], FoundMessage] = {}
+        # Индекс по времени: неубывающие epoch-метки, параллельные records
+        self.times: List[float] = []
+        # Индекс по каналам: channel_id -> записи канала в хронологическом порядке
+        self.by_channel: Dict[int, List[FoundMessage]] = {}
+        # Счетчик изменений: увеличивается при каждой записи или перечитывании файла
+        self.generation = 0
+        self._mtime: Optional[float] = None
+        self._loaded = False
+        self._last_write: Optional[str] = None
+        self._metadata_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+    
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+    
+    def ensure_loaded(self):
+        """Загружает файл, если он еще не загружен или был изменен извне"""
+        mtime = self._file_mtime()
+        if self._loaded and mtime == self._mtime:
+            return
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw_messages = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            raw_messages = []
+        
+        self._set_records([FoundMessage.from_dict(msg) for msg in raw_messages])
+        self._mtime = mtime
+        self._loaded = True
+        self._last_write = datetime.fromtimestamp(mtime).isoformat() if mtime else None
+    
+    def _set_records(self, records: List[FoundMessage]):
+        times = [_record_time(msg) for msg in records]
+        if any(later < earlier for earlier, later in zip(times, times[1:])):
+            # Порядок в файле нарушен (например, ручная правка) - восстанавливаем хронологию
+            order = sorted(range(len(records)), key=times.__getitem__)
+            records = [records[i] for i in order]
+            times = [times[i] for i in order]
+        
+        by_channel: Dict[int, List[FoundMessage]] = {}
+        for msg in records:
+            by_channel.setdefault(msg.channel_id, []).append(msg)
+        
+        self.records = records
+        self.times = times
+        self.by_channel = by_channel
+        self.by_key = {msg.key: msg for msg in records}
+        self.generation += 1
+    
+    def replace(self, records: List[FoundMessage]):
+        """Заменяет содержимое хранилища и записывает его на диск"""
+        self._set_records(list(records))
+        self.flush()
+    
+    def append(self, message: FoundMessage, max_records: int):
+        """Добавляет запись в хронологическую позицию, вытесняя самые старые при превышении лимита"""
+        record_time = _record_time(message)
+        # Живые сообщения приходят по порядку и попадают в конец; догруженные из
+        # истории вставляются на свое место по дате публикации
+        position = bisect_right(self.times, record_time)
+        self.records.insert(position, message)
+        self.times.insert(position, record_time)
+        
+        channel_records = self.by_channel.setdefault(message.channel_id, [])
+        channel_position = len(channel_records)
+        while channel_position and _record_time(channel_records[channel_position - 1]) > record_time:
+            channel_position -= 1
+        channel_records.insert(channel_position, message)
+        self.by_key[message.key] = message
+        self.generation += 1
+        
+        overflow = len(self.records) - max_records
+        if overflow > 0:
+            for evicted in self.records[:overflow]:
+                self.by_key.pop(evicted.key, None)
+                # Вытесняются самые старые записи, поэтому в списке канала они первые
+                channel_records = self.by_channel.get(evicted.channel_id)
+                if channel_records:
+                    del channel_records[0]
+                    if not channel_records:
+                        del self.by_channel[evicted.channel_id]
+            del self.records[:overflow]
+            del self.times[:overflow]
+        
+        self.flush()
+    
+    def remove_channel(self, channel_id: int) -> int:
+        """Удаляет все записи канала, возвращает количество удаленных"""
+        channel_records = self.by_channel.get(channel_id)
+        if not channel_records:
+            return 0
+        
+        removed = len(channel_records)
+        self._set_records([msg for msg in self.records if msg.channel_id != channel_id])
+        self.flush()
+        return removed
+    
+    def between(self, start_ts: float, end_ts: float) -> List[FoundMessage]:
+        """Записи в полуинтервале [start_ts, end_ts) за O(log N + k)"""
+        lo = bisect_left(self.times, start_ts)
+        hi = bisect_left(self.times, end_ts, lo)
+        return self.records[lo:hi]
+    
+    def flush(self):
+        """Записывает текущее содержимое и метаданные на диск"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump([msg.to_dict() for msg in self.records], f, ensure_ascii=False, indent=2)
+        self._mtime = self._file_mtime()
+        self._loaded = True
+        self._last_write = datetime.now().isoformat()
+        
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self._build_metadata(), f, ensure_ascii=False, indent=2)
+    
+    def _build_metadata(self) -> Dict[str, Any]:
+        """Метаданные по загруженным записям (кэшируются до следующего изменения)"""
+        if self._metadata_cache is not None and self._metadata_cache[0] == self.generation:
+            return self._metadata_cache[1]
+        
+        metadata = {
+            'schema_version': STORE_SCHEMA_VERSION,
+            'count': len(self.records),
+            'channel_counts': {str(channel_id): len(records) for channel_id, records in self.by_channel.items()},
+            'last_write': self._last_write,
+            'messages_mtime': self._mtime
+        }
+        self._metadata_cache = (self.generation, metadata)
+        return metadata
+    
+    def metadata(self) -> Dict[str, Any]:
+        """Метаданные хранилища за O(1): из памяти, из файла метаданных или (если он устарел) после загрузки"""
+        mtime = self._file_mtime()
+        if self._loaded and mtime == self._mtime:
+            return self._build_metadata()
+        
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            metadata = None
+        
+        if (
+            isinstance(metadata, dict)
+            and metadata.get('schema_version') == STORE_SCHEMA_VERSION
+            and metadata.get('messages_mtime') == mtime
+        ):
+            return metadata
+        
+        # Файл метаданных отсутствует или не соответствует базе - пересчитываем
+        self.ensure_loaded()
+        return self._build_metadata()
+
+
+_message_store = _MessageStore(FOUND_MESSAGES_FILE, FOUND_MESSAGES_META_FILE)
+
+# Счетчик изменений настроек (увеличивается при каждом save_settings)
+_settings_generation = 0
+# Количество строк в архиве сырых сообщений (None - еще не подсчитано)
+_raw_archive_count: Optional[int] = None
 
 
 class JsonDatabase:
     """Класс для работы с JSON базой данных"""
     
+    # Директория и файлы создаются один раз на процесс, а не при каждом JsonDatabase()
+    _files_initialized = False
+    
     def __init__(self):
-        self._ensure_data_dir()
-        self._init_files()
+        if not JsonDatabase._files_initialized:
+            self._ensure_data_dir()
+            self._init_files()
+            JsonDatabase._files_initialized = True
     
     def _ensure_data_dir(self):
         """Создает директорию для данных если её нет"""
@@ -33,41 +253,82 @@ class JsonDatabase:
                 "last_update": datetime.now().isoformat()
             })
     
-    def load_found_messages(self) -> List[Dict[str, Any]]:
+    def load_found_messages(self) -> List[FoundMessage]:
         """Загружает найденные сообщения"""
-        try:
-            with open(FOUND_MESSAGES_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        _message_store.ensure_loaded()
+        return list(_message_store.records)
     
-    def save_found_messages(self, messages: List[Dict[str, Any]]):
+    def save_found_messages(self, messages: List[FoundMessage]):
         """Сохраняет найденные сообщения"""
-        with open(FOUND_MESSAGES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(messages, f, ensure_ascii=False, indent=2)
+        _message_store.replace(messages)
     
-    def add_found_message(self, message_data: Dict[str, Any]):
+    def add_found_message(self, message: Union[FoundMessage, Dict[str, Any]]) -> bool:
         """Добавляет новое найденное сообщение"""
-        messages = self.load_found_messages()
+        if isinstance(message, dict):
+            message = FoundMessage.from_dict(message)
         
-        # Проверяем, нет ли уже такого сообщения
-        message_id = message_data.get('message_id')
-        channel_id = message_data.get('channel_id')
+        _message_store.ensure_loaded()
         
-        for msg in messages:
-            if msg.get('message_id') == message_id and msg.get('channel_id') == channel_id:
-                return False  # Сообщение уже существует
+        # Проверяем, нет ли уже такого сообщения
+        if message.key in _message_store.by_key:
+            return False  # Сообщение уже существует
         
-        message_data['timestamp'] = datetime.now().isoformat()
-        messages.append(message_data)
+        message.timestamp = datetime.now().isoformat()
         
-        # Ограничиваем количество сохраненных сообщений (последние 1000)
-        if len(messages) > 1000:
-            messages = messages[-1000:]
+        # Ограничиваем количество сохраненных сообщений (последние MAX_FOUND_MESSAGES)
+        _message_store.append(message, MAX_FOUND_MESSAGES)
+        return True
+    
+    def get_found_message(self, channel_id: int, message_id: int) -> Optional[FoundMessage]:
+        """Получает сохраненное сообщение по каналу и ID"""
+        _message_store.ensure_loaded()
+        return _message_store.by_key.get((channel_id, message_id))
+    
+    def update_found_message(self, message: FoundMessage) -> bool:
+        """Сохраняет изменения записи, полученной через get_found_message
         
-        self.save_found_messages(messages)
+        Returns:
+            False, если записи уже нет в хранилище (например, вытеснена)
+        """
+        _message_store.ensure_loaded()
+        if _message_store.by_key.get(message.key) is not message:
+            return False
+        _message_store.generation += 1
+        _message_store.flush()
         return True
     
+    def count_found_messages(self) -> int:
+        """Возвращает количество найденных сообщений (без загрузки базы)"""
+        return self.get_store_metadata()['count']
+    
+    def get_store_metadata(self) -> Dict[str, Any]:
+        """Возвращает метаданные хранилища сообщений за O(1)
+        
+        Ключи: schema_version, count, channel_counts ({str(channel_id): количество}),
+        last_write (ISO время последней записи), messages_mtime.
+        """
+        return _message_store.metadata()
+    
+    def get_messages_page(self, offset: int, limit: int, newest_first: bool = False) -> List[FoundMessage]:
+        """Получает страницу найденных сообщений
+        
+        Args:
+            offset: Смещение от начала (от самых старых, либо от самых новых при newest_first)
+            limit: Размер страницы
+            newest_first: Отсчитывать смещение от самых новых сообщений
+        """
+        _message_store.ensure_loaded()
+        records = _message_store.records
+        if offset < 0 or limit <= 0:
+            return []
+        
+        if newest_first:
+            end = len(records) - offset
+            if end <= 0:
+                return []
+            return records[max(0, end - limit):end][::-1]
+        return records[offset:offset + limit]
+    
     def load_settings(self) -> Dict[str, Any]:
         """Загружает настройки"""
         try:
@@ -82,23 +343,74 @@ class JsonDatabase:
     
     def save_settings(self, settings: Dict[str, Any]):
         """Сохраняет настройки"""
+        global _settings_generation
         settings['last_update'] = datetime.now().isoformat()
         with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
             json.dump(settings, f, ensure_ascii=False, indent=2)
+        _settings_generation += 1
     
-    def get_recent_messages(self, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_generation(self) -> Tuple[int, int]:
+        """Возвращает поколение данных (сообщения, настройки) без обращения к диску
+        
+        Значение меняется при любой записи сообщений или настроек в этом процессе,
+        поэтому его можно использовать как ключ инвалидации кэшей.
+        """
+        return (_message_store.generation, _settings_generation)
+    
+    def get_messages_between(self, start: datetime, end: datetime, tz: tzinfo = MOSCOW_TZ) -> List[FoundMessage]:
+        """Получает сообщения, опубликованные в полуинтервале [start, end)
+        
+        Args:
+            start: Начало интервала (включительно)
+            end: Конец интервала (не включительно)
+            tz: Часовой пояс для наивных start/end (по умолчанию MSK)
+        """
+        _message_store.ensure_loaded()
+        return _message_store.between(_to_epoch(start, tz), _to_epoch(end, tz))
+    
+    def get_recent_messages(self, limit: int = 10) -> List[FoundMessage]:
         """Получает последние найденные сообщения"""
-        messages = self.load_found_messages()
-        return messages[-limit:] if messages else []
+        _message_store.ensure_loaded()
+        records = _message_store.records
+        return records[-limit:] if records and limit > 0 else []
     
     def clear_messages(self):
         """Очищает все найденные сообщения"""
         self.save_found_messages([])
     
-    def get_messages_by_channel(self, channel_id: int) -> List[Dict[str, Any]]:
-        """Получает сообщения по ID канала"""
-        messages = self.load_found_messages()
-        return [msg for msg in messages if msg.get('channel_id') == channel_id]
+    def get_messages_by_channel(self, channel_id: int, offset: int = 0, limit: Optional[int] = None,
+                                newest_first: bool = False) -> List[FoundMessage]:
+        """Получает сообщения по ID канала (по индексу каналов, без полного перебора)
+        
+        Args:
+            channel_id: ID канала
+            offset: Смещение от самых старых (или самых новых при newest_first)
+            limit: Размер страницы (None - все сообщения канала)
+            newest_first: Отсчитывать смещение от самых новых сообщений
+        """
+        _message_store.ensure_loaded()
+        channel_records = _message_store.by_channel.get(channel_id, [])
+        if offset < 0:
+            return []
+        
+        if newest_first:
+            end = len(channel_records) - offset
+            if end <= 0:
+                return []
+            start = 0 if limit is None else max(0, end - limit)
+            return channel_records[start:end][::-1]
+        
+        end = None if limit is None else offset + limit
+        return channel_records[offset:end]
+    
+    def count_messages_by_channel(self, channel_id: int) -> int:
+        """Возвращает количество сообщений канала за O(1) (без загрузки базы)"""
+        return self.get_store_metadata()['channel_counts'].get(str(channel_id), 0)
+    
+    def get_channel_message_counts(self) -> Dict[int, int]:
+        """Возвращает количество сообщений по каждому каналу"""
+        channel_counts = self.get_store_metadata()['channel_counts']
+        return {int(channel_id): count for channel_id, count in channel_counts.items()}
     
     def get_channels(self) -> Dict[int, str]:
         """Получает список каналов из настроек"""
@@ -121,8 +433,36 @@ class JsonDatabase:
         self.save_settings(settings)
         return True
     
-    def remove_channel(self, channel_id: int) -> bool:
-        """Удаляет канал"""
+    def add_channels(self, new_channels: Dict[int, str]) -> Tuple[List[int], List[int]]:
+        """Добавляет несколько каналов за одну запись настроек
+        
+        Returns:
+            (добавленные ID, ID уже существовавших каналов)
+        """
+        settings = self.load_settings()
+        channels = settings.get('channels', {})
+        added, existing = [], []
+        
+        for channel_id, channel_name in new_channels.items():
+            str_channel_id = str(channel_id)
+            if str_channel_id in channels:
+                existing.append(channel_id)
+                continue
+            channels[str_channel_id] = channel_name
+            added.append(channel_id)
+        
+        if added:
+            settings['channels'] = channels
+            self.save_settings(settings)
+        return added, existing
+    
+    def remove_channel(self, channel_id: int, purge_messages: bool = False) -> bool:
+        """Удаляет канал
+        
+        Args:
+            channel_id: ID канала
+            purge_messages: Удалить также найденные сообщения этого канала
+        """
         settings = self.load_settings()
         channels = settings.get('channels', {})
         str_channel_id = str(channel_id)
@@ -133,6 +473,10 @@ class JsonDatabase:
         del channels[str_channel_id]
         settings['channels'] = channels
         self.save_settings(settings)
+        
+        if purge_messages:
+            _message_store.ensure_loaded()
+            _message_store.remove_channel(int(channel_id))
         return True
     
     def update_channel(self, channel_id: int, new_name: str) -> bool:
@@ -149,6 +493,93 @@ class JsonDatabase:
         self.save_settings(settings)
         return True
     
+    def load_channel_access(self) -> Dict[int, Dict[str, Any]]:
+        """Загружает сохраненные результаты проверки доступности каналов
+        
+        Returns:
+            {channel_id: {'accessible': bool, 'checked_at': epoch секунды, 'error': str или None}}
+        """
+        try:
+            with open(CHANNEL_ACCESS_FILE, 'r', encoding='utf-8') as f:
+                raw_results = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {int(channel_id): result for channel_id, result in raw_results.items()}
+    
+    def save_channel_access(self, results: Dict[int, Dict[str, Any]]):
+        """Сохраняет результаты проверки доступности каналов"""
+        with open(CHANNEL_ACCESS_FILE, 'w', encoding='utf-8') as f:
+            json.dump({str(channel_id): result for channel_id, result in results.items()},
+                      f, ensure_ascii=False, indent=2)
+    
+    def load_watermarks(self) -> Dict[int, int]:
+        """Загружает позиции обработки каналов
+        
+        Returns:
+            {channel_id: ID последнего обработанного сообщения}
+        """
+        try:
+            with open(WATERMARKS_FILE, 'r', encoding='utf-8') as f:
+                raw_watermarks = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return {int(channel_id): int(message_id) for channel_id, message_id in raw_watermarks.items()}
+    
+    def save_watermarks(self, watermarks: Dict[int, int]):
+        """Сохраняет позиции обработки каналов"""
+        with open(WATERMARKS_FILE, 'w', encoding='utf-8') as f:
+            json.dump({str(channel_id): message_id for channel_id, message_id in watermarks.items()},
+                      f, ensure_ascii=False, indent=2)
+    
+    def append_raw_messages(self, records: List[Dict[str, Any]]):
+        """Дописывает сообщения в архив сырых сообщений (JSONL)
+        
+        Когда архив вырастает на четверть больше RAW_ARCHIVE_MAX_MESSAGES, он переписывается
+        с последними RAW_ARCHIVE_MAX_MESSAGES сообщениями.
+        """
+        global _raw_archive_count
+        if not records:
+            return
+        if _raw_archive_count is None:
+            _raw_archive_count = len(self._read_raw_lines())
+        
+        with open(RAW_ARCHIVE_FILE, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+        _raw_archive_count += len(records)
+        
+        if _raw_archive_count > RAW_ARCHIVE_MAX_MESSAGES * 5 // 4:
+            lines = self._read_raw_lines()[-RAW_ARCHIVE_MAX_MESSAGES:]
+            tmp_path = f"{RAW_ARCHIVE_FILE}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            os.replace(tmp_path, RAW_ARCHIVE_FILE)
+            _raw_archive_count = len(lines)
+    
+    def _read_raw_lines(self) -> List[str]:
+        try:
+            with open(RAW_ARCHIVE_FILE, 'r', encoding='utf-8') as f:
+                return f.readlines()
+        except FileNotFoundError:
+            return []
+    
+    def load_raw_messages(self) -> List[Dict[str, Any]]:
+        """Загружает архив сырых сообщений: [{'channel_id', 'message_id', 'date', 'text'}]"""
+        records = []
+        for line in self._read_raw_lines():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Последняя строка могла быть дописана не полностью
+                continue
+        return records
+    
+    def count_raw_messages(self) -> int:
+        """Количество сообщений в архиве сырых сообщений"""
+        global _raw_archive_count
+        if _raw_archive_count is None:
+            _raw_archive_count = len(self._read_raw_lines())
+        return _raw_archive_count
+    
     def get_admin_ids(self) -> List[int]:
         """Получает список ID админов"""
         settings = self.load_settings()
@@ -0,0 +1,115 @@
+"""
+Типизированные записи базы данных
+"""
+
+import sys
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Интернирует повторяющиеся строки (названия каналов, имена отправителей)"""
+    if value is None:
+        return None
+    return sys.intern(str(value))
+
+
+class FoundMessage:
+    """Найденное сообщение с ключевыми словами
+
+    Компактная запись со __slots__ вместо словаря из 13+ ключей.
+    Повторяющиеся строки интернируются, поля отправителя необязательны.
+    В словарь запись превращается только на границах API (JSON, внешние callback).
+    """
+
+    __slots__ = (
+        'message_id',
+        'channel_id',
+        'channel_name',
+        'text',
+        'found_keywords',
+        'date',
+        'moscow_time',
+        'sender_id',
+        'sender_username',
+        'sender_first_name',
+        'sender_last_name',
+        'sender_full_name',
+        'is_forwarded',
+        'timestamp',
+        'fuzzy_keywords',
+        'extra',
+    )
+
+    # Порядок ключей при сериализации (совпадает с историческим форматом JSON)
+    FIELDS = __slots__[:-1]
+
+    def __init__(
+        self,
+        message_id: int,
+        channel_id: int,
+        channel_name: str,
+        text: str,
+        found_keywords: Iterable[str] = (),
+        date: Optional[str] = None,
+        moscow_time: Optional[str] = None,
+        sender_id: Optional[int] = None,
+        sender_username: Optional[str] = None,
+        sender_first_name: Optional[str] = None,
+        sender_last_name: Optional[str] = None,
+        sender_full_name: Optional[str] = None,
+        is_forwarded: bool = False,
+        timestamp: Optional[str] = None,
+        fuzzy_keywords: Iterable[str] = (),
+        extra: Optional[Dict[str, Any]] = None,
+    ):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.channel_name = _intern(channel_name)
+        self.text = text or ''
+        self.found_keywords: Tuple[str, ...] = tuple(sys.intern(kw) for kw in found_keywords)
+        self.date = date
+        self.moscow_time = moscow_time
+        self.sender_id = sender_id
+        self.sender_username = _intern(sender_username)
+        self.sender_first_name = _intern(sender_first_name)
+        self.sender_last_name = _intern(sender_last_name)
+        self.sender_full_name = _intern(sender_full_name)
+        self.is_forwarded = bool(is_forwarded)
+        self.timestamp = timestamp
+        # Ключевые слова, найденные с опечатками (отдельно от точных совпадений)
+        self.fuzzy_keywords: Tuple[str, ...] = tuple(sys.intern(kw) for kw in fuzzy_keywords or ())
+        # Неизвестные ключи из JSON сохраняем, чтобы не терять их при перезаписи
+        self.extra = extra or None
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        """Ключ уникальности сообщения (канал, ID сообщения)"""
+        return (self.channel_id, self.message_id)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FoundMessage':
+        """Создает запись из словаря (формат JSON файла)"""
+        known = {name: data[name] for name in cls.FIELDS if name in data}
+        extra = {k: v for k, v in data.items() if k not in known}
+        known.setdefault('message_id', None)
+        known.setdefault('channel_id', None)
+        known.setdefault('channel_name', 'Неизвестный канал')
+        known.setdefault('text', '')
+        if known.get('found_keywords') is None:
+            known['found_keywords'] = ()
+        return cls(extra=extra, **known)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Преобразует запись в словарь (для JSON и внешних потребителей)"""
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        data['found_keywords'] = list(self.found_keywords)
+        data['fuzzy_keywords'] = list(self.fuzzy_keywords)
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self) -> str:
+        return (
+            f"FoundMessage(channel_id={self.channel_id!r}, message_id={self.message_id!r}, "
+            f"keywords={list(self.found_keywords)!r})"
+        )
@@ -11,10 +11,9 @@ from pathlib import Path
 # Добавляем текущую директорию в путь для импортов
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import API_ID, API_HASH, BOT_TOKEN, ADMIN_ID
 from monitor import ChannelMonitor
 from bot import ControlBot
-from utils import setup_logging, ensure_directories, validate_config, get_app_info
+from utils import setup_logging, ensure_directories, validate_config, get_app_info, StartupGraph
 
 
 logger = logging.getLogger(__name__)
@@ -27,6 +26,10 @@ class StalkerApp:
         self.monitor = None
         self.control_bot = None
         self.running = False
+        # Граф запуска: по нему stop() определяет, какие шаги нужно свернуть
+        self.startup = None
+        # Метрики запуска: время до готовности и время завершения каждого шага (секунды)
+        self.startup_metrics = {}
     
     async def start(self):
         """Запуск приложения"""
@@ -56,24 +59,60 @@ class StalkerApp:
             self.monitor = ChannelMonitor()
             self.control_bot = ControlBot(self.monitor)
             
-            # Запуск монитора каналов
-            logger.info("🔍 Запуск мониторинга каналов...")
-            await self.monitor.start()
-            
-            # Отправка уведомления о запуске
-            await self.control_bot.send_notification(
-                "🟢 <b>Stalker Bot запущен!</b>\n\n"
-                f"📺 Мониторится каналов: {app_info['channels_count']}\n"
-                f"🔑 Ключевых слов: {app_info['keywords_count']}\n"
-                f"📨 Найдено сообщений: {app_info['messages_found']}\n\n"
-                "Бот готов к работе! 🎯"
+            # Граф запуска: polling бота и подключение монитора стартуют сразу и параллельно,
+            # проверка каналов идет в фоне после подключения, затем догрузка пропущенного за время простоя,
+            # уведомление - когда все готово
+            startup = StartupGraph()
+            self.startup = startup
+            startup.add("bot_polling", self.control_bot.start)
+            startup.add("bot_ready", self.control_bot.wait_until_ready)
+            startup.add("monitor_connect", lambda: self.monitor.start(verify_channels=False))
+            startup.add("channels_verify", self.monitor.verify_channels, depends_on=["monitor_connect"])
+            startup.add("channels_backfill", self._run_backfill, depends_on=["channels_verify", "bot_ready"])
+            startup.add(
+                "startup_notification",
+                lambda: self._send_startup_notification(app_info, startup.elapsed()),
+                depends_on=["bot_ready", "monitor_connect"]
             )
             
+            logger.info("🔍 Запуск мониторинга каналов и управляющего бота...")
+            tasks = startup.start()
+            
+            # Готовность: бот принимает команды и монитор получает сообщения
+            ready = asyncio.gather(tasks["bot_ready"], tasks["monitor_connect"])
+            done, _ = await asyncio.wait({ready, tasks["bot_polling"]}, return_when=asyncio.FIRST_COMPLETED)
+            if ready not in done:
+                # Polling завершился раньше готовности (например, неверный токен) - пробрасываем ошибку
+                ready.cancel()
+                tasks["bot_polling"].result()
+                await self.stop()
+                return
+            ready.result()
+            
             self.running = True
-            logger.info("✅ Stalker Bot успешно запущен!")
+            time_to_ready = startup.elapsed()
+            self.startup_metrics = {
+                'time_to_ready': time_to_ready,
+                'steps': startup.finished_at
+            }
+            logger.info(f"✅ Stalker Bot успешно запущен! Время до готовности: {time_to_ready:.2f} с")
+            
+            tasks["channels_verify"].add_done_callback(
+                lambda task: self._log_background_step("Проверка каналов", task, startup.finished_at.get("channels_verify"))
+            )
+            tasks["channels_backfill"].add_done_callback(
+                lambda task: self._log_background_step("Догрузка пропущенных сообщений", task, startup.finished_at.get("channels_backfill"))
+            )
+            tasks["startup_notification"].add_done_callback(
+                lambda task: self._log_background_step("Уведомление о запуске", task, startup.finished_at.get("startup_notification"))
+            )
             
-            # Запуск управляющего бота (блокирующий)
-            await self.control_bot.start()
+            # Работа управляющего бота (блокирующая); при stop() задача polling отменяется
+            await asyncio.wait({tasks["bot_polling"]})
+            if not tasks["bot_polling"].cancelled():
+                tasks["bot_polling"].result()
+            # Polling завершился сам (например, по сигналу внутри aiogram) - сворачиваем остальное
+            await self.stop()
             
         except KeyboardInterrupt:
             logger.info("Получен сигнал завершения...")
@@ -82,28 +121,75 @@ class StalkerApp:
             logger.error(f"Критическая ошибка при запуске: {e}", exc_info=True)
             await self.stop()
     
+    async def _send_startup_notification(self, app_info: dict, time_to_ready: float):
+        """Отправка уведомления о запуске"""
+        await self.control_bot.send_notification(
+            "🟢 <b>Stalker Bot запущен!</b>\n\n"
+            f"📺 Мониторится каналов: {app_info['channels_count']}\n"
+            f"🔑 Ключевых слов: {app_info['keywords_count']}\n"
+            f"📨 Найдено сообщений: {app_info['messages_found']}\n"
+            f"⏱ Запуск за: {time_to_ready:.1f} с\n\n"
+            "Бот готов к работе! 🎯"
+        )
+    
+    async def _run_backfill(self):
+        """Догрузка сообщений, пропущенных за время простоя, с отчетом админам"""
+        stats = await self.monitor.backfill()
+        if not stats['scanned']:
+            return
+        await self.control_bot.send_notification(
+            "⏪ <b>Догрузка пропущенных сообщений завершена</b>\n\n"
+            f"📺 Каналов: {stats['channels']}\n"
+            f"📄 Просмотрено сообщений: {stats['scanned']}\n"
+            f"🎯 Найдено: {stats['found']}\n"
+            f"⚠️ Ошибок: {stats['errors']}\n"
+            f"⏱ {stats['elapsed']:.1f} с ({stats['rate']:.1f} сообщ/с)"
+        )
+    
+    def _log_background_step(self, title: str, task: asyncio.Task, finished_at: float = None):
+        """Логирует завершение фонового шага запуска"""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error:
+            logger.error(f"{title}: ошибка - {error}")
+        elif finished_at is not None:
+            logger.info(f"{title}: завершено через {finished_at:.2f} с после старта")
+    
     async def stop(self):
-        """Остановка приложения"""
-        if not self.running:
+        """Остановка приложения
+        
+        Сворачивает все запущенные шаги графа запуска, даже если приложение так и не
+        стало готовым (например, не удалось подключить монитор, а polling бота уже идет).
+        """
+        startup, self.startup = self.startup, None
+        if startup is None:
             return
         
         logger.info("🛑 Остановка Stalker Bot...")
-        self.running = False
+        was_running, self.running = self.running, False
         
         try:
-            # Отправка уведомления об остановке
-            if self.control_bot:
+            # Отправка уведомления об остановке (только если о запуске тоже сообщали)
+            if was_running:
                 await self.control_bot.send_notification(
                     "🔴 <b>Stalker Bot остановлен</b>\n\n"
                     "Мониторинг приостановлен."
                 )
             
-            # Остановка компонентов
-            if self.monitor:
+            # Незавершенные шаги запуска (polling, подключение, проверка, догрузка) отменяются,
+            # ошибки завершившихся шагов забираются, чтобы не терялись в логе asyncio
+            for task in startup.tasks.values():
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*startup.tasks.values(), return_exceptions=True)
+            
+            # Остановка компонентов, шаги которых были запущены
+            if "monitor_connect" in startup.tasks:
                 await self.monitor.stop()
                 logger.info("✅ Монитор каналов остановлен")
             
-            if self.control_bot:
+            if "bot_polling" in startup.tasks:
                 await self.control_bot.stop()
                 logger.info("✅ Управляющий бот остановлен")
             
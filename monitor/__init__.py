@@ -3,5 +3,6 @@ Monitor module
 """
 
 from .channel_monitor import ChannelMonitor
+from .history_search import HistorySearchJob
 
-__all__ = ['ChannelMonitor']
+__all__ = ['ChannelMonitor', 'HistorySearchJob']
@@ -4,170 +4,1077 @@
 
 import asyncio
 import logging
-import re
-from typing import List, Set
-from datetime import datetime, timezone, timedelta
-from telethon import TelegramClient, events
+import random
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timezone
+from telethon import events
 from telethon.tl.types import Channel, Chat
 from telethon.errors import FloodWaitError, ChannelPrivateError
 
-from config import API_ID, API_HASH, PHONE, SESSION_NAME, KEYWORDS, get_monitored_channels
-from database import JsonDatabase
+from config import (
+    app_config, MOSCOW_TZ, get_monitored_channels,
+    CHANNEL_CHECK_CONCURRENCY, CHANNEL_CHECK_MAX_ATTEMPTS, CHANNEL_ACCESS_TTL,
+    BACKFILL_CONCURRENCY, BACKFILL_REQUESTS_PER_SECOND, BACKFILL_MAX_MESSAGES_PER_CHANNEL,
+    WATERMARKS_FLUSH_INTERVAL, EDIT_DEBOUNCE_SECONDS, EDIT_HASH_CACHE_SIZE, EVENT_DEDUP_CACHE_SIZE,
+    MATCHER_EXECUTOR_THRESHOLD, MATCHER_INCREMENTAL_MAX_CHANGES,
+    RAW_ARCHIVE_SAMPLE_RATE, RAW_ARCHIVE_FLUSH_SIZE,
+    DUPLICATE_WINDOW_SECONDS, DUPLICATE_MAX_DISTANCE, DUPLICATE_MIN_TOKENS
+)
+from database import JsonDatabase, FoundMessage
+from utils import normalize_channel_reference, RateLimiter
+from .history_search import HistorySearchJob
+from .sessions import SessionPool
+from .keyword_matcher import normalize_keyword, split_tokens
+from .keyword_rules import CompiledMatchers, KeywordRules
+from .morphology import get_lemmatizer
+from .near_duplicates import NearDuplicateIndex
+from .normalization import normalize_text
+from .rpc_scheduler import RpcScheduler, PRIORITY_LIVE, PRIORITY_BACKGROUND
 
 
 logger = logging.getLogger(__name__)
 
-
 class ChannelMonitor:
     """Класс для мониторинга каналов Telegram"""
     
     def __init__(self):
-        self.client = TelegramClient(SESSION_NAME, API_ID, API_HASH)
+        # Одна или несколько сессий (SESSION_NAMES), каналы распределены между ними
+        self.sessions = SessionPool(app_config.session_names, app_config.api_id, app_config.api_hash)
+        self.sessions.on_session_lost = self._on_session_lost
+        # Все запросы к Telegram идут через общий планировщик (лимиты, приоритеты, FloodWait)
+        self.rpc = RpcScheduler(self.sessions)
         self.db = JsonDatabase()
         self.is_monitoring = False
+        self._background_verify_task: Optional[asyncio.Task] = None
+        self._background_backfill_task: Optional[asyncio.Task] = None
+        # Кэш разрешения ссылок на каналы: нормализованная ссылка -> (ID, название)
+        self._resolution_cache: Dict[object, Tuple[int, str]] = {}
+        # Позиции обработки: ID последнего обработанного сообщения по каналам
+        self._watermarks: Dict[int, int] = self.db.load_watermarks()
+        self._watermarks_dirty = False
+        self._watermarks_flushed_at = time.monotonic()
+        # Каналы, по которым идет догрузка, и отложенные позиции живых сообщений для них
+        self._backfilling: Set[int] = set()
+        self._pending_watermarks: Dict[int, int] = {}
+        # Каналы, пропуск в которых догружен не до конца (лимит или ошибка) - позиция
+        # живых сообщений для них откладывается до полной догрузки
+        self._backfill_gaps: Set[int] = set()
+        # Хэши нормализованных текстов последних сообщений: (канал, ID) -> хэш
+        self._text_hashes: 'OrderedDict[Tuple[int, int], int]' = OrderedDict()
+        # Отложенные правки: (канал, ID) -> последняя версия сообщения
+        self._pending_edits: Dict[Tuple[int, int], Any] = {}
+        self._edit_tasks: Set[asyncio.Task] = set()
+        # Последние новые сообщения каналов без владельца (их присылают все сессии)
+        self._seen_events: 'OrderedDict[Tuple[int, int], None]' = OrderedDict()
+        # Сообщения для архива сырых сообщений, еще не записанные на диск
+        self._raw_buffer: List[Dict[str, Any]] = []
+        # Отпечатки найденных сообщений за DUPLICATE_WINDOW_SECONDS: повторы в других каналах
+        # связываются с первым сообщением и не порождают уведомлений
+        self.duplicates = NearDuplicateIndex(DUPLICATE_WINDOW_SECONDS, DUPLICATE_MAX_DISTANCE, DUPLICATE_MIN_TOKENS)
+        self.duplicates_suppressed = 0
+        # Текущий (или последний) поиск по истории
+        self.history_search = None
+        # Скомпилированные ключевые слова: версия входных данных и сборка в пуле потоков
+        self.matchers: Optional[CompiledMatchers] = None
+        self._matchers_input_version = 0
+        self._matcher_build_task: Optional[asyncio.Task] = None
         self._load_channels_and_keywords()
         self.message_callback = None
     
+    @property
+    def client(self):
+        """Основной клиент для запросов, не привязанных к каналу"""
+        return self.sessions.primary
+    
     def _load_channels_and_keywords(self):
         """Загружает актуальный список каналов и ключевых слов"""
         # Получаем каналы из базы данных
         self.monitored_channels: Set[int] = set(get_monitored_channels().keys())
         
         # Получаем ключевые слова из настроек
-        settings = self.db.load_settings()
-        self.keywords: List[str] = settings.get('keywords', KEYWORDS.copy())
+        self.keywords: List[str] = app_config.keywords
+        self.keyword_rules: List[Dict[str, Any]] = app_config.keyword_rules
+        self.regex_keywords: List[Dict[str, Any]] = app_config.regex_keywords
+        self.keyword_sets: List[Dict[str, Any]] = app_config.keyword_sets
+        self.rebuild_matchers()
         
         logger.info(f"Загружено каналов: {len(self.monitored_channels)}")
-        logger.info(f"Загружено ключевых слов: {len(self.keywords)}")
+        logger.info(f"Загружено ключевых слов: {len(self.keywords)}, правил: {len(self.keyword_rules)}")
     
     async def reload_config(self):
         """Перезагружает конфигурацию каналов и ключевых слов"""
+        app_config.reload()
         self._load_channels_and_keywords()
+        if self.sessions.is_connected():
+            # Известные каналы берутся из кэша проверок, новые проверяются параллельно
+            await self._check_channels_access()
+            await self.refresh_membership()
         logger.info("Конфигурация каналов и ключевых слов обновлена")
     
-    async def start(self):
-        """Запуск клиента"""
-        await self.client.start(phone=PHONE)
+    async def start(self, verify_channels: bool = True):
+        """Запуск клиента
+        
+        Args:
+            verify_channels: Проверить доступность каналов до начала мониторинга.
+                При False проверку нужно запустить отдельно через verify_channels().
+        """
+        await self.sessions.start(app_config.phone)
         logger.info("Telethon клиент запущен")
         
         # Проверяем доступность каналов
-        await self._check_channels_access()
+        if verify_channels:
+            await self._check_channels_access()
+        await self.refresh_membership()
         
         # Регистрируем обработчик новых сообщений
-        self.client.add_event_handler(self._handle_new_message, events.NewMessage)
+        # (каждая сессия обрабатывает события только своих каналов и каналов без владельца)
+        for name in self.sessions.alive:
+            client = self.sessions.clients[name]
+            client.add_event_handler(partial(self._handle_new_message, session_name=name), events.NewMessage)
+            client.add_event_handler(partial(self._handle_edited_message, session_name=name), events.MessageEdited)
+        if len(self.sessions.alive) > 1:
+            logger.info(f"Распределение каналов по сессиям: {self._format_shards()}")
         
         self.is_monitoring = True
         logger.info("Мониторинг каналов запущен")
     
+    async def refresh_membership(self, names: Optional[Iterable[str]] = None):
+        """Обновляет каналы, в которых состоят аккаунты сессий (по спискам диалогов)
+        
+        get_entity публичного канала проходит и без членства, а события приходят только
+        участникам, поэтому владельцем канала может быть лишь сессия из его участников.
+        При ошибке у сессии остается прежний список.
+        """
+        names = list(self.sessions.alive if names is None else names)
+        
+        async def load(name: str):
+            client = self.sessions.clients[name]
+            channel_ids = set()
+            scanned = 0
+            try:
+                await self.rpc.acquire(client, 'iter_dialogs', PRIORITY_BACKGROUND, 'membership')
+                async for dialog in client.iter_dialogs():
+                    scanned += 1
+                    # iter_dialogs запрашивает диалоги пачками по 100
+                    if scanned % 100 == 0:
+                        await self.rpc.acquire(client, 'iter_dialogs', PRIORITY_BACKGROUND, 'membership')
+                    if dialog.is_channel:
+                        channel_ids.add(abs(dialog.entity.id))
+            except FloodWaitError as e:
+                self.rpc.report_flood(client, e.seconds, 'membership')
+                logger.warning(f"Flood control при получении диалогов сессии {name}, список каналов не обновлен")
+                return
+            except Exception as e:
+                logger.error(f"Не удалось получить диалоги сессии {name}: {e}")
+                return
+            self.sessions.set_members(name, channel_ids)
+        
+        await asyncio.gather(*(load(name) for name in names))
+        
+        unowned = [channel_id for channel_id in self.monitored_channels if self.sessions.owner(channel_id) is None]
+        if unowned:
+            logger.warning(
+                f"Каналов, где ни одна сессия не состоит: {len(unowned)} "
+                f"(например, {', '.join(map(str, sorted(unowned)[:5]))}); "
+                f"их события принимаются от любой сессии"
+            )
+    
+    def _claim_event(self, channel_id: int, message_id: int, session_name: Optional[str]) -> bool:
+        """Решает, обрабатывает ли сессия событие канала
+        
+        Событие обрабатывает владелец канала. У канала без владельца событие приходит
+        от каждой сессии-участника, и обрабатывается только первое из них.
+        """
+        if session_name is None:
+            return True
+        owner = self.sessions.owner(channel_id)
+        if owner is not None:
+            return owner == session_name
+        key = (channel_id, message_id)
+        if key in self._seen_events:
+            return False
+        self._seen_events[key] = None
+        if len(self._seen_events) > EVENT_DEDUP_CACHE_SIZE:
+            self._seen_events.popitem(last=False)
+        return True
+    
+    async def verify_channels(self, force: bool = False):
+        """Проверяет доступность каналов (можно выполнять параллельно с работой монитора)"""
+        await self._check_channels_access(force=force)
+    
     async def stop(self):
         """Остановка мониторинга"""
         self.is_monitoring = False
-        await self.client.disconnect()
+        if self._background_verify_task and not self._background_verify_task.done():
+            self._background_verify_task.cancel()
+        if self.history_search:
+            self.history_search.cancel()
+        for task in list(self._edit_tasks):
+            task.cancel()
+        if self._background_backfill_task and not self._background_backfill_task.done():
+            self._background_backfill_task.cancel()
+        self.flush_watermarks()
+        self.flush_raw_archive()
+        await self.sessions.stop()
         logger.info("Мониторинг остановлен")
     
-    async def _check_channels_access(self):
-        """Проверяет доступность каналов"""
+    async def _check_channels_access(self, force: bool = False):
+        """Проверяет доступность каналов
+        
+        Свежие результаты (моложе CHANNEL_ACCESS_TTL) берутся из кэша без запросов к Telegram.
+        Каналы без результата проверяются сразу и параллельно. Устаревшие результаты
+        используются временно и перепроверяются в фоне.
+        
+        Args:
+            force: Проверить все каналы заново, игнорируя кэш
+        """
+        channels_dict = get_monitored_channels()
+        access_cache = self.db.load_channel_access()
+        now = time.time()
+        
         accessible_channels = set()
+        unknown_channels = []
+        stale_channels = []
         
-        for channel_id in self.monitored_channels:
-            try:
-                entity = await self.client.get_entity(int(f"-100{channel_id}"))
-                if isinstance(entity, (Channel, Chat)):
-                    accessible_channels.add(channel_id)
-                    channels_dict = get_monitored_channels()
-                    channel_name = channels_dict.get(channel_id, f"Channel {channel_id}")
-                    logger.info(f"Канал {channel_name} доступен")
-                else:
-                    logger.warning(f"Канал {channel_id} не является каналом или чатом")
-            except ChannelPrivateError:
-                logger.error(f"Канал {channel_id} приватный или недоступен")
-            except Exception as e:
-                logger.error(f"Ошибка при проверке канала {channel_id}: {e}")
+        for channel_id in channels_dict:
+            cached = None if force else access_cache.get(channel_id)
+            if cached is None:
+                unknown_channels.append(channel_id)
+                continue
+            
+            if now - cached.get('checked_at', 0) > CHANNEL_ACCESS_TTL:
+                stale_channels.append(channel_id)
+            if cached.get('accessible'):
+                accessible_channels.add(channel_id)
+        
+        if unknown_channels:
+            results = await self._verify_channels_concurrently(unknown_channels, channels_dict)
+            self._apply_access_results(results, access_cache, accessible_channels)
+            self.db.save_channel_access(access_cache)
         
         self.monitored_channels = accessible_channels
-        logger.info(f"Доступно каналов для мониторинга: {len(accessible_channels)}")
+        logger.info(
+            f"Доступно каналов для мониторинга: {len(accessible_channels)} "
+            f"(проверено: {len(unknown_channels)}, из кэша: {len(channels_dict) - len(unknown_channels)})"
+        )
+        
+        if stale_channels:
+            if self._background_verify_task and not self._background_verify_task.done():
+                self._background_verify_task.cancel()
+            self._background_verify_task = asyncio.ensure_future(
+                self._reverify_stale_channels(stale_channels, channels_dict)
+            )
+    
+    async def _reverify_stale_channels(self, channel_ids: List[int], channels_dict: Dict[int, str]):
+        """Фоновая перепроверка каналов с устаревшим результатом"""
+        logger.info(f"Фоновая перепроверка {len(channel_ids)} каналов")
+        results = await self._verify_channels_concurrently(channel_ids, channels_dict)
+        
+        access_cache = self.db.load_channel_access()
+        accessible_channels = set(self.monitored_channels)
+        self._apply_access_results(results, access_cache, accessible_channels)
+        self.db.save_channel_access(access_cache)
+        
+        # Каналы могли быть удалены из настроек за время проверки
+        self.monitored_channels = accessible_channels & set(get_monitored_channels())
+        logger.info(f"Фоновая перепроверка завершена, доступно каналов: {len(self.monitored_channels)}")
+    
+    @staticmethod
+    def _apply_access_results(results: Dict[int, Tuple[Optional[bool], Optional[str]]],
+                              access_cache: Dict[int, dict], accessible_channels: Set[int]):
+        """Применяет результаты проверки к кэшу и множеству доступных каналов"""
+        now = time.time()
+        for channel_id, (accessible, error) in results.items():
+            if accessible is None:
+                # Временная ошибка: прежний результат (если есть) не трогаем
+                cached = access_cache.get(channel_id)
+                if cached is None or not cached.get('accessible'):
+                    accessible_channels.discard(channel_id)
+                continue
+            
+            access_cache[channel_id] = {'accessible': accessible, 'checked_at': now, 'error': error}
+            if accessible:
+                accessible_channels.add(channel_id)
+            else:
+                accessible_channels.discard(channel_id)
+    
+    async def _verify_channels_concurrently(self, channel_ids: Iterable[int],
+                                            channels_dict: Dict[int, str]) -> Dict[int, Tuple[Optional[bool], Optional[str]]]:
+        """Параллельно проверяет каналы (не более CHANNEL_CHECK_CONCURRENCY запросов одновременно)"""
+        semaphore = asyncio.Semaphore(CHANNEL_CHECK_CONCURRENCY)
+        
+        async def check(channel_id: int):
+            async with semaphore:
+                return channel_id, await self._verify_channel(channel_id, channels_dict)
+        
+        results = await asyncio.gather(*(check(channel_id) for channel_id in channel_ids))
+        return dict(results)
+    
+    async def _verify_channel(self, channel_id: int, channels_dict: Dict[int, str]) -> Tuple[Optional[bool], Optional[str]]:
+        """Проверяет один канал с повтором при FloodWait
+        
+        Returns:
+            (True/False, ошибка) - окончательный результат; (None, ошибка) - временная ошибка
+        """
+        channel_name = channels_dict.get(channel_id, f"Channel {channel_id}")
+        
+        try:
+            entity = await self.rpc.call(
+                'get_entity', lambda client: client.get_entity(int(f"-100{channel_id}")),
+                channel_id=channel_id, subsystem='verify', max_attempts=CHANNEL_CHECK_MAX_ATTEMPTS
+            )
+        except ChannelPrivateError:
+            logger.error(f"Канал {channel_id} приватный или недоступен")
+            return False, "private"
+        except FloodWaitError as e:
+            logger.warning(f"Flood control при проверке канала {channel_id}, попытки исчерпаны")
+            return None, f"flood_wait_{e.seconds}"
+        except Exception as e:
+            logger.error(f"Ошибка при проверке канала {channel_id}: {e}")
+            return None, str(e)
+        
+        if isinstance(entity, (Channel, Chat)):
+            logger.info(f"Канал {channel_name} доступен")
+            return True, None
+        logger.warning(f"Канал {channel_id} не является каналом или чатом")
+        return False, "not_a_channel"
+    
+    async def resolve_channels(self, entries: List[str]) -> List[Tuple[str, Optional[int], Optional[str], Optional[str]]]:
+        """Параллельно разрешает ссылки на каналы
+        
+        Returns:
+            Список (исходная запись, ID канала, название, ошибка) в порядке entries
+        """
+        semaphore = asyncio.Semaphore(CHANNEL_CHECK_CONCURRENCY)
+        
+        async def resolve(entry: str):
+            reference = normalize_channel_reference(entry)
+            if reference is None:
+                return entry, None, None, "неверный формат или инвайт-ссылка"
+            
+            cached = self._resolution_cache.get(reference)
+            if cached is not None:
+                return entry, cached[0], cached[1], None
+            
+            async with semaphore:
+                lookup = int(f"-100{reference}") if isinstance(reference, int) else reference
+                try:
+                    entity = await self.rpc.call(
+                        'get_entity', lambda client: client.get_entity(lookup),
+                        subsystem='import', max_attempts=CHANNEL_CHECK_MAX_ATTEMPTS
+                    )
+                except FloodWaitError as e:
+                    return entry, None, None, f"flood control ({e.seconds} с)"
+                except ChannelPrivateError:
+                    return entry, None, None, "канал приватный или недоступен"
+                except Exception as e:
+                    return entry, None, None, str(e)
+            
+            if not isinstance(entity, (Channel, Chat)):
+                return entry, None, None, "не является каналом или чатом"
+            
+            channel_id = abs(entity.id)
+            title = getattr(entity, 'title', None) or f"Channel {channel_id}"
+            self._resolution_cache[reference] = (channel_id, title)
+            return entry, channel_id, title, None
+        
+        return list(await asyncio.gather(*(resolve(entry) for entry in entries)))
     
-    async def _handle_new_message(self, event):
+    async def import_channels(self, entries: List[str]) -> Dict[str, list]:
+        """Массовый импорт каналов: разрешение, одна запись настроек и одна перезагрузка конфигурации
+        
+        Returns:
+            {'added': [(запись, ID, название)], 'existing': [...], 'failed': [(запись, ошибка)]}
+        """
+        results = await self.resolve_channels(entries)
+        
+        resolved: Dict[int, str] = {}
+        entry_by_id: Dict[int, str] = {}
+        failed = []
+        for entry, channel_id, title, error in results:
+            if error:
+                failed.append((entry, error))
+            elif channel_id not in resolved:
+                resolved[channel_id] = title
+                entry_by_id[channel_id] = entry
+        
+        added_ids, existing_ids = self.db.add_channels(resolved)
+        
+        if added_ids:
+            # Разрешенные каналы заведомо доступны - сохраняем это, чтобы не проверять их повторно
+            access_cache = self.db.load_channel_access()
+            now = time.time()
+            for channel_id in added_ids:
+                access_cache[channel_id] = {'accessible': True, 'checked_at': now, 'error': None}
+            self.db.save_channel_access(access_cache)
+            await self.reload_config()
+        
+        logger.info(f"Импорт каналов: добавлено {len(added_ids)}, уже было {len(existing_ids)}, ошибок {len(failed)}")
+        return {
+            'added': [(entry_by_id[cid], cid, resolved[cid]) for cid in added_ids],
+            'existing': [(entry_by_id[cid], cid, resolved[cid]) for cid in existing_ids],
+            'failed': failed
+        }
+    
+    async def _handle_new_message(self, event, session_name: Optional[str] = None):
         """Обработчик новых сообщений"""
         if not self.is_monitoring:
             return
         
         try:
-            # Получаем ID канала
-            if hasattr(event.chat, 'id'):
-                channel_id = abs(event.chat.id)
-                if str(channel_id).startswith('100'):
-                    channel_id = int(str(channel_id)[3:])
-            else:
-                return
-            
             # Проверяем, что это наш отслеживаемый канал
-            if channel_id not in self.monitored_channels:
-                return
-            
-            message_text = event.message.message
-            if not message_text:
+            channel_id = self._event_channel_id(event)
+            if channel_id is None or channel_id not in self.monitored_channels:
                 return
-            
-            # Проверяем наличие ключевых слов (поиск целых слов)
-            message_lower = message_text.lower()
-            found_keywords = []
-            
-            for kw in self.keywords:
-                kw_lower = kw.lower()
-                # Ищем ключевое слово как отдельное слово
-                # Используем более надежный способ для кириллицы
-                words = re.findall(r'\b\w+\b', message_lower, re.UNICODE)
-                if kw_lower in words:
-                    found_keywords.append(kw)
-            
-            if not found_keywords:
+            # Канал обрабатывает только сессия-владелец (или первая, приславшая событие)
+            if not self._claim_event(channel_id, event.message.id, session_name):
                 return
             
-            # Формируем данные сообщения
-            channels_dict = get_monitored_channels()
-            channel_name = channels_dict.get(channel_id, f"Channel {channel_id}")
-            
-            # Получаем информацию о пользователе
-            sender_info = await self._get_sender_info(event.message)
-            
-            # Конвертируем время в московское (+2 UTC)
-            moscow_time = None
-            if event.message.date:
-                moscow_tz = timezone(timedelta(hours=2))  # MSK = UTC+2
-                moscow_time = event.message.date.replace(tzinfo=timezone.utc).astimezone(moscow_tz)
-            
-            message_data = {
-                'message_id': event.message.id,
-                'channel_id': channel_id,
-                'channel_name': channel_name,
-                'text': message_text,
-                'found_keywords': found_keywords,
-                'date': event.message.date.isoformat() if event.message.date else None,
-                'moscow_time': moscow_time.isoformat() if moscow_time else None,
-                'sender_id': event.message.sender_id,
-                'sender_username': sender_info.get('username'),
-                'sender_first_name': sender_info.get('first_name'),
-                'sender_last_name': sender_info.get('last_name'),
-                'sender_full_name': sender_info.get('full_name'),
-                'is_forwarded': bool(event.message.forward)
-            }
-            
-            # Сохраняем в базу данных
-            if self.db.add_found_message(message_data):
-                logger.info(f"Найдено сообщение с ключевыми словами {found_keywords} в канале {message_data['channel_name']}")
-                
-                # Вызываем callback если он установлен
-                if self.message_callback:
-                    await self.message_callback(message_data)
+            self._archive_raw_message(channel_id, event.message)
+            await self._process_message(channel_id, event.message)
+            self._advance_watermark(channel_id, event.message.id)
         
         except FloodWaitError as e:
-            logger.warning(f"Flood control, ждем {e.seconds} секунд")
-            await asyncio.sleep(e.seconds)
+            # Паузу выдерживает планировщик, обработчик не блокируется
+            self.rpc.report_flood(event.client, e.seconds, 'live')
         except Exception as e:
             logger.error(f"Ошибка при обработке сообщения: {e}")
     
-    async def _get_sender_info(self, message):
+    def _archive_raw_message(self, channel_id: int, message):
+        """Добавляет сообщение в архив сырых сообщений (доля RAW_ARCHIVE_SAMPLE_RATE, запись пачками)"""
+        if not message.message or not app_config.raw_archive_enabled:
+            return
+        if random.random() >= RAW_ARCHIVE_SAMPLE_RATE:
+            return
+        self._raw_buffer.append({
+            'channel_id': channel_id,
+            'message_id': message.id,
+            'date': message.date.isoformat() if message.date else None,
+            'text': message.message,
+        })
+        if len(self._raw_buffer) >= RAW_ARCHIVE_FLUSH_SIZE:
+            self.flush_raw_archive()
+    
+    def flush_raw_archive(self):
+        """Записывает накопленные сообщения в архив сырых сообщений"""
+        records, self._raw_buffer = self._raw_buffer, []
+        try:
+            self.db.append_raw_messages(records)
+        except Exception as e:
+            logger.error(f"Не удалось записать архив сырых сообщений: {e}")
+    
+    @staticmethod
+    def _event_channel_id(event) -> Optional[int]:
+        """ID канала события без префикса -100"""
+        if not hasattr(event.chat, 'id'):
+            return None
+        channel_id = abs(event.chat.id)
+        if str(channel_id).startswith('100'):
+            channel_id = int(str(channel_id)[3:])
+        return channel_id
+    
+    @staticmethod
+    def _text_hash(text: str, normalized: Optional[str] = None) -> int:
+        """Хэш нормализованного текста (регистр, пробелы и невидимые символы не учитываются)
+        
+        normalized - уже полученный normalize_text(text).
+        """
+        return hash(' '.join((normalize_text(text) if normalized is None else normalized).split()))
+    
+    def _remember_text_hash(self, key: Tuple[int, int], text_hash: int):
+        """Запоминает хэш текста сообщения (LRU на EDIT_HASH_CACHE_SIZE сообщений)"""
+        self._text_hashes[key] = text_hash
+        self._text_hashes.move_to_end(key)
+        if len(self._text_hashes) > EDIT_HASH_CACHE_SIZE:
+            self._text_hashes.popitem(last=False)
+    
+    async def _handle_edited_message(self, event, session_name: Optional[str] = None):
+        """Обработчик правок сообщений
+        
+        Правки одного сообщения накапливаются EDIT_DEBOUNCE_SECONDS и обрабатываются
+        один раз по последней версии, поэтому серия правок (боты, счетчики) не вызывает
+        сопоставление на каждую правку.
+        """
+        if not self.is_monitoring:
+            return
+        
+        channel_id = self._event_channel_id(event)
+        if channel_id is None or channel_id not in self.monitored_channels:
+            return
+        owner = self.sessions.owner(channel_id)
+        if session_name is not None and owner is not None and owner != session_name:
+            return
+        
+        # Правки канала без владельца приходят от всех сессий и склеиваются по ключу ниже
+        key = (channel_id, event.message.id)
+        is_first = key not in self._pending_edits
+        self._pending_edits[key] = event.message
+        if is_first:
+            task = asyncio.ensure_future(self._process_edit_later(key))
+            self._edit_tasks.add(task)
+            task.add_done_callback(self._edit_tasks.discard)
+    
+    async def _process_edit_later(self, key: Tuple[int, int]):
+        """Обрабатывает последнюю версию сообщения после паузы"""
+        await asyncio.sleep(EDIT_DEBOUNCE_SECONDS)
+        message = self._pending_edits.pop(key, None)
+        if message is None:
+            return
+        try:
+            await self._process_edit(key[0], message)
+        except FloodWaitError as e:
+            self.rpc.report_flood(getattr(message, 'client', None) or self.client, e.seconds, 'live')
+        except Exception as e:
+            logger.error(f"Ошибка при обработке правки сообщения: {e}")
+    
+    async def _process_edit(self, channel_id: int, message):
+        """Повторное сопоставление измененного сообщения
+        
+        Правка без изменения нормализованного текста пропускается по хэшу.
+        Уже сохраненная запись обновляется на месте: точные и нечеткие совпадения
+        пересчитываются тем же проходом, что и для нового сообщения, и заменяют прежние.
+        Уведомление отправляется, только если после правки появились новые точные
+        или нечеткие совпадения.
+        """
+        message_text = message.message
+        if not message_text:
+            return
+        
+        normalized = normalize_text(message_text)
+        key = (channel_id, message.id)
+        text_hash = self._text_hash(message_text, normalized)
+        if self._text_hashes.get(key) == text_hash:
+            return
+        self._remember_text_hash(key, text_hash)
+        
+        stored = self.db.get_found_message(channel_id, message.id)
+        if stored is None:
+            # Ключевые слова появились только после правки - обычное сохранение с уведомлением
+            await self._process_message(channel_id, message)
+            return
+        
+        if self._text_hash(stored.text) == text_hash:
+            return
+        
+        tokens = split_tokens(normalized)
+        found_keywords = self._match_keywords(message_text, channel_id, tokens=tokens, normalized=normalized)
+        fuzzy_keywords = self.matcher_for(channel_id).match_fuzzy(message_text, found_keywords, tokens)
+        # Новыми считаются слова, о которых еще не уведомляли ни как о точных, ни как о нечетких
+        notified = set(stored.found_keywords) | set(stored.fuzzy_keywords)
+        gained = [kw for kw in found_keywords if kw not in notified]
+        gained_fuzzy = [kw for kw in fuzzy_keywords if kw not in notified]
+        
+        stored.text = message_text
+        stored.found_keywords = tuple(found_keywords)
+        stored.fuzzy_keywords = tuple(fuzzy_keywords)
+        stored.extra = dict(stored.extra or {})
+        stored.extra['edit_date'] = message.edit_date.isoformat() if getattr(message, 'edit_date', None) else None
+        if not self.db.update_found_message(stored):
+            return
+        
+        if gained or gained_fuzzy:
+            logger.info(
+                f"После правки найдены новые ключевые слова {gained}"
+                f"{f' (с опечатками: {gained_fuzzy})' if gained_fuzzy else ''} в канале {stored.channel_name}"
+            )
+            if self.message_callback:
+                await self.message_callback(stored)
+    
+    def build_matcher(self, keywords: List[str], rules: Iterable[Dict[str, Any]] = (),
+                      regex_keywords: Iterable[Dict[str, Any]] = (), fuzzy: Optional[bool] = None,
+                      morphology: Optional[bool] = None) -> KeywordRules:
+        """Компилирует ключевые слова, правила и шаблоны; при включенной морфологии слова сравниваются по леммам
+        
+        fuzzy и morphology по умолчанию берутся из настроек (app_config); в пуле потоков
+        их нужно передавать явно, прочитав настройки в цикле событий.
+        """
+        if fuzzy is None:
+            fuzzy = app_config.fuzzy_enabled
+        if morphology is None:
+            morphology = app_config.morphology_enabled
+        lemmatizer = None
+        if morphology:
+            lemmatizer = get_lemmatizer()
+            if lemmatizer is None:
+                logger.warning("Морфология включена, но таблица лемм не собрана - слова сравниваются как есть")
+        return KeywordRules(
+            keywords, rules,
+            normalize_token=lemmatizer.lemma if lemmatizer else None,
+            fuzzy=fuzzy,
+            regex_patterns=[entry['pattern'] for entry in regex_keywords]
+        )
+    
+    def _compile_matchers(self, version: int, keywords: List[str], rules: List[Dict[str, Any]],
+                          regex_keywords: List[Dict[str, Any]], keyword_sets: List[Dict[str, Any]],
+                          fuzzy: bool, morphology: bool, in_executor: bool = False) -> CompiledMatchers:
+        """Компилирует общий набор ключевых слов и наборы отдельных каналов
+        
+        Не обращается к изменяемому состоянию монитора и к настройкам (все передается
+        аргументами), поэтому может выполняться в пуле потоков. Каналы с одинаковым
+        итоговым набором слов получают один и тот же объект KeywordRules.
+        """
+        started = time.perf_counter()
+        build = partial(self.build_matcher, rules=rules, regex_keywords=regex_keywords,
+                        fuzzy=fuzzy, morphology=morphology)
+        default = build(keywords)
+        
+        # Канал может входить в несколько наборов - тогда его слова объединяются
+        keywords_by_channel: Dict[int, List[str]] = {}
+        for keyword_set in keyword_sets:
+            for channel_id in keyword_set.get('channels', []):
+                channel_keywords = keywords_by_channel.setdefault(int(channel_id), [])
+                channel_keywords.extend(kw for kw in keyword_set.get('keywords', []) if kw not in channel_keywords)
+        
+        compiled: Dict[Tuple[str, ...], KeywordRules] = {}
+        by_channel: Dict[int, KeywordRules] = {}
+        for channel_id, channel_keywords in keywords_by_channel.items():
+            key = tuple(sorted({normalize_keyword(kw) for kw in channel_keywords}))
+            if key not in compiled:
+                compiled[key] = build(channel_keywords)
+            by_channel[channel_id] = compiled[key]
+        
+        return CompiledMatchers(version, default, by_channel, time.perf_counter() - started, in_executor)
+    
+    def rebuild_matchers(self):
+        """Полностью пересобирает ключевые слова из текущих настроек монитора
+        
+        Небольшие наборы собираются сразу. Большие (больше MATCHER_EXECUTOR_THRESHOLD элементов)
+        при запущенном цикле событий собираются в пуле потоков, а до подмены сообщения
+        проверяются предыдущей версией. Результат устаревшей сборки (настройки успели
+        измениться еще раз) отбрасывается.
+        """
+        self._matchers_input_version += 1
+        arguments = (
+            self._matchers_input_version, list(self.keywords), list(self.keyword_rules),
+            list(self.regex_keywords), list(self.keyword_sets),
+            app_config.fuzzy_enabled, app_config.morphology_enabled
+        )
+        size = (len(self.keywords) + len(self.keyword_rules) + len(self.regex_keywords)
+                + sum(len(keyword_set.get('keywords', [])) for keyword_set in self.keyword_sets))
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or self.matchers is None or size < MATCHER_EXECUTOR_THRESHOLD:
+            self._install_matchers(self._compile_matchers(*arguments))
+            return
+        
+        self._matcher_build_task = loop.create_task(self._compile_matchers_in_executor(arguments))
+    
+    async def _compile_matchers_in_executor(self, arguments: Tuple):
+        loop = asyncio.get_running_loop()
+        try:
+            compiled = await loop.run_in_executor(None, partial(self._compile_matchers, *arguments, in_executor=True))
+        except Exception as e:
+            logger.error(f"Ошибка сборки ключевых слов: {e}")
+            return
+        if compiled.version != self._matchers_input_version:
+            logger.info(f"Сборка ключевых слов версии {compiled.version} устарела и отброшена")
+            return
+        self._install_matchers(compiled)
+    
+    def _install_matchers(self, compiled: CompiledMatchers):
+        # Одно присваивание: обработчики видят либо старую, либо новую версию целиком
+        self.matchers = compiled
+        stats = compiled.get_stats()
+        logger.info(
+            f"Ключевые слова собраны: версия {compiled.version}, {compiled.compile_seconds * 1000:.1f} мс, "
+            f"термов {stats['terms']}, узлов дерева {stats['trie_nodes']}, наборов {stats['distinct_matchers']}"
+        )
+    
+    def _apply_keyword_changes(self, added: List[str], removed: List[str]) -> bool:
+        """Собирает следующую версию с изменениями общего набора без полной пересборки
+        
+        Изменения вносятся в копию общего набора (см. KeywordRules.with_keyword_changes),
+        новая версия подменяет текущую одним присваиванием; тот, кто держит ссылку на
+        прежнюю версию (пробный прогон, поиск по истории), продолжает работать с ней.
+        
+        Returns:
+            False, если нужна полная сборка
+        """
+        building = self._matcher_build_task is not None and not self._matcher_build_task.done()
+        if building or self.matchers is None or len(added) + len(removed) > MATCHER_INCREMENTAL_MAX_CHANGES:
+            return False
+        
+        self._matchers_input_version += 1
+        self._install_matchers(self.matchers.with_keyword_changes(self._matchers_input_version, added, removed))
+        return True
+    
+    @property
+    def matcher(self) -> KeywordRules:
+        """Общий набор ключевых слов текущей версии"""
+        return self.matchers.default
+    
+    @property
+    def channel_matchers(self) -> Dict[int, KeywordRules]:
+        """Наборы ключевых слов каналов текущей версии"""
+        return self.matchers.by_channel
+    
+    def matcher_for(self, channel_id: Optional[int]) -> KeywordRules:
+        """Набор ключевых слов канала (общий, если для канала нет своего)"""
+        return self.matchers.for_channel(channel_id)
+    
+    def _match_keywords(self, message_text: str, channel_id: Optional[int] = None,
+                        matcher: Optional[KeywordRules] = None, tokens: Optional[List[str]] = None,
+                        normalized: Optional[str] = None) -> List[str]:
+        """Возвращает ключевые слова, фразы и правила (по умолчанию - набор канала), сработавшие на текст"""
+        return (self.matcher_for(channel_id) if matcher is None else matcher).match(
+            message_text, channel_id, tokens, normalized
+        )
+    
+    async def _process_message(self, channel_id: int, message, matcher: Optional[KeywordRules] = None,
+                               notify: bool = True, remember_hash: bool = True,
+                               priority: int = PRIORITY_LIVE, subsystem: str = 'live') -> bool:
+        """Проверяет сообщение на ключевые слова и сохраняет найденное
+        
+        Общий путь для живых, догруженных и найденных поиском по истории сообщений:
+        дубликаты отсекаются хранилищем. Если notify, почти одинаковый текст, уже
+        найденный за DUPLICATE_WINDOW_SECONDS, сохраняется со ссылкой на первое
+        сообщение (extra['duplicate_of']) без уведомления.
+        
+        Args:
+            matcher: Набор ключевых слов вместо набора канала
+            notify: Вызывать message_callback для нового сообщения
+            remember_hash: Запомнить хэш текста для пропуска правок без изменений
+                (поиск по истории не должен вытеснять хэши живых сообщений)
+            priority, subsystem: Приоритет и подсистема запроса отправителя в планировщике
+        
+        Returns:
+            True, если сообщение новое и содержит ключевые слова
+        """
+        message_text = message.message
+        if not message_text:
+            return False
+        
+        # Текст нормализуется и разбивается на токены один раз для всех проверок ниже
+        normalized = normalize_text(message_text)
+        tokens = split_tokens(normalized)
+        
+        if remember_hash:
+            self._remember_text_hash((channel_id, message.id), self._text_hash(message_text, normalized))
+        found_keywords = self._match_keywords(message_text, channel_id, matcher, tokens, normalized)
+        fuzzy_keywords = (self.matcher_for(channel_id) if matcher is None else matcher).match_fuzzy(
+            message_text, found_keywords, tokens
+        )
+        if not found_keywords and not fuzzy_keywords:
+            return False
+        
+        # Повтор уже найденного сообщения (одно объявление в нескольких чатах)
+        fingerprint = original_key = None
+        timestamp = self._message_timestamp(message)
+        if notify and app_config.duplicate_suppression_enabled:
+            fingerprint = self.duplicates.fingerprint(message_text, tokens)
+            if fingerprint is not None:
+                original_key = self.duplicates.find(fingerprint, timestamp)
+        
+        # Формируем данные сообщения
+        channels_dict = get_monitored_channels()
+        channel_name = channels_dict.get(channel_id, f"Channel {channel_id}")
+        
+        # Получаем информацию о пользователе
+        sender_info = await self._get_sender_info(message, priority, subsystem)
+        
+        # Конвертируем время в московское
+        moscow_time = None
+        if message.date:
+            moscow_time = message.date.replace(tzinfo=timezone.utc).astimezone(MOSCOW_TZ)
+        
+        found_message = FoundMessage(
+            message_id=message.id,
+            channel_id=channel_id,
+            channel_name=channel_name,
+            text=message_text,
+            found_keywords=found_keywords,
+            fuzzy_keywords=fuzzy_keywords,
+            date=message.date.isoformat() if message.date else None,
+            moscow_time=moscow_time.isoformat() if moscow_time else None,
+            sender_id=message.sender_id,
+            sender_username=sender_info.get('username'),
+            sender_first_name=sender_info.get('first_name'),
+            sender_last_name=sender_info.get('last_name'),
+            sender_full_name=sender_info.get('full_name'),
+            is_forwarded=bool(message.forward)
+        )
+        if original_key is not None:
+            found_message.extra = {'duplicate_of': {'channel_id': original_key[0], 'message_id': original_key[1]}}
+        
+        # Сохраняем в базу данных
+        if not self.db.add_found_message(found_message):
+            return False
+        
+        if original_key is not None:
+            self._link_duplicate(original_key, found_message)
+            self.duplicates_suppressed += 1
+            logger.info(
+                f"Сообщение в канале {found_message.channel_name} повторяет найденное ранее "
+                f"{original_key}, уведомление не отправлено"
+            )
+            return True
+        if fingerprint is not None:
+            self.duplicates.add(fingerprint, found_message.key, timestamp)
+        
+        logger.info(
+            f"Найдено сообщение с ключевыми словами {found_keywords}"
+            f"{f' (с опечатками: {fuzzy_keywords})' if fuzzy_keywords else ''} в канале {found_message.channel_name}"
+        )
+        
+        # Вызываем callback если он установлен
+        if notify and self.message_callback:
+            await self.message_callback(found_message)
+        return True
+    
+    @staticmethod
+    def _message_timestamp(message) -> float:
+        """Время отправки сообщения (UTC, секунды); без даты - текущее время"""
+        if message.date:
+            return message.date.replace(tzinfo=timezone.utc).timestamp()
+        return time.time()
+    
+    def _link_duplicate(self, original_key: Tuple[int, int], duplicate: FoundMessage):
+        """Добавляет повтор в список extra['duplicates'] первого сообщения"""
+        original = self.db.get_found_message(*original_key)
+        if original is None:
+            return  # Первое сообщение уже вытеснено из хранилища
+        original.extra = dict(original.extra or {})
+        original.extra['duplicates'] = list(original.extra.get('duplicates', [])) + [{
+            'channel_id': duplicate.channel_id,
+            'channel_name': duplicate.channel_name,
+            'message_id': duplicate.message_id,
+        }]
+        self.db.update_found_message(original)
+    
+    def _advance_watermark(self, channel_id: int, message_id: int):
+        """Сдвигает позицию обработки канала (сохраняется на диск не чаще WATERMARKS_FLUSH_INTERVAL)"""
+        if channel_id in self._backfilling or channel_id in self._backfill_gaps:
+            # Пока пропуск не догружен, позицию двигает только догрузка - иначе дыра потеряется
+            if message_id > self._pending_watermarks.get(channel_id, 0):
+                self._pending_watermarks[channel_id] = message_id
+            return
+        
+        if message_id <= self._watermarks.get(channel_id, 0):
+            return
+        self._watermarks[channel_id] = message_id
+        self._watermarks_dirty = True
+        
+        if time.monotonic() - self._watermarks_flushed_at >= WATERMARKS_FLUSH_INTERVAL:
+            self.flush_watermarks()
+    
+    def flush_watermarks(self):
+        """Сохраняет позиции обработки каналов, если они изменились"""
+        self._watermarks_flushed_at = time.monotonic()
+        if not self._watermarks_dirty:
+            return
+        try:
+            self.db.save_watermarks(self._watermarks)
+            self._watermarks_dirty = False
+        except Exception as e:
+            logger.error(f"Не удалось сохранить позиции обработки каналов: {e}")
+    
+    async def backfill(self, progress_callback: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                       channel_ids: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+        """Догружает сообщения, пропущенные за время простоя
+        
+        Для каждого доступного канала читается история после сохраненной позиции
+        (iter_messages(min_id=...)), каналы обрабатываются параллельно (BACKFILL_CONCURRENCY),
+        запросы истории ограничены BACKFILL_REQUESTS_PER_SECOND на все каналы.
+        Каналам без сохраненной позиции назначается текущее последнее сообщение.
+        За один проход канал догружается не больше чем на BACKFILL_MAX_MESSAGES_PER_CHANNEL
+        сообщений; каналы, упершиеся в лимит, догружаются следующими проходами.
+        
+        Args:
+            progress_callback: Вызывается после каждого канала со статистикой на текущий момент
+            channel_ids: Каналы для догрузки (по умолчанию все доступные)
+        
+        Returns:
+            Статистика: каналы, просмотрено и найдено сообщений, ошибки, время и скорость
+        """
+        channel_ids = sorted(self.monitored_channels if channel_ids is None else channel_ids)
+        # Собственный лимит догрузки поверх общих лимитов планировщика
+        limiter = RateLimiter(BACKFILL_REQUESTS_PER_SECOND)
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        started = time.monotonic()
+        stats = {
+            'channels': len(channel_ids),
+            'done': 0,
+            'initialized': 0,
+            'scanned': 0,
+            'found': 0,
+            'errors': 0,
+            'passes': 0,
+            'elapsed': 0.0,
+            'rate': 0.0
+        }
+        
+        capped: List[int] = []
+        
+        async def run(channel_id: int):
+            async with semaphore:
+                scanned, found, initialized, ok, limited = await self._backfill_channel(channel_id, limiter)
+            if limited:
+                capped.append(channel_id)
+            else:
+                stats['done'] += 1
+            stats['scanned'] += scanned
+            stats['found'] += found
+            stats['initialized'] += initialized
+            stats['errors'] += 0 if ok else 1
+            stats['elapsed'] = time.monotonic() - started
+            stats['rate'] = stats['scanned'] / stats['elapsed'] if stats['elapsed'] else 0.0
+            if progress_callback:
+                try:
+                    result = progress_callback(dict(stats))
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    logger.warning(f"Ошибка в обработчике прогресса догрузки: {e}")
+        
+        logger.info(f"Догрузка пропущенных сообщений: {len(channel_ids)} каналов")
+        try:
+            remaining = channel_ids
+            while remaining:
+                stats['passes'] += 1
+                await asyncio.gather(*(run(channel_id) for channel_id in remaining))
+                # Следующий проход продолжает с последнего догруженного сообщения только
+                # для каналов, упершихся в лимит (каналы с ошибками ждут следующей догрузки)
+                remaining = sorted(capped)
+                capped.clear()
+                self.flush_watermarks()
+        finally:
+            self.flush_watermarks()
+        
+        stats['elapsed'] = time.monotonic() - started
+        stats['rate'] = stats['scanned'] / stats['elapsed'] if stats['elapsed'] else 0.0
+        logger.info(
+            f"Догрузка завершена: просмотрено {stats['scanned']} сообщений, найдено {stats['found']}, "
+            f"новых каналов {stats['initialized']}, ошибок {stats['errors']}, "
+            f"{stats['elapsed']:.1f} с ({stats['rate']:.1f} сообщ/с, запросов {limiter.acquired})"
+        )
+        return stats
+    
+    async def _backfill_channel(self, channel_id: int, limiter: RateLimiter) -> Tuple[int, int, int, bool, bool]:
+        """Догружает один канал от сохраненной позиции
+        
+        Позиция сдвигается только по догруженным сообщениям. Отложенная позиция живых
+        сообщений применяется, лишь когда пропуск догружен полностью: при ошибке или
+        достижении лимита канал остается в _backfill_gaps до следующего прохода.
+        
+        Returns:
+            (просмотрено, найдено, 1 если позиция назначена впервые, без ошибок, уперся в лимит)
+        """
+        entity = int(f"-100{channel_id}")
+        client = self.sessions.client_for(channel_id)
+        watermark = self._watermarks.get(channel_id)
+        scanned = found = 0
+        complete = False
+        self._backfilling.add(channel_id)
+        
+        try:
+            if watermark is None:
+                # Первый запуск для канала: историю не читаем, запоминаем текущую позицию
+                await limiter.acquire()
+                latest = await self.rpc.call(
+                    'get_messages', lambda target: target.get_messages(entity, limit=1),
+                    client=client, priority=PRIORITY_BACKGROUND, subsystem='backfill'
+                )
+                self._set_watermark(channel_id, latest[0].id if latest else 0)
+                complete = True
+                return 0, 0, 1, True, False
+            
+            await limiter.acquire()
+            await self.rpc.acquire(client, 'iter_messages', PRIORITY_BACKGROUND, 'backfill')
+            async for message in client.iter_messages(
+                entity, min_id=watermark, reverse=True, limit=BACKFILL_MAX_MESSAGES_PER_CHANNEL
+            ):
+                scanned += 1
+                # iter_messages запрашивает историю пачками по 100 сообщений
+                if scanned % 100 == 0:
+                    await limiter.acquire()
+                    await self.rpc.acquire(client, 'iter_messages', PRIORITY_BACKGROUND, 'backfill')
+                if await self._process_message(
+                    channel_id, message, priority=PRIORITY_BACKGROUND, subsystem='backfill'
+                ):
+                    found += 1
+                self._set_watermark(channel_id, message.id)
+            
+            if scanned >= BACKFILL_MAX_MESSAGES_PER_CHANNEL:
+                logger.info(
+                    f"Канал {channel_id}: догружено {scanned} сообщений (лимит прохода), "
+                    f"продолжим с сообщения {self._watermarks.get(channel_id)}"
+                )
+                return scanned, found, 0, True, True
+            if scanned:
+                logger.info(f"Канал {channel_id}: догружено {scanned} сообщений, найдено {found}")
+            complete = True
+            return scanned, found, 0, True, False
+        except FloodWaitError as e:
+            self.rpc.report_flood(client, e.seconds, 'backfill')
+            logger.warning(f"Flood control при догрузке канала {channel_id} ({e.seconds} с), продолжим при следующем запуске")
+            return scanned, found, 0, False, False
+        except Exception as e:
+            logger.error(f"Ошибка при догрузке канала {channel_id}: {e}")
+            return scanned, found, 0, False, False
+        finally:
+            self._backfilling.discard(channel_id)
+            if complete:
+                self._backfill_gaps.discard(channel_id)
+                pending = self._pending_watermarks.pop(channel_id, None)
+                if pending is not None:
+                    self._advance_watermark(channel_id, pending)
+            else:
+                # Пропуск не догружен: живые позиции копятся в _pending_watermarks
+                self._backfill_gaps.add(channel_id)
+    
+    def _format_shards(self) -> str:
+        """Количество каналов по сессиям для логов"""
+        shards = self.sessions.partition(self.monitored_channels)
+        unowned = len(self.monitored_channels) - sum(len(channel_ids) for channel_ids in shards.values())
+        parts = [f"{name}: {len(channel_ids)}" for name, channel_ids in shards.items()]
+        if unowned:
+            parts.append(f"без владельца: {unowned}")
+        return ", ".join(parts)
+    
+    async def _on_session_lost(self, name: str, previous_alive: List[str]):
+        """Перераспределяет каналы потерянной сессии и догружает пропущенное по ним"""
+        moved = [
+            channel_id for channel_id in self.monitored_channels
+            if self.sessions.owner(channel_id, among=previous_alive) == name
+        ]
+        if not self.sessions.alive:
+            logger.critical("Все сессии отключены, мониторинг остановлен")
+            self.is_monitoring = False
+            return
+        
+        # Владельцы выбираются заново только среди сессий, подтвердивших членство
+        await self.refresh_membership()
+        logger.warning(f"Каналы сессии {name} ({len(moved)}) перераспределены: {self._format_shards()}")
+        if moved:
+            # Новые владельцы догружают пропущенное с сохраненных позиций
+            self._background_backfill_task = asyncio.ensure_future(self.backfill(channel_ids=moved))
+    
+    def start_history_search(self, keywords: List[str], days: int,
+                             progress_callback: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        """Запускает поиск по истории отслеживаемых каналов в фоне
+        
+        Returns:
+            HistorySearchJob или None, если предыдущий поиск еще выполняется
+        """
+        if self.history_search and self.history_search.running:
+            return None
+        self.history_search = HistorySearchJob(self, keywords, days, progress_callback=progress_callback)
+        self.history_search.start()
+        return self.history_search
+    
+    def _set_watermark(self, channel_id: int, message_id: int):
+        """Сдвигает позицию канала вперед без отложенной записи на диск"""
+        if message_id > self._watermarks.get(channel_id, -1):
+            self._watermarks[channel_id] = message_id
+            self._watermarks_dirty = True
+    
+    async def _get_sender_info(self, message, priority: int = PRIORITY_LIVE, subsystem: str = 'live'):
         """Получает информацию об отправителе сообщения"""
         sender_info = {
             'username': None,
@@ -178,7 +1085,13 @@ class ChannelMonitor:
         
         try:
             if message.sender_id:
-                sender = await self.client.get_entity(message.sender_id)
+                # Запрос идет через сессию, получившую сообщение, без повторов при FloodWait:
+                # лучше показать ID отправителя, чем задерживать уведомление
+                sender = await self.rpc.call(
+                    'get_entity', lambda client: client.get_entity(message.sender_id),
+                    client=getattr(message, 'client', None) or self.client,
+                    priority=priority, subsystem=subsystem, max_attempts=1
+                )
                 
                 # Получаем username (если есть)
                 if hasattr(sender, 'username') and sender.username:
@@ -216,10 +1129,36 @@ class ChannelMonitor:
         self.message_callback = callback
     
     def update_keywords(self, keywords: List[str]):
-        """Обновляет список ключевых слов"""
-        self.keywords = keywords
+        """Обновляет список ключевых слов
+        
+        Несколько добавленных или удаленных слов применяются к текущему набору без пересборки.
+        """
+        previous = self.keywords
+        self.keywords = list(keywords)
+        added = [kw for kw in self.keywords if kw not in previous]
+        removed = [kw for kw in previous if kw not in self.keywords]
+        if not self._apply_keyword_changes(added, removed):
+            self.rebuild_matchers()
         logger.info(f"Обновлены ключевые слова: {keywords}")
     
+    def update_rules(self, rules: List[Dict[str, Any]]):
+        """Обновляет логические правила"""
+        self.keyword_rules = list(rules)
+        self.rebuild_matchers()
+        logger.info(f"Обновлены правила: {len(rules)}")
+    
+    def update_regex_keywords(self, regex_keywords: List[Dict[str, Any]]):
+        """Обновляет ключевые слова - регулярные выражения"""
+        self.regex_keywords = list(regex_keywords)
+        self.rebuild_matchers()
+        logger.info(f"Обновлены шаблоны: {len(regex_keywords)}")
+    
+    def update_keyword_sets(self, keyword_sets: List[Dict[str, Any]]):
+        """Обновляет наборы ключевых слов отдельных каналов"""
+        self.keyword_sets = list(keyword_sets)
+        self.rebuild_matchers()
+        logger.info(f"Обновлены наборы ключевых слов: {len(keyword_sets)}")
+    
     def get_monitored_channels_count(self) -> int:
         """Возвращает количество отслеживаемых каналов"""
         return len(self.monitored_channels)
@@ -231,7 +1170,9 @@ class ChannelMonitor:
     async def get_channel_info(self, channel_id: int):
         """Получает информацию о канале"""
         try:
-            entity = await self.client.get_entity(int(f"-100{channel_id}"))
+            entity = await self.rpc.call(
+                'get_entity', lambda client: client.get_entity(int(f"-100{channel_id}")), channel_id=channel_id
+            )
             return {
                 'id': channel_id,
                 'title': getattr(entity, 'title', 'Unknown'),
@@ -245,10 +1186,14 @@ class ChannelMonitor:
     async def get_recent_messages_from_channel(self, channel_id: int, limit: int = 10):
         """Получает последние сообщения из канала"""
         try:
-            entity = await self.client.get_entity(int(f"-100{channel_id}"))
+            client = self.sessions.client_for(channel_id)
+            entity = await self.rpc.call(
+                'get_entity', lambda target: target.get_entity(int(f"-100{channel_id}")), client=client
+            )
             messages = []
             
-            async for message in self.client.iter_messages(entity, limit=limit):
+            await self.rpc.acquire(client, 'iter_messages')
+            async for message in client.iter_messages(entity, limit=limit):
                 if message.message:
                     messages.append({
                         'id': message.id,
@@ -0,0 +1,199 @@
+"""
+Поиск ключевых слов с опечатками по индексу удалений (в духе SymSpell)
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .keyword_matcher import tokenize
+
+
+# Транслитерация кириллицы: "вордпресс" и "wordpress" сравниваются в одном алфавите
+_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh',
+    'з': 'z', 'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
+    'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'c',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'sch', 'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu',
+    'я': 'ya',
+})
+
+
+def fuzzy_key(text: str) -> str:
+    """Ключ сравнения: токены без пробелов в латинице"""
+    return ''.join(tokenize(text)).translate(_TRANSLIT)
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """Все варианты слова с удалением до max_distance символов (включая само слово)"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        result |= frontier
+    return result
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Расстояние Дамерау-Левенштейна (с перестановкой соседних символов); больше limit - limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous: Optional[List[int]] = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """Индекс удалений по ключевым словам
+
+    При компиляции для каждого ключевого слова сохраняются все его варианты
+    с удалением до N символов, где N зависит от длины слова (max_distance_for).
+    При поиске те же варианты строятся для токена сообщения, кандидаты
+    проверяются точным расстоянием. Проверяются отдельные токены и пары соседних
+    токенов ("ворд пресс"), сравнение идет после транслитерации, поэтому
+    "wordpres", "вордпресс" и "ворд пресс" находят "wordpress".
+    Результаты поиска по токенам кэшируются.
+
+    Токены и пары длиннее max_token_length, а также длиннее самого длинного
+    ключевого слова больше чем на max_distance символов (такие заведомо не совпадут)
+    не проверяются.
+
+    Списки индексов хранятся кортежами, поэтому copy() делит их с оригиналом,
+    а add()/remove() копии заменяют кортежи, не изменяя оригинал.
+    """
+
+    def __init__(self, keywords: Iterable[str], min_length: int = 5, max_distance: int = 2,
+                 max_token_length: int = 32, cache_size: int = 20000):
+        self.min_length = min_length
+        self.max_distance = max_distance
+        self.max_token_length = max_token_length
+        # Длина самого длинного ключа (после удаления слов не уменьшается)
+        self._longest = 0
+        self.keywords: List[Optional[str]] = []
+        self._keys: List[str] = []
+        self._distances: List[int] = []
+        self._index: Dict[str, Tuple[int, ...]] = {}
+        self._cache_size = cache_size
+
+        for keyword in keywords:
+            self._add(keyword)
+
+        self._lookup = lru_cache(maxsize=cache_size)(self._lookup_uncached)
+
+    def copy(self) -> 'FuzzyIndex':
+        """Копия для изменения (со своим кэшем поиска)"""
+        clone = FuzzyIndex.__new__(FuzzyIndex)
+        clone.min_length = self.min_length
+        clone.max_distance = self.max_distance
+        clone.max_token_length = self.max_token_length
+        clone._longest = self._longest
+        clone.keywords = list(self.keywords)
+        clone._keys = list(self._keys)
+        clone._distances = list(self._distances)
+        clone._index = dict(self._index)
+        clone._cache_size = self._cache_size
+        clone._lookup = lru_cache(maxsize=self._cache_size)(clone._lookup_uncached)
+        return clone
+
+    def _add(self, keyword: str) -> bool:
+        key = fuzzy_key(keyword)
+        # Длина считается до транслитерации ("ищу" -> "ischu" остается коротким словом)
+        distance = self.max_distance_for(''.join(tokenize(keyword)))
+        if distance == 0:
+            return False
+        index = len(self.keywords)
+        self.keywords.append(keyword)
+        self._keys.append(key)
+        self._distances.append(distance)
+        self._longest = max(self._longest, len(key))
+        for variant in _deletes(key, distance):
+            self._index[variant] = self._index.get(variant, ()) + (index,)
+        return True
+
+    def add(self, keyword: str):
+        """Добавляет ключевое слово без пересборки индекса"""
+        if self._add(keyword):
+            self._lookup.cache_clear()
+
+    def remove(self, keyword: str):
+        """Удаляет ключевое слово из индекса (его позиция в self.keywords остается пустой)"""
+        for index, existing in enumerate(self.keywords):
+            if existing != keyword:
+                continue
+            for variant in _deletes(self._keys[index], self._distances[index]):
+                indices = self._index.get(variant, ())
+                if index in indices:
+                    indices = tuple(existing for existing in indices if existing != index)
+                    if indices:
+                        self._index[variant] = indices
+                    else:
+                        del self._index[variant]
+            self.keywords[index] = None
+            self._lookup.cache_clear()
+            return
+
+    @property
+    def variant_count(self) -> int:
+        """Размер индекса: количество вариантов с удалениями"""
+        return len(self._index)
+
+    def max_distance_for(self, word: str) -> int:
+        """Допустимое число опечаток для слова: короткие слова - только точное совпадение"""
+        if len(word) < self.min_length:
+            return 0
+        if len(word) < 9:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def __len__(self) -> int:
+        return sum(1 for keyword in self.keywords if keyword is not None)
+
+    def _candidate_limit(self) -> int:
+        """Максимальная длина проверяемого токена или пары"""
+        return min(self.max_token_length, self._longest + self.max_distance)
+
+    def _lookup_uncached(self, candidate: str) -> Tuple[int, ...]:
+        if not self.min_length - self.max_distance <= len(candidate) <= self._candidate_limit():
+            return ()
+        matched = set()
+        checked = set()
+        for variant in _deletes(candidate, self.max_distance):
+            for index in self._index.get(variant, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                limit = self._distances[index]
+                if edit_distance(candidate, self._keys[index], limit) <= limit:
+                    matched.add(index)
+        return tuple(sorted(matched))
+
+    def match(self, text: str, exclude: Iterable[str] = (), tokens: Optional[List[str]] = None) -> List[str]:
+        """Ключевые слова, найденные с опечатками (кроме exclude - уже найденных точно)
+
+        tokens - уже полученный tokenize(text).
+        """
+        if not self.keywords or not text:
+            return []
+
+        keys = [token.translate(_TRANSLIT) for token in (tokenize(text) if tokens is None else tokens)]
+        limit = self._candidate_limit()
+        found: Set[int] = set()
+        for position, key in enumerate(keys):
+            if len(key) > limit:
+                continue
+            found.update(self._lookup(key))
+            if position + 1 < len(keys) and len(key) + len(keys[position + 1]) <= limit:
+                found.update(self._lookup(key + keys[position + 1]))
+
+        excluded = set(exclude)
+        return [self.keywords[index] for index in sorted(found) if self.keywords[index] not in excluded]
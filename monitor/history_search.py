@@ -0,0 +1,182 @@
+"""
+Поиск ключевых слов по истории отслеживаемых каналов
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from telethon.errors import FloodWaitError
+
+from config import (
+    HISTORY_SEARCH_CONCURRENCY, HISTORY_SEARCH_REQUESTS_PER_SECOND, HISTORY_SEARCH_REQUEST_BUDGET,
+    HISTORY_SEARCH_SERVER_KEYWORDS, HISTORY_SEARCH_PROGRESS_INTERVAL
+)
+from utils import RateLimiter
+from .rpc_scheduler import PRIORITY_BACKGROUND
+
+
+logger = logging.getLogger(__name__)
+
+# Сообщений в одном запросе истории (размер пачки iter_messages)
+MESSAGES_PER_REQUEST = 100
+
+
+class BudgetExhausted(Exception):
+    """Бюджет запросов поиска исчерпан"""
+
+
+class HistorySearchJob:
+    """Фоновый поиск набора ключевых слов по истории каналов
+    
+    До HISTORY_SEARCH_SERVER_KEYWORDS слов ищутся на стороне Telegram (iter_messages(search=...)),
+    иначе история просматривается целиком и проверяется локально. В обоих случаях
+    совпадения подтверждаются тем же сопоставлением, что и у живых сообщений,
+    и сразу сохраняются в хранилище (без уведомлений, дубликаты отсекаются).
+    Каналы обрабатываются параллельно, число запросов ограничено бюджетом.
+    """
+    
+    def __init__(self, monitor, keywords: List[str], days: int,
+                 request_budget: int = HISTORY_SEARCH_REQUEST_BUDGET,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        self.monitor = monitor
+        self.keywords = keywords
+        self.matcher = monitor.build_matcher(keywords)
+        self.days = days
+        self.since = datetime.now(timezone.utc) - timedelta(days=days)
+        self.request_budget = request_budget
+        self.progress_callback = progress_callback
+        self.server_side = len(keywords) <= HISTORY_SEARCH_SERVER_KEYWORDS
+        self.task: Optional[asyncio.Task] = None
+        self._limiter = RateLimiter(HISTORY_SEARCH_REQUESTS_PER_SECOND)
+        self._started = None
+        self._last_progress = 0.0
+        self.stats: Dict[str, Any] = {
+            'keywords': list(keywords),
+            'days': days,
+            'mode': 'server' if self.server_side else 'local',
+            'channels': 0,
+            'done': 0,
+            'requests': 0,
+            'budget': request_budget,
+            'scanned': 0,
+            'found': 0,
+            'errors': 0,
+            'elapsed': 0.0,
+            'budget_exhausted': False,
+            'cancelled': False,
+            'finished': False
+        }
+    
+    @property
+    def running(self) -> bool:
+        """Поиск еще выполняется"""
+        return self.task is not None and not self.task.done()
+    
+    def start(self) -> asyncio.Task:
+        """Запускает поиск в фоне"""
+        self.task = asyncio.ensure_future(self.run())
+        return self.task
+    
+    def cancel(self):
+        """Отменяет поиск (найденное до отмены остается в хранилище)"""
+        if self.running:
+            self.task.cancel()
+    
+    async def run(self) -> Dict[str, Any]:
+        """Выполняет поиск и возвращает итоговую статистику"""
+        channel_ids = sorted(self.monitor.monitored_channels)
+        self.stats['channels'] = len(channel_ids)
+        self._started = time.monotonic()
+        semaphore = asyncio.Semaphore(HISTORY_SEARCH_CONCURRENCY)
+        
+        async def run_channel(channel_id: int):
+            async with semaphore:
+                await self._search_channel(channel_id)
+            self.stats['done'] += 1
+            await self._report_progress()
+        
+        logger.info(
+            f"Поиск по истории: {len(channel_ids)} каналов, {self.days} дн., "
+            f"слова {self.keywords}, режим {self.stats['mode']}"
+        )
+        try:
+            await asyncio.gather(*(run_channel(channel_id) for channel_id in channel_ids))
+        except asyncio.CancelledError:
+            self.stats['cancelled'] = True
+            logger.info("Поиск по истории отменен")
+        
+        self.stats['finished'] = True
+        await self._report_progress(force=True)
+        logger.info(
+            f"Поиск по истории завершен: просмотрено {self.stats['scanned']}, найдено {self.stats['found']}, "
+            f"запросов {self.stats['requests']}/{self.request_budget}, {self.stats['elapsed']:.1f} с"
+        )
+        return self.stats
+    
+    async def _request(self, client):
+        """Учитывает один запрос к Telegram: бюджет, ограничение частоты поиска и общий планировщик"""
+        if self.stats['requests'] >= self.request_budget:
+            self.stats['budget_exhausted'] = True
+            raise BudgetExhausted()
+        self.stats['requests'] += 1
+        await self._limiter.acquire()
+        await self.monitor.rpc.acquire(client, 'iter_messages', PRIORITY_BACKGROUND, 'history')
+    
+    async def _search_channel(self, channel_id: int):
+        """Ищет по истории одного канала"""
+        entity = int(f"-100{channel_id}")
+        # Запросы идут через сессию-владельца канала (или свободную от FloodWait)
+        client = self.monitor.sessions.client_for(channel_id)
+        try:
+            if self.server_side:
+                for keyword in self.keywords:
+                    await self._scan(channel_id, client, entity, search=keyword)
+            else:
+                await self._scan(channel_id, client, entity)
+        except BudgetExhausted:
+            pass
+        except FloodWaitError as e:
+            self.monitor.rpc.report_flood(client, e.seconds, 'history')
+            logger.warning(f"Flood control при поиске в канале {channel_id} ({e.seconds} с), канал пропущен")
+            self.stats['errors'] += 1
+        except Exception as e:
+            logger.error(f"Ошибка при поиске в канале {channel_id}: {e}")
+            self.stats['errors'] += 1
+    
+    async def _scan(self, channel_id: int, client, entity: int, search: Optional[str] = None):
+        """Просматривает историю канала от новых к старым до начала периода"""
+        await self._request(client)
+        scanned = 0
+        async for message in client.iter_messages(entity, search=search):
+            if message.date and message.date < self.since:
+                break
+            scanned += 1
+            self.stats['scanned'] += 1
+            if scanned % MESSAGES_PER_REQUEST == 0:
+                await self._request(client)
+            # Просмотренные сообщения истории не попадают в кэш хэшей правок живых сообщений
+            if await self.monitor._process_message(
+                channel_id, message, matcher=self.matcher, notify=False, remember_hash=False,
+                priority=PRIORITY_BACKGROUND, subsystem='history'
+            ):
+                self.stats['found'] += 1
+            await self._report_progress()
+    
+    async def _report_progress(self, force: bool = False):
+        """Передает статистику в progress_callback не чаще HISTORY_SEARCH_PROGRESS_INTERVAL"""
+        now = time.monotonic()
+        self.stats['elapsed'] = now - self._started
+        if not self.progress_callback:
+            return
+        if not force and now - self._last_progress < HISTORY_SEARCH_PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        try:
+            result = self.progress_callback(dict(self.stats))
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.warning(f"Ошибка в обработчике прогресса поиска: {e}")
@@ -0,0 +1,86 @@
+"""
+Пробный прогон ключевых слов по сохраненным сообщениям (/dryrun)
+"""
+
+import time
+from collections import Counter
+from typing import Any, Collection, Dict, Iterable, Optional, Tuple
+
+from .keyword_matcher import split_tokens
+from .keyword_rules import KeywordRules
+from .normalization import normalize_text
+
+
+def dry_run_keywords(candidate: KeywordRules, current: KeywordRules,
+                     messages: Iterable[Tuple[Optional[int], str]],
+                     skip_channels: Collection[int] = ()) -> Dict[str, Any]:
+    """Проверяет набор ключевых слов на сообщениях, ничего не сохраняя
+
+    Оба набора проверяются через KeywordRules.detached(), поэтому их можно брать
+    из текущей версии монитора и выполнять прогон в пуле потоков. Текст нормализуется
+    и разбирается на токены один раз для обоих наборов, одинаковые тексты (один пост
+    во многих каналах) проверяются один раз - если нет правил только для отдельных каналов.
+
+    Args:
+        candidate: Проверяемый набор ключевых слов
+        current: Текущий набор ключевых слов (для сравнения)
+        messages: Пары (ID канала, текст)
+        skip_channels: Каналы со своими наборами слов - к ним ни один из наборов не применяется
+
+    Returns:
+        Статистика: сообщений, пропущенных, уникальных текстов, время, совпадения
+        по словам и пересечение с текущим набором
+    """
+    started = time.perf_counter()
+    candidate = candidate.detached()
+    current = current.detached()
+    hits: Counter = Counter()
+    new_hits: Counter = Counter()
+    # Текст (или канал и текст) -> (совпадения кандидата, совпал ли текущий набор)
+    results: Dict[Any, Tuple[Tuple[str, ...], bool]] = {}
+    per_channel = any(rule.channels is not None for rule in candidate.rules + current.rules)
+    total = skipped = both = only_candidate = only_current = 0
+
+    for channel_id, text in messages:
+        if not text:
+            continue
+        if channel_id in skip_channels:
+            skipped += 1
+            continue
+        total += 1
+
+        key = (channel_id, text) if per_channel else text
+        result = results.get(key)
+        if result is None:
+            normalized = normalize_text(text)
+            tokens = split_tokens(normalized)
+            result = results[key] = (
+                tuple(candidate.match(text, channel_id, tokens, normalized)),
+                bool(current.match(text, channel_id, tokens, normalized)),
+            )
+        found, matched_current = result
+
+        if found and matched_current:
+            both += 1
+        elif found:
+            only_candidate += 1
+        elif matched_current:
+            only_current += 1
+        hits.update(found)
+        if not matched_current:
+            new_hits.update(found)
+
+    return {
+        'messages': total,
+        'skipped': skipped,
+        'unique_texts': len({key[1] for key in results} if per_channel else results),
+        'seconds': time.perf_counter() - started,
+        # Все слова кандидата, в том числе без совпадений, в порядке объявления
+        'keywords': [
+            {'keyword': keyword, 'hits': hits[keyword], 'new_hits': new_hits[keyword]}
+            for keyword in candidate.keywords
+        ],
+        'both': both,
+        'only_candidate': only_candidate,
+        'only_current': only_current,
+    }
@@ -0,0 +1,172 @@
+"""
+Сопоставление текста сообщений с ключевыми словами и фразами
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .normalization import normalize_text
+
+
+# Токен - последовательность букв/цифр (как \b\w+\b, в том числе для кириллицы)
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает нормализованный текст на токены (см. normalize_text)"""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+def split_tokens(normalized: str) -> List[str]:
+    """Токены текста, уже приведенного normalize_text: tokenize без повторной нормализации"""
+    return _TOKEN_RE.findall(normalized)
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Приводит ключевое слово или фразу к каноническому виду: токены через пробел"""
+    return ' '.join(tokenize(keyword))
+
+
+class _TrieNode:
+    """Узел префиксного дерева по ID токенов"""
+
+    __slots__ = ('children', 'keywords', 'owner')
+
+    def __init__(self, owner: object):
+        self.children: Dict[int, '_TrieNode'] = {}
+        # Индексы ключевых слов, заканчивающихся в этом узле
+        self.keywords: List[int] = []
+        # Матчер, которому узел принадлежит; чужие (общие с копией) узлы не изменяются
+        self.owner = owner
+
+    def copy(self, owner: object) -> '_TrieNode':
+        node = _TrieNode(owner)
+        node.children = dict(self.children)
+        node.keywords = list(self.keywords)
+        return node
+
+
+class KeywordMatcher:
+    """Поиск ключевых слов и фраз за один проход по токенам сообщения
+
+    Ключевые слова разбиваются на токены, токены получают числовые ID, а фразы
+    складываются в префиксное дерево по этим ID. Однословные ключевые слова
+    находятся пересечением множества токенов сообщения со словарем слов (на C,
+    без цикла Python по токенам); дерево обходится только от позиций токенов,
+    с которых начинается хотя бы одна фраза, поэтому стоимость почти не зависит
+    от количества слов и фраз.
+
+    normalize_token (например, приведение к лемме) применяется одинаково к токенам
+    ключевых слов и сообщений: ключевые слова хранятся в дереве уже нормализованными.
+
+    copy() делит узлы дерева с оригиналом; add() на копии копирует только узлы
+    на пути нового слова, оригинал не меняется.
+    """
+
+    def __init__(self, keywords: Iterable[str], normalize_token: Optional[Callable[[str], str]] = None):
+        self.keywords: List[str] = []
+        self.normalize_token = normalize_token
+        self._token_ids: Dict[str, int] = {}
+        self._owner = object()
+        self._root = _TrieNode(self._owner)
+        self.node_count = 1
+        # Однословные ключевые слова: токен -> индексы (кортежи, общие с копиями); первые токены фраз
+        self._single: Dict[str, Tuple[int, ...]] = {}
+        self._phrase_starts: Set[str] = set()
+
+        for keyword in keywords:
+            self.add(keyword)
+
+    def copy(self) -> 'KeywordMatcher':
+        """Копия для изменения: словари копируются, узлы дерева - при изменении"""
+        clone = KeywordMatcher.__new__(KeywordMatcher)
+        clone.keywords = list(self.keywords)
+        clone.normalize_token = self.normalize_token
+        clone._token_ids = dict(self._token_ids)
+        clone._owner = object()
+        clone._root = self._root
+        clone.node_count = self.node_count
+        clone._single = dict(self._single)
+        clone._phrase_starts = set(self._phrase_starts)
+        return clone
+
+    def _own(self, node: _TrieNode) -> _TrieNode:
+        return node if node.owner is self._owner else node.copy(self._owner)
+
+    def add(self, keyword: str) -> Optional[int]:
+        """Добавляет ключевое слово в дерево; возвращает его индекс (None для пустого)"""
+        tokens = self._tokenize(keyword)
+        if not tokens:
+            return None
+        index = len(self.keywords)
+        self.keywords.append(keyword)
+
+        node = self._root = self._own(self._root)
+        for token in tokens:
+            token_id = self._token_ids.setdefault(token, len(self._token_ids))
+            child = node.children.get(token_id)
+            if child is None:
+                child = _TrieNode(self._owner)
+                self.node_count += 1
+            else:
+                child = self._own(child)
+            node.children[token_id] = child
+            node = child
+        node.keywords.append(index)
+        if len(tokens) == 1:
+            self._single[tokens[0]] = self._single.get(tokens[0], ()) + (index,)
+        else:
+            self._phrase_starts.add(tokens[0])
+        return index
+
+    def _tokenize(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        if self.normalize_token is not None:
+            tokens = [self.normalize_token(token) for token in tokens]
+        return tokens
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def match(self, text: str) -> List[str]:
+        """Возвращает найденные ключевые слова в порядке их объявления"""
+        return [self.keywords[index] for index in sorted(self.match_indices(text))]
+
+    def match_indices(self, text: str, tokens: Optional[List[str]] = None) -> Set[int]:
+        """Возвращает индексы найденных ключевых слов в self.keywords
+
+        tokens - уже полученный tokenize(text), чтобы не разбирать текст повторно
+        при проверке одного сообщения несколькими наборами.
+        """
+        if not text or not self.keywords:
+            return set()
+
+        if tokens is None:
+            tokens = self._tokenize(text)
+        elif self.normalize_token is not None:
+            tokens = [self.normalize_token(token) for token in tokens]
+        present = set(tokens)
+        found = set()
+        for token in self._single.keys() & present:
+            found.update(self._single[token])
+
+        starts = present & self._phrase_starts
+        if not starts:
+            return found
+
+        token_ids = self._token_ids
+        root_children = self._root.children
+        for start, token in enumerate(tokens):
+            if token not in starts:
+                continue
+            node = root_children[token_ids[token]]
+            position = start
+            while node is not None:
+                if node.keywords:
+                    found.update(node.keywords)
+                position += 1
+                if position == len(tokens) or not node.children:
+                    break
+                node = node.children.get(token_ids.get(tokens[position]))
+
+        return found
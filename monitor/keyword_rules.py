@@ -0,0 +1,402 @@
+"""
+Логические правила над ключевыми словами: (ищу OR нужен) AND wordpress AND NOT вакансия
+"""
+
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from config import FUZZY_MIN_LENGTH, FUZZY_MAX_DISTANCE, FUZZY_MAX_TOKEN_LEN
+from .fuzzy_index import FuzzyIndex
+from .keyword_matcher import KeywordMatcher, normalize_keyword
+from .regex_keywords import RegexKeywords
+
+
+logger = logging.getLogger(__name__)
+
+# Максимум конъюнкций после раскрытия скобок (защита от экспоненциального роста)
+MAX_RULE_CLAUSES = 64
+
+_RULE_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+_OPERATORS = {'AND', 'OR', 'NOT'}
+
+# Узел разобранного правила: ('term', str) | ('not', узел) | ('and', [узлы]) | ('or', [узлы])
+RuleNode = Tuple[str, Any]
+# Конъюнкция: (обязательные термы, запрещенные термы)
+Clause = Tuple[FrozenSet[str], FrozenSet[str]]
+
+
+class RuleSyntaxError(ValueError):
+    """Ошибка в тексте правила"""
+
+
+class _RuleParser:
+    """Разбор правила: NOT сильнее AND, AND сильнее OR, соседние термы - неявный AND"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = _RULE_TOKEN_RE.findall(source)
+        self.position = 0
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> Optional[str]:
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def parse(self) -> RuleNode:
+        if not self.tokens:
+            raise RuleSyntaxError("пустое правило")
+        node = self._parse_or()
+        if self._peek() is not None:
+            raise RuleSyntaxError(f"лишний элемент «{self._peek()}»")
+        return node
+
+    def _parse_or(self) -> RuleNode:
+        children = [self._parse_and()]
+        while self._peek() is not None and self._peek().upper() == 'OR':
+            self._next()
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else ('or', children)
+
+    def _parse_and(self) -> RuleNode:
+        children = [self._parse_not()]
+        while True:
+            token = self._peek()
+            if token is None or token == ')' or token.upper() == 'OR':
+                break
+            if token.upper() == 'AND':
+                self._next()
+            children.append(self._parse_not())
+        return children[0] if len(children) == 1 else ('and', children)
+
+    def _parse_not(self) -> RuleNode:
+        token = self._peek()
+        if token is not None and token.upper() == 'NOT':
+            self._next()
+            return ('not', self._parse_not())
+        return self._parse_atom()
+
+    def _parse_atom(self) -> RuleNode:
+        token = self._next()
+        if token is None:
+            raise RuleSyntaxError("неожиданный конец правила")
+        if token == '(':
+            node = self._parse_or()
+            if self._next() != ')':
+                raise RuleSyntaxError("не хватает закрывающей скобки")
+            return node
+        if token == ')' or token.upper() in _OPERATORS:
+            raise RuleSyntaxError(f"неожиданный элемент «{token}»")
+
+        term = normalize_keyword(token.strip('"'))
+        if not term:
+            raise RuleSyntaxError(f"«{token}» не содержит слов")
+        return ('term', term)
+
+
+def _to_dnf(node: RuleNode, negate: bool = False) -> List[Clause]:
+    """Раскрывает правило в дизъюнкцию конъюнкций (отрицания спускаются к термам)"""
+    kind, value = node
+    if kind == 'term':
+        return [(frozenset(), frozenset([value]))] if negate else [(frozenset([value]), frozenset())]
+    if kind == 'not':
+        return _to_dnf(value, not negate)
+
+    # По закону де Моргана отрицание меняет AND и OR местами
+    is_and = (kind == 'and') != negate
+    if not is_and:
+        clauses = [clause for child in value for clause in _to_dnf(child, negate)]
+    else:
+        clauses = [(frozenset(), frozenset())]
+        for child in value:
+            clauses = [
+                (required | child_required, forbidden | child_forbidden)
+                for required, forbidden in clauses
+                for child_required, child_forbidden in _to_dnf(child, negate)
+                # Противоречивые конъюнкции (x AND NOT x) никогда не выполняются
+                if not (required | child_required) & (forbidden | child_forbidden)
+            ]
+            if len(clauses) > MAX_RULE_CLAUSES:
+                break
+
+    if len(clauses) > MAX_RULE_CLAUSES:
+        raise RuleSyntaxError(f"правило слишком сложное (больше {MAX_RULE_CLAUSES} вариантов после раскрытия скобок)")
+    return clauses
+
+
+def parse_rule(source: str) -> List[Clause]:
+    """Разбирает правило и проверяет его
+
+    Raises:
+        RuleSyntaxError: синтаксическая ошибка, противоречие или вариант без обязательных слов
+    """
+    clauses = _to_dnf(_RuleParser(source).parse())
+    if not clauses:
+        raise RuleSyntaxError("правило никогда не выполняется")
+    if any(not required for required, _ in clauses):
+        # Такое правило срабатывало бы на сообщения вообще без ключевых слов
+        raise RuleSyntaxError("каждый вариант правила должен содержать слово без NOT")
+    return clauses
+
+
+class _CompiledRule:
+    __slots__ = ('source', 'clauses', 'channels')
+
+    def __init__(self, source: str, clauses: List[Tuple[int, int]], channels: Optional[FrozenSet[int]]):
+        self.source = source
+        # Битовая программа: (маска обязательных, маска запрещенных) для каждой конъюнкции
+        self.clauses = clauses
+        self.channels = channels
+
+
+class KeywordRules:
+    """Ключевые слова и логические правила, скомпилированные в битовые маски
+
+    Все термы (простые ключевые слова и термы правил) ищутся одним проходом
+    KeywordMatcher, каждому терму соответствует бит. Правило - набор конъюнкций
+    (обязательная маска, запрещенная маска), проверка конъюнкции - две битовые операции.
+    Проверяются только правила, в которых встретился хотя бы один из найденных
+    обязательных термов, поэтому тысячи правил почти не увеличивают стоимость
+    сообщения без совпадений.
+
+    Правило - словарь {'rule': текст, 'channels': [ID каналов] или пусто для всех каналов}.
+    При fuzzy=True простые ключевые слова дополнительно ищутся с опечатками (FuzzyIndex).
+    Шаблоны regex_patterns ищутся отдельно (RegexKeywords) и попадают в результат как есть.
+    """
+
+    def __init__(self, keywords: Iterable[str], rules: Iterable[Dict[str, Any]] = (),
+                 normalize_token: Optional[Callable[[str], str]] = None, fuzzy: bool = False,
+                 regex_patterns: Iterable[str] = ()):
+        self._terms: List[str] = []
+        self._term_bits: Dict[str, int] = {}
+
+        # Простые ключевые слова: бит -> индексы ключевых слов с этим термом.
+        # Удаленное слово оставляет пустую позицию (None), индексы остальных не сдвигаются
+        self._keyword_slots: List[Optional[str]] = []
+        self._keywords_by_bit: Dict[int, Tuple[int, ...]] = {}
+        for keyword in keywords:
+            term = normalize_keyword(keyword)
+            if not term:
+                continue
+            bit = self._bit_of(term)
+            self._keywords_by_bit[bit] = self._keywords_by_bit.get(bit, ()) + (len(self._keyword_slots),)
+            self._keyword_slots.append(keyword)
+
+        self.rules: List[_CompiledRule] = []
+        self._triggers: Dict[int, List[int]] = {}
+        for rule in rules:
+            source = rule.get('rule', '')
+            try:
+                clauses = parse_rule(source)
+            except RuleSyntaxError as e:
+                logger.warning(f"Правило «{source}» пропущено: {e}")
+                continue
+
+            compiled = []
+            trigger_bits: Set[int] = set()
+            for required, forbidden in clauses:
+                required_bits = [self._bit_of(term) for term in required]
+                trigger_bits.update(required_bits)
+                compiled.append((
+                    sum(1 << bit for bit in required_bits),
+                    sum(1 << self._bit_of(term) for term in forbidden)
+                ))
+            channels = frozenset(int(channel_id) for channel_id in rule.get('channels') or ()) or None
+
+            index = len(self.rules)
+            self.rules.append(_CompiledRule(source, compiled, channels))
+            for bit in trigger_bits:
+                self._triggers.setdefault(bit, []).append(index)
+
+        self.matcher = KeywordMatcher(self._terms, normalize_token=normalize_token)
+        self.fuzzy = FuzzyIndex(self.keywords, FUZZY_MIN_LENGTH, FUZZY_MAX_DISTANCE, FUZZY_MAX_TOKEN_LEN) if fuzzy else None
+        self.regex = RegexKeywords(regex_patterns)
+
+    def _bit_of(self, term: str) -> int:
+        bit = self._term_bits.get(term)
+        if bit is None:
+            bit = self._term_bits[term] = len(self._terms)
+            self._terms.append(term)
+        return bit
+
+    @property
+    def keywords(self) -> List[str]:
+        """Простые ключевые слова в порядке объявления"""
+        return [keyword for keyword in self._keyword_slots if keyword is not None]
+
+    def __len__(self) -> int:
+        return len(self.keywords) + len(self.rules) + len(self.regex)
+
+    def with_keyword_changes(self, added: Iterable[str], removed: Iterable[str]) -> 'KeywordRules':
+        """Новый набор с добавленными и удаленными простыми словами; текущий не меняется
+
+        Копируются словари и списки верхнего уровня; дерево KeywordMatcher, индекс
+        опечаток, правила и шаблоны делятся с текущим набором (узлы дерева и
+        кортежи индексов копируются только там, где их меняют новые слова).
+        """
+        clone = KeywordRules.__new__(KeywordRules)
+        clone.__dict__.update(self.__dict__)
+        clone._terms = list(self._terms)
+        clone._term_bits = dict(self._term_bits)
+        clone._keyword_slots = list(self._keyword_slots)
+        clone._keywords_by_bit = dict(self._keywords_by_bit)
+        clone.matcher = self.matcher.copy()
+        clone.fuzzy = self.fuzzy.copy() if self.fuzzy is not None else None
+        for keyword in removed:
+            clone.remove_keyword(keyword)
+        for keyword in added:
+            clone.add_keyword(keyword)
+        return clone
+
+    def detached(self) -> 'KeywordRules':
+        """Набор для проверок вне живого потока сообщений (пробный прогон)
+
+        Скомпилированные данные общие, но счетчики стоимости шаблонов свои и замеры
+        отключены: прогон архива не попадает в статистику /regex.
+        """
+        clone = KeywordRules.__new__(KeywordRules)
+        clone.__dict__.update(self.__dict__)
+        clone.regex = self.regex.copy(profile_every=0)
+        return clone
+
+    def add_keyword(self, keyword: str) -> bool:
+        """Добавляет простое ключевое слово без пересборки (изменяет набор, см. with_keyword_changes)
+
+        Новый терм дописывается в дерево KeywordMatcher; терм, уже известный по правилу
+        или удаленному слову, получает прежний бит.
+        """
+        term = normalize_keyword(keyword)
+        if not term or keyword in self._keyword_slots:
+            return False
+        is_new_term = term not in self._term_bits
+        bit = self._bit_of(term)
+        if is_new_term:
+            self.matcher.add(term)
+        self._keywords_by_bit[bit] = self._keywords_by_bit.get(bit, ()) + (len(self._keyword_slots),)
+        self._keyword_slots.append(keyword)
+        if self.fuzzy is not None:
+            self.fuzzy.add(keyword)
+        return True
+
+    def remove_keyword(self, keyword: str) -> bool:
+        """Удаляет простое ключевое слово без пересборки (изменяет набор, см. with_keyword_changes)
+
+        Терм остается в дереве (он может быть нужен правилам) и просто перестает
+        давать результат; лишние термы исчезают при следующей полной сборке.
+        """
+        if keyword not in self._keyword_slots:
+            return False
+        index = self._keyword_slots.index(keyword)
+        self._keyword_slots[index] = None
+        bit = self._term_bits[normalize_keyword(keyword)]
+        indices = tuple(existing for existing in self._keywords_by_bit[bit] if existing != index)
+        if indices:
+            self._keywords_by_bit[bit] = indices
+        else:
+            del self._keywords_by_bit[bit]
+        if self.fuzzy is not None:
+            self.fuzzy.remove(keyword)
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """Размер скомпилированного набора"""
+        return {
+            'keywords': len(self.keywords),
+            'rules': len(self.rules),
+            'regex': len(self.regex),
+            'terms': len(self._terms),
+            'trie_nodes': self.matcher.node_count,
+            'fuzzy_variants': self.fuzzy.variant_count if self.fuzzy is not None else 0,
+        }
+
+    def match(self, text: str, channel_id: Optional[int] = None, tokens: Optional[List[str]] = None,
+              normalized: Optional[str] = None) -> List[str]:
+        """Найденные ключевые слова (в порядке объявления), тексты сработавших правил и шаблоны
+
+        tokens - уже полученный tokenize(text) (см. KeywordMatcher.match_indices),
+        normalized - уже полученный normalize_text(text) для шаблонов.
+        """
+        found_bits = self.matcher.match_indices(text, tokens)
+        if not found_bits:
+            return self.regex.match(text, normalized)
+
+        keyword_indices: List[int] = []
+        candidates: Set[int] = set()
+        mask = 0
+        for bit in found_bits:
+            mask |= 1 << bit
+            keyword_indices.extend(self._keywords_by_bit.get(bit, ()))
+            candidates.update(self._triggers.get(bit, ()))
+
+        result = [self._keyword_slots[index] for index in sorted(keyword_indices)]
+        for index in sorted(candidates):
+            rule = self.rules[index]
+            if rule.channels is not None and channel_id not in rule.channels:
+                continue
+            for required, forbidden in rule.clauses:
+                if mask & required == required and not mask & forbidden:
+                    result.append(rule.source)
+                    break
+        result.extend(self.regex.match(text, normalized))
+        return result
+
+    def match_fuzzy(self, text: str, exact: Iterable[str] = (), tokens: Optional[List[str]] = None) -> List[str]:
+        """Ключевые слова, найденные только с опечатками (без уже найденных точно)"""
+        if self.fuzzy is None:
+            return []
+        return self.fuzzy.match(text, exclude=exact, tokens=tokens)
+
+
+class CompiledMatchers:
+    """Версия скомпилированных наборов ключевых слов: общий набор и наборы каналов
+
+    Объект собирается целиком, после сборки не изменяется и подменяется в мониторе
+    одним присваиванием, поэтому обработчик, взявший ссылку на версию, работает
+    с согласованным набором, даже если монитор уже перешел на следующую.
+    """
+
+    def __init__(self, version: int, default: KeywordRules, by_channel: Dict[int, KeywordRules],
+                 compile_seconds: float, built_in_executor: bool = False, incremental_changes: int = 0):
+        self.version = version
+        self.default = default
+        self.by_channel = by_channel
+        self.compile_seconds = compile_seconds
+        self.built_in_executor = built_in_executor
+        self.built_at = time.time()
+        # Изменения, внесенные в общий набор без полной пересборки (с последней полной)
+        self.incremental_changes = incremental_changes
+
+    def with_keyword_changes(self, version: int, added: List[str], removed: List[str]) -> 'CompiledMatchers':
+        """Следующая версия с изменениями общего набора; наборы каналов переходят как есть"""
+        started = time.perf_counter()
+        default = self.default.with_keyword_changes(added, removed)
+        return CompiledMatchers(
+            version, default, self.by_channel, time.perf_counter() - started,
+            incremental_changes=self.incremental_changes + len(added) + len(removed)
+        )
+
+    def for_channel(self, channel_id: Optional[int]) -> KeywordRules:
+        return self.by_channel.get(channel_id, self.default)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Время сборки и суммарный размер различных наборов"""
+        distinct = {id(matcher): matcher for matcher in self.by_channel.values()}
+        distinct[id(self.default)] = self.default
+        totals: Dict[str, int] = {}
+        for matcher in distinct.values():
+            for key, value in matcher.get_stats().items():
+                totals[key] = totals.get(key, 0) + value
+        return {
+            'version': self.version,
+            'compile_seconds': self.compile_seconds,
+            'built_in_executor': self.built_in_executor,
+            'built_at': self.built_at,
+            'incremental_changes': self.incremental_changes,
+            'channels_with_sets': len(self.by_channel),
+            'distinct_matchers': len(distinct),
+            **totals,
+        }
@@ -0,0 +1,160 @@
+"""
+Морфологическая нормализация: словоформа -> лемма по заранее собранной таблице
+
+Таблица собирается офлайн из TSV файла "словоформа<TAB>лемма" (например, выгрузки
+словаря OpenCorpora) командой:
+
+    python -m monitor.morphology build forms.tsv [data/lemmas.bin]
+
+Файл таблицы открывается через mmap: он не загружается в память процесса целиком,
+поиск - бинарный по отсортированным словоформам, а результаты для встреченных
+токенов кэшируются в ограниченном LRU.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+from typing import Dict, Optional
+
+from config import LEMMA_TABLE_FILE, MORPHOLOGY_CACHE_SIZE
+from .normalization import normalize_text
+
+
+logger = logging.getLogger(__name__)
+
+# Формат файла: заголовок (сигнатура, количество записей), смещения записей (count + 1 шт.),
+# затем записи "словоформа\0лемма" в UTF-8, отсортированные по словоформе
+_MAGIC = b'LEMMTBL1'
+_HEADER = struct.Struct('<8sI')
+_OFFSET = struct.Struct('<I')
+
+
+def _normalize_form(word: str) -> str:
+    """Ключ таблицы в том же виде, что и токены сообщений (ё -> е, диакритика, двойники)"""
+    return normalize_text(word).strip()
+
+
+class LemmaTable:
+    """Таблица лемм только для чтения, отображенная в память"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path}: не является таблицей лемм")
+        self._offsets_start = _HEADER.size
+        self._data_start = self._offsets_start + (self.count + 1) * _OFFSET.size
+
+    def _record(self, index: int) -> bytes:
+        position = self._offsets_start + index * _OFFSET.size
+        start, = _OFFSET.unpack_from(self._mm, position)
+        end, = _OFFSET.unpack_from(self._mm, position + _OFFSET.size)
+        return self._mm[self._data_start + start:self._data_start + end]
+
+    def get(self, form: str) -> Optional[str]:
+        """Лемма словоформы или None, если ее нет в таблице"""
+        key = form.encode('utf-8')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record_form, _, lemma = self._record(middle).partition(b'\0')
+            if record_form < key:
+                low = middle + 1
+            elif record_form > key:
+                high = middle
+            else:
+                return lemma.decode('utf-8')
+        return None
+
+    def close(self):
+        self._mm.close()
+
+
+class Lemmatizer:
+    """Приведение токенов к леммам с LRU кэшем
+
+    Токены, которых нет в таблице, возвращаются без изменений (и тоже кэшируются),
+    поэтому для частых токенов нормализация - один поиск в словаре кэша.
+    """
+
+    def __init__(self, table: LemmaTable, cache_size: int = MORPHOLOGY_CACHE_SIZE):
+        self.table = table
+        self.lemma = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _lookup(self, token: str) -> str:
+        return self.table.get(token) or token
+
+
+_lemmatizer: Optional[Lemmatizer] = None
+_lemmatizer_mtime: Optional[float] = None
+
+
+def get_lemmatizer(path: str = LEMMA_TABLE_FILE) -> Optional[Lemmatizer]:
+    """Общий лемматизатор процесса; None, если таблица не собрана
+
+    Таблица переоткрывается, если файл был пересобран.
+    """
+    global _lemmatizer, _lemmatizer_mtime
+
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+    if _lemmatizer is None or mtime != _lemmatizer_mtime:
+        try:
+            _lemmatizer = Lemmatizer(LemmaTable(path))
+            _lemmatizer_mtime = mtime
+            logger.info(f"Загружена таблица лемм: {_lemmatizer.table.count} словоформ")
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Не удалось открыть таблицу лемм {path}: {e}")
+            return None
+    return _lemmatizer
+
+
+def build_lemma_table(source_path: str, output_path: str = LEMMA_TABLE_FILE) -> int:
+    """Собирает таблицу лемм из TSV файла "словоформа<TAB>лемма"
+
+    Returns:
+        Количество словоформ в таблице
+    """
+    forms: Dict[bytes, bytes] = {}
+    with open(source_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) < 2:
+                continue
+            form, lemma = _normalize_form(parts[0]), _normalize_form(parts[1])
+            if form and lemma and form != lemma:
+                # При неоднозначности оставляем первую лемму из словаря
+                forms.setdefault(form.encode('utf-8'), lemma.encode('utf-8'))
+
+    records = [form + b'\0' + forms[form] for form in sorted(forms)]
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(records)))
+        f.write(b''.join(_OFFSET.pack(offset) for offset in offsets))
+        f.write(b''.join(records))
+    # Подменяем файл атомарно: работающий процесс продолжает читать старое отображение
+    os.replace(tmp_path, output_path)
+    return len(records)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] != 'build':
+        print("Использование: python -m monitor.morphology build forms.tsv [lemmas.bin]")
+        sys.exit(1)
+    output = sys.argv[3] if len(sys.argv) > 3 else LEMMA_TABLE_FILE
+    count = build_lemma_table(sys.argv[2], output)
+    print(f"Таблица лемм собрана: {count} словоформ -> {output}")
@@ -0,0 +1,112 @@
+"""
+Поиск почти одинаковых сообщений (одно объявление в нескольких чатах) по SimHash
+"""
+
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional, Tuple
+
+from .keyword_matcher import tokenize
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+def simhash(tokens: List[str]) -> int:
+    """64-битный SimHash по множеству слов текста
+
+    Похожие тексты дают отпечатки, отличающиеся в нескольких битах. Признаки -
+    отдельные слова, а не шинглы: в объявлении из 15-20 слов добавленный контакт
+    меняет 2-3 шингла из 15, но лишь одно слово из 20. Hash() строк различается
+    между запусками процесса, поэтому отпечатки сравнимы только внутри одного
+    процесса - индекс и хранится только в памяти.
+    """
+    features = set(tokens)
+    if not features:
+        return 0
+
+    # Голосование по битам: двоичные строки склеиваются, бит i всех признаков -
+    # срез с шагом 64, единицы в нем считает str.count без цикла по признакам
+    bits = ''.join([format(hash(feature) & _MASK_64, '064b') for feature in features])
+    threshold = len(features) / 2
+    value = 0
+    for position in range(64):
+        value = (value << 1) | (bits[position::64].count('1') > threshold)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """LSH индекс отпечатков за скользящее окно времени
+
+    64-битный отпечаток делится на полосы (max_distance + 1 полоса): отпечатки,
+    отличающиеся не больше чем в max_distance битах, по принципу Дирихле совпадают
+    хотя бы в одной полосе целиком. Кандидаты из общих полос проверяются точным
+    расстоянием Хэмминга. Записи старше window_seconds относительно самого нового
+    сообщения удаляются из индекса.
+    """
+
+    def __init__(self, window_seconds: float, max_distance: int = 8, min_tokens: int = 5):
+        self.window_seconds = window_seconds
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self._bands = max_distance + 1
+        self._band_bits = 64 // self._bands
+        self._band_mask = (1 << self._band_bits) - 1
+        # Полоса (номер, значение) -> записи; записи в порядке добавления
+        self._buckets: Dict[Tuple[int, int], List[Tuple[int, float, Hashable]]] = {}
+        self._entries: Deque[Tuple[int, float, Hashable]] = deque()
+        self._latest = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def fingerprint(self, text: str, tokens: Optional[List[str]] = None) -> Optional[int]:
+        """Отпечаток текста; None для слишком коротких текстов (их совпадение ничего не значит)
+
+        tokens - уже полученный tokenize(text).
+        """
+        if tokens is None:
+            tokens = tokenize(text)
+        if len(tokens) < self.min_tokens:
+            return None
+        return simhash(tokens)
+
+    def _bands_of(self, fingerprint: int):
+        for band in range(self._bands):
+            yield band, (fingerprint >> (band * self._band_bits)) & self._band_mask
+
+    def _expire(self, now: float):
+        self._latest = max(self._latest, now)
+        horizon = self._latest - self.window_seconds
+        while self._entries and self._entries[0][1] < horizon:
+            entry = self._entries.popleft()
+            for band in self._bands_of(entry[0]):
+                bucket = self._buckets.get(band)
+                if bucket is not None:
+                    bucket.remove(entry)
+                    if not bucket:
+                        del self._buckets[band]
+
+    def find(self, fingerprint: int, timestamp: float) -> Optional[Hashable]:
+        """Ключ первого похожего сообщения в окне или None"""
+        self._expire(timestamp)
+        best: Optional[Tuple[int, float, Hashable]] = None
+        for band in self._bands_of(fingerprint):
+            for entry in self._buckets.get(band, ()):
+                if abs(entry[1] - timestamp) > self.window_seconds:
+                    continue
+                if hamming_distance(entry[0], fingerprint) <= self.max_distance:
+                    if best is None or entry[1] < best[1]:
+                        best = entry
+        return best[2] if best is not None else None
+
+    def add(self, fingerprint: int, key: Hashable, timestamp: float):
+        """Добавляет первое появление сообщения в индекс"""
+        entry = (fingerprint, timestamp, key)
+        self._entries.append(entry)
+        for band in self._bands_of(fingerprint):
+            self._buckets.setdefault(band, []).append(entry)
+        self._expire(timestamp)
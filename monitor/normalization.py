@@ -0,0 +1,165 @@
+"""
+Нормализация текста перед поиском ключевых слов
+
+Одна и та же функция normalize_text применяется к ключевым словам, к сообщениям
+и к тексту при поиске по истории, поэтому обе стороны сравнения всегда приводятся
+к одному виду. Проверка производительности:
+
+    python -m monitor.normalization bench
+
+Проверка известных случаев подмены символов:
+
+    python -m monitor.normalization check
+"""
+
+import re
+import sys
+import time
+import unicodedata
+
+
+# Символы нулевой ширины, мягкий перенос и комбинируемые знаки (ударения и т.п.)
+_INVISIBLE = '\u00ad\u180e\u200b-\u200f\u2060-\u2064\ufeff'
+_COMBINING = '\u0300-\u036f'
+_INVISIBLE_RE = re.compile(f'[{_INVISIBLE}]')
+_COMBINING_RE = re.compile(f'[{_COMBINING}]')
+# "и" + кратка после NFD - буква й, а не "и" с ударением
+_SHORT_I_RE = re.compile('и\u0306')
+
+
+def _decomposable_class() -> str:
+    """Класс regex: буквы с диакритикой, которые NFD раскладывает на букву и знаки
+
+    й и ё исключены: й сохраняется, ё заменяется напрямую, и обычный русский
+    текст не проходит через NFD.
+    """
+    chars = [
+        chr(code) for code in range(0xc0, 0x2000)
+        if chr(code) not in 'йЙёЁ' and unicodedata.normalize('NFD', chr(code)) != chr(code)
+    ]
+    return ''.join(re.escape(char) for char in chars)
+
+
+_DECOMPOSE_RE = re.compile(f'[{_decomposable_class()}{_COMBINING}]')
+
+# Пары похожих строчных букв (кириллица, латиница) после lower().
+# Сюда же входят пары, похожие только в верхнем регистре (Н/H, В/B, М/M, Т/T)
+_HOMOGLYPHS = [
+    ('а', 'a'), ('в', 'b'), ('е', 'e'), ('і', 'i'), ('к', 'k'), ('м', 'm'), ('н', 'h'),
+    ('о', 'o'), ('р', 'p'), ('с', 'c'), ('т', 't'), ('у', 'y'), ('х', 'x'),
+]
+_TO_LATIN = str.maketrans({cyrillic: latin for cyrillic, latin in _HOMOGLYPHS})
+_TO_CYRILLIC = str.maketrans({latin: cyrillic for cyrillic, latin in _HOMOGLYPHS})
+_LATIN_LOOKALIKES = frozenset(latin for _, latin in _HOMOGLYPHS)
+_CYRILLIC_LOOKALIKES = frozenset(cyrillic for cyrillic, _ in _HOMOGLYPHS)
+
+# Стык латиницы и кириллицы внутри слова - признак подмены букв.
+# Два выражения без альтернативы заметно быстрее одного с "|"
+_LATIN_CYRILLIC_RE = re.compile('[a-z][а-яі]')
+_CYRILLIC_LATIN_RE = re.compile('[а-яі][a-z]')
+_WORD_RE = re.compile(r'\w+')
+_LATIN_RE = re.compile('[a-z]')
+_CYRILLIC_RE = re.compile('[а-яі]')
+
+
+def _fix_homoglyphs(match) -> str:
+    """Приводит слово со смешанными алфавитами к алфавиту большинства букв
+
+    Слово переводится, только если все буквы меньшинства имеют двойника
+    в другом алфавите ("wоrdprеss" -> "wordpress"); иначе остается как есть.
+    """
+    word = match.group(0)
+    latin = _LATIN_RE.findall(word)
+    if not latin:
+        return word
+    cyrillic = _CYRILLIC_RE.findall(word)
+    if not cyrillic:
+        return word
+    if len(latin) >= len(cyrillic):
+        if _CYRILLIC_LOOKALIKES.issuperset(cyrillic):
+            return word.translate(_TO_LATIN)
+    elif _LATIN_LOOKALIKES.issuperset(latin):
+        return word.translate(_TO_CYRILLIC)
+    return word
+
+
+def normalize_text(text: str) -> str:
+    """Нормализует текст для сравнения
+
+    - нижний регистр, ё -> е;
+    - удаление символов нулевой ширины и мягких переносов;
+    - удаление диакритики: NFD и удаление комбинируемых знаков ("wordpre\u0301ss",
+      "café" -> "cafe"), й сохраняется; ё -> е уже после удаления знаков, поэтому
+      разложенная "е" + умлаут тоже становится "е";
+    - слова со смешанной кириллицей и латиницей приводятся к одному алфавиту.
+
+    Для обычного текста это lower() и несколько проходов regex без совпадений;
+    замены выполняются только там, где есть что исправлять.
+    """
+    if not text:
+        return ''
+    text = text.lower()
+    if _INVISIBLE_RE.search(text):
+        text = _INVISIBLE_RE.sub('', text)
+    if _DECOMPOSE_RE.search(text):
+        text = unicodedata.normalize('NFD', text)
+        if '\u0306' in text:
+            # Кратку над "и" собираем обратно в "й" до удаления знаков, иначе буква потеряется
+            text = _SHORT_I_RE.sub('й', text)
+        text = _COMBINING_RE.sub('', text)
+    if 'ё' in text:
+        text = text.replace('ё', 'е')
+    if _LATIN_CYRILLIC_RE.search(text) or _CYRILLIC_LATIN_RE.search(text):
+        text = _WORD_RE.sub(_fix_homoglyphs, text)
+    return text
+
+
+def _benchmark(iterations: int = 20000):
+    samples = [
+        "Ищу разработчика на WordPress для доработки сайта, бюджет 30 000 руб. "
+        "Нужен опыт с WooCommerce и Elementor, пишите в личку @example",
+        "Нужен лендинг под курс на GetCourse, срочно. Оплата после сдачи. Подробности в ЛС",
+        "Ищу\u200b разработчика на w\u043erdpr\u0435ss, реда\u0301ктор тоже нужен, ёлки-палки",
+    ]
+    for sample in samples:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            normalize_text(sample)
+        elapsed = (time.perf_counter() - started) / iterations
+        print(f"{elapsed * 1e6:6.2f} мкс  {len(sample):4d} символов  {normalize_text(sample)[:60]!r}")
+
+
+# Подмены, которые должны приводиться к тому же виду, что и ключевое слово: (текст, результат)
+_REGRESSION_CASES = [
+    ('wordpre\u0301ss', 'wordpress'),
+    ('cafe\u0301', 'cafe'),
+    ('caf\u00e9', 'cafe'),
+    ('все\u0308', 'все'),
+    ('ВСЁ', 'все'),
+    ('е\u0308лка', 'елка'),
+    ('и\u0306ти', 'йти'),
+    ('йод', 'йод'),
+    ('реда\u0301ктор й\u0301', 'редактор й'),
+    ('w\u043erdpr\u0435ss', 'wordpress'),
+    ('ищу\u200b разработчика', 'ищу разработчика'),
+]
+
+
+def _check() -> bool:
+    failed = 0
+    for text, expected in _REGRESSION_CASES:
+        result = normalize_text(text)
+        if result != expected:
+            failed += 1
+            print(f"ОШИБКА: {text!r} -> {result!r}, ожидалось {expected!r}")
+    print(f"Проверено случаев: {len(_REGRESSION_CASES)}, ошибок: {failed}")
+    return not failed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('bench', 'check'):
+        print("Использование: python -m monitor.normalization bench|check")
+        sys.exit(1)
+    if sys.argv[1] == 'check':
+        sys.exit(0 if _check() else 1)
+    _benchmark()
@@ -0,0 +1,487 @@
+"""
+Ключевые слова - регулярные выражения: \\d+\\s?(₽|руб), ссылки и т.п.
+
+Шаблоны проверяются при сохранении: синтаксис, пустое совпадение, совместимость
+с остальными шаблонами и конструкции, склонные к катастрофическому перебору
+((a+)+, (.*a){12}, .*.*=, обратные ссылки). Если установлен модуль re2
+(pip install google-re2), шаблоны выполняются им за линейное время и такие
+конструкции допустимы; неподдерживаемые re2 конструкции тогда отклоняются.
+Стоимость шаблона замеряется в отдельном процессе с ограничением по времени:
+
+    python -m monitor.regex_keywords cost ШАБЛОН < образцы.json
+
+Процесс печатает строку ready после импорта модулей и только потом читает образцы,
+поэтому время запуска интерпретатора не входит в ограничение замера.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import re2 as regex_engine
+except ImportError:
+    import re as regex_engine
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+from config import (
+    REGEX_MAX_PATTERN_LENGTH, REGEX_PROFILE_EVERY, REGEX_MAX_COST_US, REGEX_COST_TIMEOUT,
+    REGEX_COST_STARTUP_TIMEOUT
+)
+from .normalization import normalize_text
+
+
+logger = logging.getLogger(__name__)
+
+LINEAR_ENGINE = regex_engine.__name__ == 're2'
+
+# Квантификатор с верхней границей больше этой считается неограниченным
+_UNBOUNDED_REPEAT = 100
+_REPEAT_OPS = {'MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'}
+_BACKREFERENCE_OPS = {'GROUPREF', 'GROUPREF_EXISTS'}
+# Узлы, не поглощающие символов (якоря и проверки вперед/назад)
+_ZERO_WIDTH_OPS = {'AT', 'ASSERT', 'ASSERT_NOT'}
+
+# Классы \d, \s, \w и их отрицания: заведомо непересекающиеся пары и проверка диапазонов
+_DISJOINT_CATEGORIES = {
+    frozenset(pair) for pair in [
+        ('CATEGORY_DIGIT', 'CATEGORY_SPACE'), ('CATEGORY_WORD', 'CATEGORY_SPACE'),
+        ('CATEGORY_DIGIT', 'CATEGORY_NOT_DIGIT'), ('CATEGORY_WORD', 'CATEGORY_NOT_WORD'),
+        ('CATEGORY_SPACE', 'CATEGORY_NOT_SPACE'),
+    ]
+}
+_CATEGORY_PATTERNS = {
+    'CATEGORY_DIGIT': r'\d', 'CATEGORY_NOT_DIGIT': r'\D', 'CATEGORY_SPACE': r'\s',
+    'CATEGORY_NOT_SPACE': r'\S', 'CATEGORY_WORD': r'\w', 'CATEGORY_NOT_WORD': r'\W',
+}
+# Диапазоны длиннее этого считаются пересекающимися с любым классом без проверки
+_MAX_CHECKED_RANGE = 2048
+
+# Сообщение максимальной длины (4096 символов) для оценки стоимости шаблона при сохранении
+_LONG_MESSAGE = (
+    "Ищу разработчика на WordPress, бюджет 30 000 руб., сроки 2 недели. Пишите https://t.me/example "
+    * 50
+)[:4096]
+
+
+class RegexKeywordError(ValueError):
+    """Шаблон не может использоваться как ключевое слово"""
+
+
+def _non_capturing(pattern: str) -> str:
+    """Заменяет группы (...) и (?P<имя>...) на (?:...)
+
+    Шаблоны объединяются в одну альтернативу, и одинаковые имена групп в двух
+    шаблонах сделали бы ее некомпилируемой; сами группы нужны только для
+    скобок, значения групп не используются.
+    """
+    result = []
+    position = 0
+    in_class = False
+    while position < len(pattern):
+        char = pattern[position]
+        if char == '\\':
+            result.append(pattern[position:position + 2])
+            position += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+            # "]" сразу после "[" или "[^" - символ класса, а не его конец
+            end = position + 1
+            if pattern[end:end + 1] == '^':
+                end += 1
+            if pattern[end:end + 1] == ']':
+                result.append(pattern[position:end + 1])
+                position = end + 1
+                continue
+        elif char == '(':
+            if pattern.startswith('(?P<', position):
+                close = pattern.find('>', position)
+                if close != -1:
+                    result.append('(?:')
+                    position = close + 1
+                    continue
+            elif not pattern.startswith('(?', position):
+                result.append('(?:')
+                position += 1
+                continue
+        result.append(char)
+        position += 1
+    return ''.join(result)
+
+
+def _combine(patterns: Iterable[str]) -> str:
+    return '(?i)' + '|'.join(f'(?:{_non_capturing(pattern)})' for pattern in patterns)
+
+
+def _compile(pattern: str):
+    # Все шаблоны работают по нормализованному тексту без учета регистра
+    return regex_engine.compile(_combine([pattern]))
+
+
+def _children(av) -> List[Any]:
+    """Вложенные подшаблоны узла разбора sre_parse"""
+    result = []
+    items = av if isinstance(av, (tuple, list)) else (av,)
+    for item in items:
+        if isinstance(item, sre_parse.SubPattern):
+            result.append(item)
+        elif isinstance(item, (tuple, list)):
+            result.extend(_children(item))
+    return result
+
+
+def _contains_branch(pattern) -> bool:
+    for op, av in pattern:
+        if op.name == 'BRANCH' or any(_contains_branch(child) for child in _children(av)):
+            return True
+    return False
+
+
+def _charset(pattern) -> Optional[List[Tuple]]:
+    """Символы, которые может поглотить подшаблон: [('range', от, до) | ('category', имя)]
+
+    None - любой символ (., [^...], неизвестные конструкции).
+    """
+    result: List[Tuple] = []
+    for op, av in pattern:
+        name = op.name
+        if name == 'LITERAL':
+            result.append(('range', av, av))
+        elif name == 'IN':
+            for item_op, item_av in av:
+                item_name = item_op.name
+                if item_name == 'LITERAL':
+                    result.append(('range', item_av, item_av))
+                elif item_name == 'RANGE':
+                    result.append(('range', item_av[0], item_av[1]))
+                elif item_name == 'CATEGORY':
+                    result.append(('category', item_av.name))
+                else:
+                    return None
+        elif name in _ZERO_WIDTH_OPS:
+            continue
+        elif name in _REPEAT_OPS or name in ('SUBPATTERN', 'BRANCH'):
+            for child in _children(av):
+                child_set = _charset(child)
+                if child_set is None:
+                    return None
+                result.extend(child_set)
+        else:
+            return None
+    return result
+
+
+def _disjoint(a: Tuple, b: Tuple) -> bool:
+    if a[0] == 'range' and b[0] == 'range':
+        return a[2] < b[1] or b[2] < a[1]
+    if a[0] == 'category' and b[0] == 'category':
+        return frozenset((a[1], b[1])) in _DISJOINT_CATEGORIES
+    char_range, category = (a, b) if a[0] == 'range' else (b, a)
+    if char_range[2] - char_range[1] > _MAX_CHECKED_RANGE or category[1] not in _CATEGORY_PATTERNS:
+        return False
+    category_re = regex_engine.compile(_CATEGORY_PATTERNS[category[1]])
+    return not any(category_re.match(chr(code)) for code in range(char_range[1], char_range[2] + 1))
+
+
+def _overlap(first: Optional[List[Tuple]], second: Optional[List[Tuple]]) -> bool:
+    if first is None or second is None:
+        return True
+    return not all(_disjoint(a, b) for a in first for b in second)
+
+
+def _flatten(pattern) -> List[Tuple]:
+    """Последовательность узлов с раскрытыми группами: (a+)(b+) -> a+ b+"""
+    items = []
+    for op, av in pattern:
+        if op.name == 'SUBPATTERN':
+            items.extend(_flatten(av[-1]))
+        else:
+            items.append((op, av))
+    return items
+
+
+def _check_adjacent(pattern):
+    """Неограниченные повторения подряд с общими символами (.*.*, \\d+\\.?\\d+)
+
+    Между ними могут стоять только узлы, совпадающие с пустой строкой. Разбиение
+    строки между такими повторениями перебирается полиномиально: k повторений
+    дают O(n^k) на сообщении без совпадения.
+    """
+    previous: List[Optional[List[Tuple]]] = []
+    for op, av in _flatten(pattern):
+        item_width = sre_parse.SubPattern(pattern.state, [(op, av)]).getwidth()[0]
+        if op.name in _REPEAT_OPS and av[1] > _UNBOUNDED_REPEAT:
+            charset = _charset(av[2])
+            if any(_overlap(charset, earlier) for earlier in previous):
+                raise RegexKeywordError(
+                    "неограниченные повторения подряд вроде .*.* или \\d+\\d+ приводят к долгому перебору"
+                )
+            previous = previous + [charset] if item_width == 0 else [charset]
+        elif item_width > 0:
+            previous = []
+
+
+def _check_tree(pattern, inside_repeat: bool, warnings: List[str]):
+    """Проверка конструкций с перебором; inside_repeat - внутри повторения с максимумом больше 1"""
+    _check_adjacent(pattern)
+    for op, av in pattern:
+        name = op.name
+        if name in _BACKREFERENCE_OPS:
+            raise RegexKeywordError("обратные ссылки (\\1) не поддерживаются")
+        if name in _REPEAT_OPS:
+            _, max_count, subpattern = av
+            unbounded = max_count > _UNBOUNDED_REPEAT
+            if unbounded and inside_repeat:
+                raise RegexKeywordError(
+                    "неограниченное повторение внутри повторения вроде (a+)+ или (.*a){12} "
+                    "приводит к катастрофическому перебору"
+                )
+            if unbounded and _contains_branch(subpattern):
+                warnings.append("повторение альтернативы (a|ab)+ может работать медленно")
+            _check_tree(subpattern, inside_repeat or max_count > 1, warnings)
+            continue
+        for child in _children(av):
+            _check_tree(child, inside_repeat, warnings)
+
+
+def validate_pattern(pattern: str, existing: Iterable[str] = ()) -> List[str]:
+    """Проверяет шаблон перед сохранением
+
+    Args:
+        existing: Уже сохраненные шаблоны - проверяется и их общая альтернатива с новым
+
+    Returns:
+        Предупреждения (шаблон допустим, но может быть медленным)
+
+    Raises:
+        RegexKeywordError: шаблон недопустим
+    """
+    if not pattern:
+        raise RegexKeywordError("пустой шаблон")
+    if len(pattern) > REGEX_MAX_PATTERN_LENGTH:
+        raise RegexKeywordError(f"шаблон длиннее {REGEX_MAX_PATTERN_LENGTH} символов")
+    try:
+        compiled = _compile(pattern)
+    except Exception as e:
+        raise RegexKeywordError(f"ошибка в шаблоне: {e}")
+    if compiled.search('') is not None:
+        raise RegexKeywordError("шаблон совпадает с пустой строкой, то есть с любым сообщением")
+
+    warnings: List[str] = []
+    if not LINEAR_ENGINE:
+        # re2 не перебирает с возвратами, проверка конструкций нужна только для re
+        try:
+            _check_tree(sre_parse.parse(pattern), False, warnings)
+        except RegexKeywordError as e:
+            raise RegexKeywordError(f"{e}; такие шаблоны допустимы только с модулем re2 (pip install google-re2)")
+
+    existing = list(existing)
+    if existing:
+        try:
+            regex_engine.compile(_combine(existing + [pattern]))
+        except Exception as e:
+            raise RegexKeywordError(f"шаблон несовместим с сохраненными: {e}")
+    return warnings
+
+
+def measure_pattern_cost(pattern: str, samples: Iterable[str] = ()) -> float:
+    """Оценка стоимости шаблона в микросекундах на сообщение
+
+    Максимум по образцам и сообщению максимальной длины; каждый образец
+    выполняется трижды, берется лучшее время (меньше шума от планировщика).
+    """
+    compiled = _compile(pattern)
+    cost = 0.0
+    for text in list(samples) + [_LONG_MESSAGE]:
+        text = normalize_text(text)
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            compiled.search(text)
+            timings.append((time.perf_counter() - started) * 1e6)
+        cost = max(cost, min(timings))
+    return cost
+
+
+# Строка готовности дочернего процесса замера (после импорта, до чтения образцов)
+_READY = b'ready'
+
+
+async def measure_pattern_cost_isolated(pattern: str, samples: Iterable[str] = (),
+                                        timeout: float = REGEX_COST_TIMEOUT) -> float:
+    """measure_pattern_cost в отдельном процессе, который убивается по таймауту
+
+    Модуль re не отпускает GIL во время поиска, поэтому зависший шаблон
+    в потоке остановил бы и цикл событий; процесс можно просто завершить.
+
+    timeout отсчитывается с момента готовности процесса: медленный запуск
+    интерпретатора на загруженном сервере не делает шаблон "слишком медленным".
+
+    Raises:
+        RegexKeywordError: замер не уложился в timeout секунд или завершился ошибкой
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, '-m', 'monitor.regex_keywords', 'cost', pattern,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        cwd=root,
+    )
+    try:
+        # Запуск и импорт (config, telethon через пакет monitor) не считаются временем замера
+        try:
+            ready = await asyncio.wait_for(process.stdout.readline(), REGEX_COST_STARTUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise RegexKeywordError(f"процесс замера не запустился за {REGEX_COST_STARTUP_TIMEOUT:g} с")
+        if ready.strip() != _READY:
+            _, stderr = await process.communicate()
+            raise RegexKeywordError(f"замер стоимости завершился ошибкой: {stderr.decode('utf-8', 'replace').strip()[-200:]}")
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(json.dumps(list(samples)).encode('utf-8')), timeout
+            )
+        except asyncio.TimeoutError:
+            raise RegexKeywordError(f"замер стоимости не уложился в {timeout:g} с - шаблон слишком медленный")
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    if process.returncode != 0:
+        raise RegexKeywordError(f"замер стоимости завершился ошибкой: {stderr.decode('utf-8', 'replace').strip()[-200:]}")
+    return float(stdout.decode().strip())
+
+
+def check_pattern_cost(cost_us: float):
+    """Raises RegexKeywordError, если стоимость шаблона больше REGEX_MAX_COST_US"""
+    if cost_us > REGEX_MAX_COST_US:
+        raise RegexKeywordError(
+            f"шаблон слишком дорогой: {cost_us:.0f} мкс на сообщение (допустимо до {REGEX_MAX_COST_US})"
+        )
+
+
+class RegexKeywords:
+    """Набор шаблонов, объединенный в одну альтернативу
+
+    Обычное сообщение проверяется одним проходом объединенного выражения; только
+    если оно нашло совпадение, шаблоны проверяются по отдельности, чтобы узнать,
+    какие именно сработали. Каждое REGEX_PROFILE_EVERY-е сообщение все шаблоны
+    выполняются по отдельности с замером времени - так видно, какой шаблон дорогой.
+
+    Шаблоны, не прошедшие validate_pattern или ломающие объединенное выражение,
+    пропускаются с предупреждением в лог - один неудачный шаблон в settings.json
+    не должен останавливать монитор.
+    """
+
+    def __init__(self, patterns: Iterable[str], profile_every: int = REGEX_PROFILE_EVERY):
+        self.patterns: List[str] = []
+        self._compiled = []
+        for pattern in patterns:
+            try:
+                validate_pattern(pattern)
+            except RegexKeywordError as e:
+                logger.warning(f"Шаблон «{pattern}» пропущен: {e}")
+                continue
+            self.patterns.append(pattern)
+            self._compiled.append(_compile(pattern))
+
+        self._combined = self._compile_combined() if self.patterns else None
+        self.profile_every = profile_every
+        self._messages = 0
+        # Для каждого шаблона: [замеров, суммарное время в мкс, максимум в мкс, совпадений]
+        self._costs: List[List[float]] = [[0, 0.0, 0.0, 0] for _ in self.patterns]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def copy(self, profile_every: Optional[int] = None) -> 'RegexKeywords':
+        """Копия с общими скомпилированными шаблонами и своими счетчиками стоимости"""
+        clone = RegexKeywords.__new__(RegexKeywords)
+        clone.patterns = list(self.patterns)
+        clone._compiled = list(self._compiled)
+        clone._combined = self._combined
+        clone.profile_every = self.profile_every if profile_every is None else profile_every
+        clone._messages = 0
+        clone._costs = [[0, 0.0, 0.0, 0] for _ in clone.patterns]
+        return clone
+
+    def _compile_combined(self):
+        try:
+            return regex_engine.compile(_combine(self.patterns))
+        except Exception as e:
+            logger.warning(f"Шаблоны не объединяются в одно выражение ({e}), поиск несовместимых")
+
+        # Шаблоны добавляются по одному; не компилирующийся вместе с предыдущими пропускается
+        patterns, compiled_patterns = [], []
+        for pattern, compiled in zip(self.patterns, self._compiled):
+            try:
+                regex_engine.compile(_combine(patterns + [pattern]))
+            except Exception as e:
+                logger.warning(f"Шаблон «{pattern}» пропущен: несовместим с остальными ({e})")
+                continue
+            patterns.append(pattern)
+            compiled_patterns.append(compiled)
+        self.patterns, self._compiled = patterns, compiled_patterns
+        return regex_engine.compile(_combine(patterns)) if patterns else None
+
+    def match(self, text: str, normalized: Optional[str] = None) -> List[str]:
+        """Шаблоны, найденные в тексте, в порядке объявления
+
+        normalized - уже полученный normalize_text(text).
+        """
+        if self._combined is None or not text:
+            return []
+        text = normalize_text(text) if normalized is None else normalized
+        self._messages += 1
+        if self.profile_every and self._messages % self.profile_every == 0:
+            return self._match_profiled(text)
+        if self._combined.search(text) is None:
+            return []
+        return [pattern for pattern, compiled in zip(self.patterns, self._compiled) if compiled.search(text)]
+
+    def _match_profiled(self, text: str) -> List[str]:
+        found = []
+        for pattern, compiled, cost in zip(self.patterns, self._compiled, self._costs):
+            started = time.perf_counter()
+            matched = compiled.search(text) is not None
+            elapsed = (time.perf_counter() - started) * 1e6
+            cost[0] += 1
+            cost[1] += elapsed
+            cost[2] = max(cost[2], elapsed)
+            if matched:
+                cost[3] += 1
+                found.append(pattern)
+        return found
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Замеренная стоимость шаблонов: {шаблон: {'samples', 'avg_us', 'max_us', 'hits'}}
+
+        hits - число совпадений среди замеренных сообщений.
+        """
+        stats = {}
+        for pattern, (samples, total, maximum, hits) in zip(self.patterns, self._costs):
+            stats[pattern] = {
+                'samples': int(samples),
+                'avg_us': total / samples if samples else None,
+                'max_us': maximum if samples else None,
+                'hits': int(hits),
+            }
+        return stats
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != 'cost':
+        print("Использование: python -m monitor.regex_keywords cost ШАБЛОН < образцы.json")
+        sys.exit(1)
+    print(_READY.decode(), flush=True)
+    print(measure_pattern_cost(sys.argv[2], json.load(sys.stdin)))
@@ -0,0 +1,144 @@
+"""
+Планировщик запросов Telethon с учетом FloodWait
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from telethon.errors import FloodWaitError
+
+from config import RPC_RATE_LIMITS, RPC_MAX_ATTEMPTS, RPC_MAX_FLOOD_WAIT
+
+
+logger = logging.getLogger(__name__)
+
+# Классы приоритета: меньше - важнее
+PRIORITY_LIVE = 0         # обработка живых сообщений (информация об отправителе)
+PRIORITY_INTERACTIVE = 1  # действия админа: проверка и добавление каналов
+PRIORITY_BACKGROUND = 2   # догрузка и поиск по истории
+
+
+class _TokenBucket:
+    """Корзина токенов с очередью ожидающих по приоритету"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._waiters: List[Tuple[int, int]] = []
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    async def acquire(self, priority: int, seq: int, paused_until: Callable[[], float]):
+        """Ждет токен; запросы с более высоким приоритетом обслуживаются первыми"""
+        entry = (priority, seq)
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                now = time.monotonic()
+                pause = paused_until() - now
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    continue
+                
+                self._refill(now)
+                ahead = sum(1 for waiter in self._waiters if waiter < entry)
+                if ahead == 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                # Ждем, пока накопятся токены для всех, кто впереди, и для нас
+                await asyncio.sleep(max((ahead + 1 - self.tokens) / self.rate, 0.001))
+        finally:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+
+class RpcScheduler:
+    """Общий планировщик запросов Telethon для всех подсистем
+    
+    Для каждой сессии и метода - своя корзина токенов (RPC_RATE_LIMITS). Ожидающие
+    запросы обслуживаются по классу приоритета: живые сообщения раньше действий админа,
+    а те раньше догрузки и поиска по истории. FloodWait приостанавливает все запросы
+    сессии сразу (пауза хранится в пуле сессий, и запросы по каналам переходят на
+    другие сессии), вместо того чтобы каждый вызов натыкался на него отдельно.
+    Статистика по подсистемам показывает, кто расходует лимиты.
+    """
+    
+    def __init__(self, pool):
+        self.pool = pool
+        self._buckets: Dict[Tuple[str, str], _TokenBucket] = {}
+        self._seq = itertools.count()
+        self.stats: Dict[str, Dict[str, float]] = {}
+    
+    def _bucket(self, session_name: str, method: str) -> _TokenBucket:
+        key = (session_name, method)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, burst = RPC_RATE_LIMITS.get(method, RPC_RATE_LIMITS['default'])
+            bucket = self._buckets[key] = _TokenBucket(rate, burst)
+        return bucket
+    
+    def _subsystem_stats(self, subsystem: str) -> Dict[str, float]:
+        stats = self.stats.get(subsystem)
+        if stats is None:
+            stats = self.stats[subsystem] = {'calls': 0, 'wait_time': 0.0, 'flood_waits': 0, 'flood_seconds': 0}
+        return stats
+    
+    async def acquire(self, client, method: str, priority: int = PRIORITY_INTERACTIVE, subsystem: str = 'other'):
+        """Ждет разрешения на один запрос через client (для постраничных iter_messages - на каждую страницу)"""
+        session_name = self.pool.name_of(client) or '?'
+        started = time.monotonic()
+        await self._bucket(session_name, method).acquire(
+            priority, next(self._seq), lambda: self.pool.flood_until.get(session_name, 0)
+        )
+        stats = self._subsystem_stats(subsystem)
+        stats['calls'] += 1
+        stats['wait_time'] += time.monotonic() - started
+    
+    async def call(self, method: str, request: Callable[[Any], Awaitable], channel_id: Optional[int] = None,
+                   client=None, priority: int = PRIORITY_INTERACTIVE, subsystem: str = 'other',
+                   max_attempts: int = RPC_MAX_ATTEMPTS):
+        """Выполняет запрос request(client) с ограничением частоты и повтором после FloodWait
+        
+        Args:
+            method: Имя метода Telethon (ключ RPC_RATE_LIMITS)
+            channel_id: Канал запроса - клиент выбирается пулом сессий (владелец или свободная сессия)
+            client: Конкретный клиент вместо выбора по каналу
+        
+        Raises:
+            FloodWaitError: попытки исчерпаны или ожидание дольше RPC_MAX_FLOOD_WAIT
+        """
+        for attempt in range(1, max_attempts + 1):
+            target = client or self.pool.client_for(channel_id)
+            await self.acquire(target, method, priority, subsystem)
+            try:
+                return await request(target)
+            except FloodWaitError as e:
+                self.report_flood(target, e.seconds, subsystem)
+                if attempt == max_attempts or e.seconds > RPC_MAX_FLOOD_WAIT:
+                    raise
+    
+    def report_flood(self, client, seconds: int, subsystem: str = 'other'):
+        """Приостанавливает все запросы сессии на время FloodWait"""
+        self.pool.report_flood(client, seconds)
+        stats = self._subsystem_stats(subsystem)
+        stats['flood_waits'] += 1
+        stats['flood_seconds'] += seconds
+        logger.warning(f"FloodWait {seconds} с ({subsystem}), запросы сессии {self.pool.name_of(client)} приостановлены")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика расхода лимитов по подсистемам и текущие паузы сессий"""
+        now = time.monotonic()
+        return {
+            'subsystems': {name: dict(stats) for name, stats in self.stats.items()},
+            'paused_sessions': {
+                name: until - now for name, until in self.pool.flood_until.items() if until > now
+            }
+        }
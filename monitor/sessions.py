@@ -0,0 +1,165 @@
+"""
+Пул Telethon сессий с распределением каналов между аккаунтами
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from telethon import TelegramClient
+
+
+logger = logging.getLogger(__name__)
+
+
+def _weight(session_name: str, channel_id: int) -> int:
+    """Стабильный вес пары (сессия, канал) - не зависит от запуска процесса"""
+    digest = hashlib.md5(f"{session_name}:{channel_id}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class SessionPool:
+    """Набор Telethon сессий, между которыми распределены каналы
+    
+    Владелец канала выбирается rendezvous-хэшированием среди живых сессий, аккаунт
+    которых состоит в канале (members): распределение стабильно между перезапусками,
+    а при потере сессии переезжают только ее каналы. События обрабатывает только
+    сессия-владелец; пока ни одна сессия не подтвердила членство, владельца нет и события
+    канала принимаются от любой сессии. Запросы по каналу идут через владельца, а если
+    он в FloodWait - через следующую по весу сессию, поэтому ограничение одного аккаунта
+    не останавливает остальные.
+    """
+    
+    def __init__(self, session_names: List[str], api_id: int, api_hash: str):
+        self.session_names = list(session_names)
+        self.clients: Dict[str, TelegramClient] = {
+            name: TelegramClient(name, api_id, api_hash) for name in self.session_names
+        }
+        self.alive: List[str] = []
+        self.flood_until: Dict[str, float] = {}
+        # Каналы, в которых подтверждено членство аккаунта сессии (по списку диалогов)
+        self.members: Dict[str, Set[int]] = {}
+        # Вызывается при потере сессии: (имя, список живых сессий до потери)
+        self.on_session_lost: Optional[Callable[[str, List[str]], Awaitable]] = None
+        self._watch_tasks: List[asyncio.Task] = []
+        self._stopping = False
+    
+    @property
+    def primary(self) -> TelegramClient:
+        """Клиент для запросов, не привязанных к каналу (первая живая сессия)"""
+        name = self.alive[0] if self.alive else self.session_names[0]
+        return self.clients[name]
+    
+    def is_connected(self) -> bool:
+        """Есть ли хотя бы одна подключенная сессия"""
+        return any(self.clients[name].is_connected() for name in self.alive)
+    
+    async def start(self, phone: str):
+        """Подключает сессии: основную - с авторизацией, остальные - только авторизованные ранее"""
+        primary_name = self.session_names[0]
+        await self.clients[primary_name].start(phone=phone)
+        started = [primary_name]
+        
+        async def connect(name: str) -> Optional[str]:
+            client = self.clients[name]
+            try:
+                await client.connect()
+                if await client.is_user_authorized():
+                    return name
+                logger.error(f"Сессия {name} не авторизована и будет пропущена")
+            except Exception as e:
+                logger.error(f"Не удалось подключить сессию {name}: {e}")
+            await client.disconnect()
+            return None
+        
+        results = await asyncio.gather(*(connect(name) for name in self.session_names[1:]))
+        started.extend(name for name in results if name)
+        # Порядок живых сессий совпадает с порядком в конфигурации
+        self.alive = [name for name in self.session_names if name in started]
+        
+        self._watch_tasks = [asyncio.ensure_future(self._watch(name)) for name in self.alive]
+        logger.info(f"Подключено сессий: {len(self.alive)} из {len(self.session_names)}")
+    
+    async def stop(self):
+        """Отключает все сессии"""
+        self._stopping = True
+        for task in self._watch_tasks:
+            task.cancel()
+        await asyncio.gather(*(client.disconnect() for client in self.clients.values()), return_exceptions=True)
+    
+    async def _watch(self, name: str):
+        """Ждет окончательного отключения сессии и перераспределяет ее каналы"""
+        await self.clients[name].disconnected
+        if self._stopping or name not in self.alive:
+            return
+        
+        previous_alive = list(self.alive)
+        self.alive.remove(name)
+        logger.error(f"Сессия {name} отключена, осталось сессий: {len(self.alive)}")
+        if self.on_session_lost:
+            try:
+                await self.on_session_lost(name, previous_alive)
+            except Exception as e:
+                logger.error(f"Ошибка при перераспределении каналов сессии {name}: {e}")
+    
+    def set_members(self, name: str, channel_ids: Iterable[int]):
+        """Запоминает каналы, в которых состоит аккаунт сессии"""
+        self.members[name] = set(channel_ids)
+    
+    def owner(self, channel_id: int, among: Optional[Iterable[str]] = None) -> Optional[str]:
+        """Сессия-владелец канала среди живых (или переданных) сессий, состоящих в канале
+        
+        None, если ни одна из них не подтвердила членство в канале.
+        """
+        candidates = [
+            name for name in (self.alive if among is None else among)
+            if channel_id in self.members.get(name, ())
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda name: _weight(name, channel_id))
+    
+    def partition(self, channel_ids: Iterable[int]) -> Dict[str, List[int]]:
+        """Распределение каналов по живым сессиям (каналы без владельца не входят)"""
+        shards: Dict[str, List[int]] = {name: [] for name in self.alive}
+        for channel_id in channel_ids:
+            name = self.owner(channel_id)
+            if name is not None:
+                shards[name].append(channel_id)
+        return shards
+    
+    def client_for(self, channel_id: Optional[int] = None) -> TelegramClient:
+        """Клиент для запроса по каналу: владелец, а если он в FloodWait - следующая по весу сессия"""
+        if channel_id is None or not self.alive:
+            return self.primary
+        
+        now = time.monotonic()
+        # Сначала сессии, состоящие в канале, затем остальные (публичный канал читается и без членства)
+        ranked = sorted(
+            self.alive,
+            key=lambda name: (channel_id in self.members.get(name, ()), _weight(name, channel_id)),
+            reverse=True
+        )
+        for name in ranked:
+            if self.flood_until.get(name, 0) <= now:
+                return self.clients[name]
+        # Все сессии в FloodWait - используем ту, что освободится раньше
+        return self.clients[min(ranked, key=lambda name: self.flood_until[name])]
+    
+    def name_of(self, client: TelegramClient) -> Optional[str]:
+        """Имя сессии клиента"""
+        for name, session_client in self.clients.items():
+            if session_client is client:
+                return name
+        return None
+    
+    def report_flood(self, client: TelegramClient, seconds: int):
+        """Отмечает FloodWait сессии: до его окончания запросы идут через другие сессии"""
+        name = self.name_of(client)
+        if name is None:
+            return
+        self.flood_until[name] = max(self.flood_until.get(name, 0), time.monotonic() + seconds)
+        if len(self.alive) > 1:
+            logger.warning(f"Сессия {name} в FloodWait на {seconds} с, запросы переключены на другие сессии")
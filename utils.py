@@ -2,9 +2,13 @@
 Утилиты для работы с приложением
 """
 
+import asyncio
 import logging
+import re
 import sys
+import time
 from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple, Union
 
 
 def setup_logging(level=logging.INFO):
@@ -26,12 +30,12 @@ def ensure_directories():
         Path(dir_name).mkdir(exist_ok=True)
 
 
-def format_message_for_display(message_data):
+def format_message_for_display(found_message):
     """Форматирует данные сообщения для отображения"""
-    channel_name = message_data.get('channel_name', 'Неизвестный канал')
-    keywords = ', '.join(message_data.get('found_keywords', []))
-    text = message_data.get('text', '')
-    date = message_data.get('date', 'Неизвестно')
+    channel_name = found_message.channel_name or 'Неизвестный канал'
+    keywords = ', '.join(found_message.found_keywords)
+    text = found_message.text
+    date = found_message.date or 'Неизвестно'
     
     # Обрезаем длинный текст
     if len(text) > 200:
@@ -46,19 +50,72 @@ def format_message_for_display(message_data):
     }
 
 
+# Ссылки вида t.me/name, t.me/c/123456/789, telegram.me/name
+_TME_LINK_RE = re.compile(r'^(?:https?://)?(?:www\.)?(?:t|telegram)\.me/(.+)$', re.IGNORECASE)
+_USERNAME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9_]{3,31}$')
+
+
+def parse_channel_references(text: str) -> List[str]:
+    """Разбивает текст на ссылки на каналы (ID, @username, t.me ссылки)
+    
+    Разделители: перевод строки, запятая, точка с запятой, пробел. Дубликаты удаляются.
+    """
+    entries = re.split(r'[\s,;]+', text or '')
+    unique_entries = []
+    seen = set()
+    for entry in entries:
+        entry = entry.strip()
+        if entry and entry.lower() not in seen:
+            seen.add(entry.lower())
+            unique_entries.append(entry)
+    return unique_entries
+
+
+def normalize_channel_reference(entry: str) -> Union[int, str, None]:
+    """Приводит ссылку на канал к виду для get_entity
+    
+    Returns:
+        int ID канала (без -100), str username, либо None если формат не распознан
+    """
+    entry = entry.strip()
+    
+    link_match = _TME_LINK_RE.match(entry)
+    if link_match:
+        path = link_match.group(1).strip('/').split('?')[0]
+        parts = path.split('/')
+        if parts[0] == 'c' and len(parts) > 1 and parts[1].isdigit():
+            return int(parts[1])
+        if parts[0].startswith('+') or parts[0] == 'joinchat':
+            return None  # Инвайт-ссылки без вступления не разрешить
+        entry = parts[0]
+    
+    if entry.startswith('@'):
+        entry = entry[1:]
+    
+    digits = entry.lstrip('-')
+    if digits.isdigit():
+        if digits.startswith('100') and len(digits) > 10:
+            digits = digits[3:]
+        return int(digits)
+    
+    if _USERNAME_RE.match(entry):
+        return entry.lower()
+    return None
+
+
 def validate_config():
     """Проверка конфигурации"""
-    from config import API_ID, API_HASH, BOT_TOKEN, ADMIN_ID
+    from config import app_config, ADMIN_ID
     
     errors = []
     
-    if not API_ID or API_ID == 0:
+    if not app_config.api_id:
         errors.append("API_ID не настроен")
     
-    if not API_HASH:
+    if not app_config.api_hash:
         errors.append("API_HASH не настроен")
     
-    if not BOT_TOKEN:
+    if not app_config.bot_token:
         errors.append("BOT_TOKEN не настроен")
     
     if not ADMIN_ID or ADMIN_ID == 0:
@@ -69,17 +126,81 @@ def validate_config():
 
 def get_app_info():
     """Получение информации о приложении"""
-    from config import MONITORED_CHANNELS, KEYWORDS
+    from config import app_config
     from database import JsonDatabase
     
     db = JsonDatabase()
-    settings = db.load_settings()
-    messages_count = len(db.load_found_messages())
+    settings = app_config.settings
+    messages_count = db.count_found_messages()
     
     return {
-        'channels_count': len(MONITORED_CHANNELS),
-        'keywords_count': len(settings.get('keywords', KEYWORDS)),
+        'channels_count': len(app_config.monitored_channels),
+        'keywords_count': len(app_config.keywords),
         'messages_found': messages_count,
-        'monitoring_enabled': settings.get('monitoring_enabled', True),
+        'monitoring_enabled': app_config.monitoring_enabled,
         'last_update': settings.get('last_update', 'Никогда')
     }
+
+
+class StartupGraph:
+    """Граф зависимостей шагов запуска
+    
+    Каждый шаг запускается отдельной asyncio задачей, как только завершены
+    все его зависимости; независимые шаги выполняются параллельно.
+    Длительность каждого шага (от старта графа до завершения) сохраняется в finished_at.
+    """
+    
+    def __init__(self):
+        self._steps: Dict[str, Tuple[Callable[[], Awaitable], Tuple[str, ...]]] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.finished_at: Dict[str, float] = {}
+        self.started_at = None
+    
+    def add(self, name: str, factory: Callable[[], Awaitable], depends_on: Iterable[str] = ()):
+        """Добавляет шаг: factory() возвращает корутину, depends_on - имена шагов-зависимостей"""
+        depends_on = tuple(depends_on)
+        for dependency in depends_on:
+            if dependency not in self._steps:
+                raise ValueError(f"Шаг {name} зависит от неизвестного шага {dependency}")
+        self._steps[name] = (factory, depends_on)
+    
+    async def _run_step(self, name: str):
+        factory, depends_on = self._steps[name]
+        if depends_on:
+            await asyncio.gather(*(self.tasks[dependency] for dependency in depends_on))
+        result = await factory()
+        self.finished_at[name] = time.monotonic() - self.started_at
+        return result
+    
+    def start(self) -> Dict[str, asyncio.Task]:
+        """Запускает все шаги и возвращает их задачи"""
+        self.started_at = time.monotonic()
+        # Шаги добавляются только после своих зависимостей, поэтому порядок добавления топологический
+        for name in self._steps:
+            self.tasks[name] = asyncio.ensure_future(self._run_step(name))
+        return self.tasks
+    
+    def elapsed(self) -> float:
+        """Время с момента запуска графа в секундах"""
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+
+class RateLimiter:
+    """Ограничитель частоты запросов (не более rate запросов в секунду)
+    
+    Общий для нескольких задач: каждый acquire() занимает следующий свободный слот.
+    """
+    
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self.acquired = 0
+    
+    async def acquire(self):
+        """Ждет свободного слота"""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        self.acquired += 1
+        if slot > now:
+            await asyncio.sleep(slot - now)